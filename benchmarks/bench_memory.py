@@ -0,0 +1,148 @@
+"""Memory benchmark: compact slotted entities vs. the original dict-based ones.
+
+Builds a census of patients (each with a couple of medical records), rooms
+and doctors using the old plain-object representation and the current
+slotted one, and reports the traced memory of each. It also times discharging
+every patient from a busy doctor, which was an O(n) list.remove() per patient
+before Doctor.current_patients became a set.
+
+    python benchmarks/bench_memory.py --patients 200000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import Doctor, Patient, Room
+
+
+class LegacyPatient:
+    """Patient as it was stored before __slots__ and MedicalRecord"""
+    def __init__(self, patient_id, name, age, condition, priority=3):
+        self.patient_id = patient_id
+        self.name = name
+        self.age = age
+        self.condition = condition
+        self.priority = priority
+        self.admission_time = datetime.now()
+        self.medical_history = []
+        self.assigned_doctor = None
+        self.room_number = None
+        self.status = "Waiting"
+
+    def add_medical_record(self, record):
+        self.medical_history.append({
+            'timestamp': datetime.now(),
+            'record': record
+        })
+
+
+class LegacyDoctor:
+    def __init__(self, doctor_id, name, specialization, max_patients=10):
+        self.doctor_id = doctor_id
+        self.name = name
+        self.specialization = specialization
+        self.max_patients = max_patients
+        self.current_patients = []
+        self.schedule = {}
+        self.availability = True
+
+
+class LegacyRoom:
+    def __init__(self, room_number, room_type, capacity=1):
+        self.room_number = room_number
+        self.room_type = room_type
+        self.capacity = capacity
+        self.occupied_beds = 0
+        self.patients = []
+        self.is_available = True
+
+
+RECORDS = ("Initial assessment", "Follow-up vitals")
+
+
+def build_census(patient_cls, doctor_cls, room_cls, count):
+    patients = []
+    for i in range(count):
+        patient = patient_cls(f"P{i:06d}", f"Patient {i}", 20 + i % 60, "fever and cough", 1 + i % 4)
+        for record in RECORDS:
+            patient.add_medical_record(record)
+        patients.append(patient)
+    rooms = [room_cls(f"R{i:05d}", "General", 4) for i in range(count // 4)]
+    doctors = [doctor_cls(f"D{i:04d}", f"Doctor {i}", "General Medicine") for i in range(max(1, count // 100))]
+    return patients, rooms, doctors
+
+
+def measure_memory(patient_cls, doctor_cls, room_cls, count):
+    gc.collect()
+    tracemalloc.start()
+    census = build_census(patient_cls, doctor_cls, room_cls, count)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del census
+    gc.collect()
+    return current, peak
+
+
+def measure_discharge(container_factory, count):
+    """Seconds to add then remove `count` patient IDs from one membership container"""
+    members = container_factory()
+    add = members.append if isinstance(members, list) else members.add
+    ids = [f"P{i:06d}" for i in range(count)]
+    for patient_id in ids:
+        add(patient_id)
+    start = time.perf_counter()
+    for patient_id in ids:
+        members.remove(patient_id)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--patients", type=int, default=100000)
+    parser.add_argument("--discharge-load", type=int, default=20000,
+                        help="patients on one doctor for the discharge timing")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    legacy_current, legacy_peak = measure_memory(LegacyPatient, LegacyDoctor, LegacyRoom, args.patients)
+    compact_current, compact_peak = measure_memory(Patient, Doctor, Room, args.patients)
+    legacy_discharge = measure_discharge(list, args.discharge_load)
+    compact_discharge = measure_discharge(set, args.discharge_load)
+
+    results = {
+        "patients": args.patients,
+        "legacy_bytes": legacy_current,
+        "compact_bytes": compact_current,
+        "legacy_peak_bytes": legacy_peak,
+        "compact_peak_bytes": compact_peak,
+        "legacy_bytes_per_patient": legacy_current / args.patients,
+        "compact_bytes_per_patient": compact_current / args.patients,
+        "discharge_load": args.discharge_load,
+        "legacy_discharge_seconds": legacy_discharge,
+        "compact_discharge_seconds": compact_discharge,
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    saved = 100 * (1 - compact_current / legacy_current)
+    print(f"Census of {args.patients} patients (2 medical records each)")
+    print(f"  Legacy representation:  {legacy_current / 2**20:8.1f} MiB "
+          f"({results['legacy_bytes_per_patient']:.0f} B/patient)")
+    print(f"  Compact representation: {compact_current / 2**20:8.1f} MiB "
+          f"({results['compact_bytes_per_patient']:.0f} B/patient)")
+    print(f"  Saved: {saved:.1f}%")
+    print(f"Discharging {args.discharge_load} patients from one doctor")
+    print(f"  list.remove(): {legacy_discharge * 1000:8.1f} ms")
+    print(f"  set.remove():  {compact_discharge * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Overhead of operation metrics: the same workload with metrics off, on, and off again.
+
+Each round registers, admits and discharges patients on a fresh hospital.
+Disabling metrics removes the timing wrappers, so "off again" should match
+"off" within noise; "on" shows the cost of timing every call.
+
+    python benchmarks/bench_metrics.py --patients 20000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import HospitalManagementSystem
+
+
+def workload(hms, patients):
+    """Seconds to register, admit and discharge the given number of patients"""
+    for _ in range(patients // 10 + 1):
+        hms.add_room("General", 10)
+    for number in range(patients // 50 + 1):
+        hms.add_doctor(f"Bench Doctor {number}", "General Medicine", 50)
+    start = time.perf_counter()
+    for number in range(patients):
+        hms.register_patient(f"Patient {number}", 40, "flu", 3)
+    admitted = [hms.admit_patient().data for _ in range(patients)]
+    for patient in admitted:
+        hms.discharge_patient(patient.patient_id)
+    return time.perf_counter() - start
+
+
+def run(patients, rounds):
+    timings = {'off': [], 'on': [], 'off_again': []}
+    for _ in range(rounds):
+        for mode in timings:
+            hms = HospitalManagementSystem()
+            if mode != 'off':
+                hms.metrics.enable()
+            if mode == 'off_again':
+                hms.metrics.disable()
+            timings[mode].append(workload(hms, patients))
+    # Best of the rounds is the least noisy estimate
+    best = {mode: min(times) for mode, times in timings.items()}
+    operations = patients * 3
+    return {
+        'patients': patients,
+        'rounds': rounds,
+        'seconds': {mode: round(seconds, 4) for mode, seconds in best.items()},
+        'overhead_ns_per_operation': round((best['on'] - best['off']) / operations * 1e9, 1),
+        'overhead_percent': round((best['on'] / best['off'] - 1) * 100, 2),
+        'disabled_overhead_percent': round((best['off_again'] / best['off'] - 1) * 100, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cost of operation metrics")
+    parser.add_argument("--patients", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run(args.patients, args.rounds), indent=2))
+
+
+if __name__ == "__main__":
+    main()
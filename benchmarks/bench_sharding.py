@@ -0,0 +1,91 @@
+"""Throughput of a sharded hospital as the number of shard processes grows.
+
+For each shard count the same census is split across identical campuses
+(campus_specs), with beds and doctor places for every patient in total.
+The router then registers --patients patients in batches of --batch,
+admits them all and discharges them all, and each phase reports
+operations per second plus the speedup over one shard:
+
+    python benchmarks/bench_sharding.py --shards 1,2,4 --patients 20000
+
+Shards are processes, so the speedup is bounded by the number of cores
+(printed with the report). --mode departments splits a fixed set of
+departments instead; the shard count is then ignored.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sharding import ShardRouter, campus_specs, department_specs
+
+CONDITIONS = ["stroke", "fracture", "chest pain", "migraine", "infection", "routine check-up", "flu", "sprain"]
+
+
+def run(shards, patients, batch, mode, seed):
+    rng = random.Random(seed)
+    beds_per_room = 4
+    if mode == "campus":
+        rooms_per_type = -(-patients // (shards * 4 * beds_per_room))
+        specs = campus_specs(shards, rooms_per_type, beds_per_room,
+                             doctors_per_specialization=-(-patients // (shards * 5 * 50)), max_patients=50)
+    else:
+        # Each department gets beds and doctor places for the whole census
+        specs = department_specs(rooms_per_type=-(-patients // (2 * beds_per_room)), beds_per_room=beds_per_room,
+                                 doctors_per_specialization=-(-patients // (2 * 50)), max_patients=50)
+    records = [(f"Shard Patient {number}", rng.randint(1, 95), rng.choice(CONDITIONS), rng.randint(1, 4))
+               for number in range(patients)]
+    router = ShardRouter(specs)
+    try:
+        timings = {}
+        started = time.perf_counter()
+        for start in range(0, patients, batch):
+            router.register_patients(records[start:start + batch])
+        timings['register'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        admitted = [patient_id for report in router.admit_all().values() for patient_id in report['admitted']]
+        timings['admit'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for start in range(0, len(admitted), batch):
+            router.discharge_patients(admitted[start:start + batch])
+        timings['discharge'] = time.perf_counter() - started
+        statistics = router.get_statistics()
+    finally:
+        router.close()
+    return {'shards': len(specs), 'admitted': len(admitted), 'discharged': statistics['discharged_patients'],
+            'ops_per_sec': {phase: round((len(admitted) if phase != 'register' else patients) / seconds)
+                            for phase, seconds in timings.items()}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded hospital throughput by shard count")
+    parser.add_argument("--shards", default="1,2,4", help="comma-separated shard counts")
+    parser.add_argument("--patients", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=500, help="patients per register/discharge call")
+    parser.add_argument("--mode", choices=["campus", "departments"], default="campus")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    counts = [int(count) for count in args.shards.split(",")] if args.mode == "campus" else [2]
+    print(f"{args.patients} patients, {os.cpu_count()} CPUs, {args.mode} mode")
+    print(f"{'shards':>6} {'register/s':>11} {'admit/s':>9} {'discharge/s':>12} {'speedup':>8}")
+    baseline = None
+    for shards in counts:
+        result = run(shards, args.patients, args.batch, args.mode, args.seed)
+        rates = result['ops_per_sec']
+        total = sum(1 / rate for rate in rates.values() if rate)
+        baseline = baseline or total
+        print(f"{result['shards']:>6} {rates['register']:>11} {rates['admit']:>9} {rates['discharge']:>12} "
+              f"{baseline / total:>7.2f}x")
+        if result['admitted'] != args.patients or result['discharged'] != args.patients:
+            print(f"       only {result['admitted']} admitted and {result['discharged']} discharged")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""Load test for server.py: many keep-alive connections pipelining a mix of requests.
+
+By default a server is started on a free local port in a subprocess, given
+--rooms extra rooms and --doctors extra doctors so admissions can succeed,
+and stopped afterwards. Pass --port to test a server that is already
+running instead. Each connection sends --pipeline requests back to back,
+then reads their responses in order, until --requests have been answered
+in total. The request mix is register, admit, discharge, search, stats and
+schedule:
+
+    python benchmarks/load_http.py --connections 16 --pipeline 8 --requests 50000
+
+The report gives requests per second, latency percentiles in milliseconds
+(from sending a request to reading its response) and counts by status.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONDITIONS = ["stroke", "fracture", "chest pain", "migraine", "infection", "routine check-up", "flu", "sprain"]
+DEFAULT_MIX = "register=35,admit=20,discharge=15,search=15,stats=10,schedule=5"
+
+
+class Client:
+    """One keep-alive connection"""
+
+    def __init__(self, reader, writer, host):
+        self.reader = reader
+        self.writer = writer
+        self.host = host
+
+    @classmethod
+    async def connect(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer, host)
+
+    def send(self, method, path, body=None):
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+                          f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1") + payload)
+
+    async def receive(self):
+        """(status, body) of the next response"""
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ")[1])
+        length = 0
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length)) if length else None
+
+    async def request(self, method, path, body=None):
+        self.send(method, path, body)
+        await self.writer.drain()
+        return await self.receive()
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class LoadTest:
+    def __init__(self, host, port, connections, pipeline, requests, mix, seed):
+        self.host = host
+        self.port = port
+        self.connections = connections
+        self.pipeline = pipeline
+        self.remaining = requests
+        self.mix = mix
+        self.random = random.Random(seed)
+        self.admitted = []  # Patient IDs admitted during the run, for discharges
+        self.patients = []
+        self.doctors = []
+        self.latencies = []
+        self.statuses = Counter()
+        self.by_kind = Counter()
+
+    def next_request(self):
+        kind = self.random.choices(list(self.mix), list(self.mix.values()))[0]
+        self.by_kind[kind] += 1
+        if kind == "register":
+            return kind, "POST", "/patients", {"name": f"Load Patient {self.random.randrange(10 ** 6)}",
+                                                "age": self.random.randint(1, 95),
+                                                "condition": self.random.choice(CONDITIONS),
+                                                "priority": self.random.randint(1, 4)}
+        if kind == "admit":
+            return kind, "POST", "/admissions", {}
+        if kind == "discharge" and self.admitted:
+            patient_id = self.admitted.pop(self.random.randrange(len(self.admitted)))
+            return kind, "POST", f"/patients/{patient_id}/discharge", None
+        if kind == "schedule" and self.patients and self.doctors:
+            when = datetime.now() + timedelta(hours=2, minutes=30 * self.random.randrange(100000))
+            return kind, "POST", "/appointments", {"patient_id": self.random.choice(self.patients),
+                                                   "doctor_id": self.random.choice(self.doctors),
+                                                   "appointment_time": when.isoformat(timespec="minutes")}
+        if kind == "search":
+            return kind, "GET", f"/patients?search=Load+Patient+{self.random.randrange(1, 10)}&limit=10", None
+        return "stats", "GET", "/stats", None
+
+    def observe(self, kind, status, body):
+        self.statuses[status] += 1
+        if not body or not body.get("success"):
+            return
+        if kind == "admit":
+            self.admitted.append(body["data"]["patient_id"])
+        elif kind == "register" and len(self.patients) < 10000:
+            self.patients.append(body["data"]["patient_id"])
+
+    async def connection(self):
+        client = await Client.connect(self.host, self.port)
+        try:
+            while self.remaining > 0:
+                count = min(self.pipeline, self.remaining)
+                self.remaining -= count
+                batch = [self.next_request() for _ in range(count)]
+                started = time.perf_counter()
+                for _, method, path, body in batch:
+                    client.send(method, path, body)
+                await client.writer.drain()
+                for kind, _, _, _ in batch:
+                    status, body = await client.receive()
+                    self.latencies.append(time.perf_counter() - started)
+                    self.observe(kind, status, body)
+        finally:
+            await client.close()
+
+    async def setup(self, rooms, doctors):
+        client = await Client.connect(self.host, self.port)
+        try:
+            types = ["ICU", "Emergency", "General", "Private"]
+            for number in range(rooms):
+                await client.request("POST", "/rooms", {"room_type": types[number % 4], "capacity": 4})
+            for number in range(doctors):
+                status, body = await client.request("POST", "/doctors", {
+                    "name": f"Load Doctor {number}", "specialization": "General Medicine", "max_patients": 20})
+                if body and body.get("success"):
+                    self.doctors.append(body["data"]["doctor_id"])
+        finally:
+            await client.close()
+
+    async def run(self):
+        started = time.perf_counter()
+        await asyncio.gather(*(self.connection() for _ in range(self.connections)))
+        elapsed = time.perf_counter() - started
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction):
+            return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 2)
+        return {'requests': len(latencies), 'seconds': round(elapsed, 3),
+                'requests_per_sec': round(len(latencies) / elapsed), 'p50_ms': percentile(0.5),
+                'p99_ms': percentile(0.99), 'max_ms': round(latencies[-1] * 1000, 2),
+                'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+                'mix': dict(self.by_kind), 'connections': self.connections, 'pipeline': self.pipeline}
+
+
+def start_server():
+    """Run server.py on a free port; returns (process, port)"""
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "server.py"), "--port", "0"],
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()  # "Serving on http://127.0.0.1:PORT"
+    if not line:
+        raise RuntimeError("server.py exited before it started serving")
+    return process, int(line.rsplit(":", 1)[1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the hospital HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="test a running server instead of starting one")
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--pipeline", type=int, default=8, help="requests in flight per connection")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"request kinds and weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--rooms", type=int, default=100, help="rooms of 4 beds added before the run")
+    parser.add_argument("--doctors", type=int, default=20, help="doctors (20 patients each) added before the run")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    mix = {kind: float(weight) for kind, weight in (item.split("=") for item in args.mix.split(","))}
+
+    process = None
+    port = args.port
+    if port is None:
+        process, port = start_server()
+    try:
+        test = LoadTest(args.host, port, args.connections, args.pipeline, args.requests, mix, args.seed)
+        asyncio.run(test.setup(args.rooms, args.doctors))
+        report = asyncio.run(test.run())
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['requests']} requests in {report['seconds']}s over {report['connections']} connections "
+              f"(pipeline {report['pipeline']}): {report['requests_per_sec']} req/s")
+        print(f"Latency ms: p50 {report['p50_ms']}  p99 {report['p99_ms']}  max {report['max_ms']}")
+        print(f"Statuses: {report['statuses']}")
+    return 0 if all(status.startswith(("2", "4")) for status in report['statuses']) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""Benchmark suite for the core hospital operations at 10^3 to 10^6 entities.
+
+For every size a fresh hospital is filled with that many patients (plus one
+bed per patient and a doctor per 50 patients), then each operation is timed
+call by call on a sample of up to --sample calls:
+
+    register     register_patient() into the full census
+    search       patient_bst.search() for random existing IDs
+    inorder      patient_bst.inorder_traversal() of the whole census
+    admit        admit_patient(), the headless core of admit_next_patient()
+    discharge    discharge_patient()
+    appointment  schedule_appointment() on free slots
+    statistics   get_statistics(), which get_hospital_statistics() prints
+    undo         undo_last(), the headless core of undo_last_operation()
+    redo         redo_last() of the operations just undone
+
+Each size runs in its own process, so peak RSS is per size. The JSON report
+(ops/sec, p50/p99 latency in microseconds, peak RSS in MB) can be compared
+against one from another commit:
+
+    python benchmarks/run_benchmarks.py --output before.json
+    python benchmarks/run_benchmarks.py --sizes 1000,10000 --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from clock import VirtualClock
+from main import HospitalManagementSystem, Patient, Priority, ROOM_TYPES, record_id_key
+
+CONDITIONS = ["stroke", "fracture", "chest pain", "migraine", "infection", "routine check-up", "flu", "sprain"]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] / 1000, 2)
+
+
+def measure(op, size, calls):
+    """Time each zero-argument callable; returns one result row"""
+    latencies = []
+    started = time.perf_counter()
+    for call in calls:
+        begin = time.perf_counter_ns()
+        call()
+        latencies.append(time.perf_counter_ns() - begin)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {'op': op, 'size': size, 'calls': len(latencies),
+            'ops_per_sec': round(len(latencies) / elapsed, 1) if latencies else None,
+            'p50_us': percentile(latencies, 0.50),
+            'p99_us': percentile(latencies, 0.99),
+            'peak_rss_mb': peak_rss_mb()}
+
+
+def build_hospital(size, rng):
+    clock = VirtualClock(datetime(2025, 1, 1))
+    hms = HospitalManagementSystem(clock=clock)
+    for number in range((size + 9) // 10):
+        hms.add_room(ROOM_TYPES[number % len(ROOM_TYPES)], 10)
+    specializations = ["Cardiology", "Neurology", "Emergency Medicine", "Orthopedics", "Pediatrics"]
+    for number in range((size + 49) // 50):
+        hms.add_doctor(f"Bench Doctor {number}", specializations[number % len(specializations)], 50)
+    batch = []
+    for number in range(1, size + 1):
+        batch.append(Patient(f"P{number:07d}", f"Patient {rng.randrange(10 ** 6)} {number}", rng.randint(1, 99),
+                             rng.choice(CONDITIONS), rng.randint(Priority.CRITICAL, Priority.LOW), clock.now()))
+        if len(batch) == 10000:
+            hms.enqueue_patients(batch)
+            batch = []
+    hms.enqueue_patients(batch)
+    hms.history.clear()
+    return hms
+
+
+def run_size(size, sample, seed):
+    """Every benchmark at one census size"""
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    hms = build_hospital(size, rng)
+    results = [{'op': 'build', 'size': size, 'calls': size,
+                'ops_per_sec': round(size / (time.perf_counter() - started), 1),
+                'p50_us': None, 'p99_us': None, 'peak_rss_mb': peak_rss_mb()}]
+    count = min(size, sample)
+    patient_ids = list(hms.patients)
+
+    register_args = [(f"New Patient {n}", rng.randint(1, 99), rng.choice(CONDITIONS), rng.randint(1, 4))
+                     for n in range(count)]
+    results.append(measure('register', size, [lambda a=args: hms.register_patient(*a) for args in register_args]))
+
+    lookups = [record_id_key(rng.choice(patient_ids)) for _ in range(count)]
+    results.append(measure('search', size, [lambda k=key: hms.patient_bst.search(k) for key in lookups]))
+
+    # A full traversal is O(n), so fewer repetitions at larger sizes
+    repeats = max(3, min(100, 10 ** 6 // size))
+    results.append(measure('inorder', size, [hms.patient_bst.inorder_traversal] * repeats))
+
+    results.append(measure('admit', size, [hms.admit_patient] * count))
+
+    admitted = [patient.patient_id for patient in hms.admitted_patients()][:count]
+    results.append(measure('discharge', size, [lambda p=pid: hms.discharge_patient(p) for pid in admitted]))
+
+    doctors = sorted(hms.doctors)
+    start = hms.clock.now() + timedelta(hours=2)
+    bookings = [(rng.choice(patient_ids), doctors[n % len(doctors)],
+                 start + timedelta(minutes=30 * (n // len(doctors)))) for n in range(count)]
+    results.append(measure('appointment', size,
+                           [lambda b=booking: hms.schedule_appointment(*b) for booking in bookings]))
+
+    results.append(measure('statistics', size, [hms.get_statistics] * count))
+
+    results.append(measure('undo', size, [hms.undo_last] * min(count, len(hms.history))))
+    results.append(measure('redo', size, [hms.redo_last] * hms.history.redo_depth))
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, "r", encoding="utf-8") as baseline_file:
+        baseline = {(row['op'], row['size']): row for row in json.load(baseline_file)['results']}
+    print(f"\nCompared with {baseline_path} (ops/sec; drops over {threshold:.0%} flagged):")
+    regressions = 0
+    for row in results:
+        old = baseline.get((row['op'], row['size']))
+        if not old or not old.get('ops_per_sec') or not row.get('ops_per_sec'):
+            continue
+        change = row['ops_per_sec'] / old['ops_per_sec'] - 1
+        flag = "  REGRESSION" if change < -threshold else ""
+        regressions += bool(flag)
+        print(f"  {row['op']:<12} {row['size']:>8}  {old['ops_per_sec']:>12} -> {row['ops_per_sec']:>12} "
+              f"({change:+.1%}){flag}")
+    return regressions
+
+
+def print_table(results):
+    print(f"{'operation':<12} {'size':>8} {'calls':>7} {'ops/sec':>12} {'p50 us':>10} {'p99 us':>10} {'peak MB':>8}")
+    for row in results:
+        print(f"{row['op']:<12} {row['size']:>8} {row['calls']:>7} {row['ops_per_sec'] or '-':>12} "
+              f"{row['p50_us'] if row['p50_us'] is not None else '-':>10} "
+              f"{row['p99_us'] if row['p99_us'] is not None else '-':>10} {row['peak_rss_mb'] or '-':>8}")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark core hospital operations")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000",
+                        help="comma-separated census sizes (default: 10^3 to 10^6)")
+    parser.add_argument("--sample", type=int, default=10000, help="timed calls per operation and size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="JSON report from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown flagged as a regression")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)  # internal: run one size, print JSON
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        json.dump(run_size(args.worker, args.sample, args.seed), sys.stdout)
+        return 0
+
+    results = []
+    for size in (int(size) for size in args.sizes.split(",")):
+        print(f"Running size {size}...", file=sys.stderr)
+        # A separate process per size keeps peak memory figures independent
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", str(size),
+                                "--sample", str(args.sample), "--seed", str(args.seed)],
+                               capture_output=True, text=True, check=True)
+        results.extend(json.loads(child.stdout))
+
+    report = {'meta': {'commit': git_commit(), 'python': platform.python_version(),
+                       'platform': platform.platform(), 'timestamp': datetime.now().isoformat(timespec='seconds'),
+                       'sample': args.sample, 'seed': args.seed},
+              'results': results}
+    print_table(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+        print(f"\nReport written to {args.output}")
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
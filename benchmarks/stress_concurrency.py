@@ -0,0 +1,249 @@
+"""Stress test: several front desks hammering one hospital from their own threads.
+
+Every desk registers, admits (one at a time and in batches), discharges,
+re-triages, books appointments and undoes/redoes at random, while reader
+threads page through grids, search names and read statistics. Beds and
+doctor places are deliberately scarce so admissions compete for them.
+A checker repeatedly takes the read lock and verifies that no room or
+doctor is over capacity and that every index, queue and counter agrees
+with the records; the same check runs once more at the end.
+
+The run is repeated for each desk count, reporting operations per second:
+
+    python benchmarks/stress_concurrency.py --desks 1,2,4,8 --seconds 3
+
+--no-lock replaces the hospital's lock with one that does nothing, to show
+the check catching the corruption it guards against. Exits with 1 if any
+check failed.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import HospitalManagementSystem, PatientStatus
+
+CONDITIONS = ["stroke", "fracture", "chest pain", "migraine", "infection", "routine check-up", "flu", "sprain"]
+NAMES = ["Ana", "Ben", "Chen", "Dara", "Eli", "Femi", "Gus", "Hana", "Ivo", "Jun"]
+
+
+class NoLock:
+    """Stand-in for ReadWriteLock that lets every thread in at once"""
+
+    def acquire_read(self):
+        pass
+
+    release_read = acquire_write = release_write = acquire_read
+
+    def read(self):
+        return self
+
+    write = read
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+def build_hospital(rooms, doctors, locked=True):
+    hms = HospitalManagementSystem()
+    if not locked:
+        hms.lock = NoLock()
+    for number in range(rooms):
+        hms.add_room(("ICU", "Emergency", "General", "Private")[number % 4], 1 + number % 3)
+    for number in range(doctors):
+        hms.add_doctor(f"Stress Doctor {number}", ("Cardiology", "Neurology", "Orthopedics")[number % 3], 3)
+    return hms
+
+
+def check_invariants(hms):
+    """Every violated invariant, as a list of messages; call with the read lock held"""
+    problems = []
+    admitted = {pid: patient for pid, patient in hms.patients.items() if patient.status == PatientStatus.ADMITTED}
+    for room in hms.rooms.values():
+        if room.occupied_beds > room.capacity:
+            problems.append(f"room {room.room_number} holds {room.occupied_beds} of {room.capacity} beds")
+        if room.occupied_beds != len(room.patients):
+            problems.append(f"room {room.room_number} counts {room.occupied_beds} beds for "
+                            f"{len(room.patients)} patients")
+        if room.is_available != (room.occupied_beds < room.capacity):
+            problems.append(f"room {room.room_number} availability flag is stale")
+        for pid in room.patients:
+            if pid not in admitted or admitted[pid].room_number != room.room_number:
+                problems.append(f"room {room.room_number} lists {pid}, who is not admitted there")
+    for doctor in hms.doctors.values():
+        if len(doctor.current_patients) > doctor.max_patients:
+            problems.append(f"doctor {doctor.doctor_id} has {len(doctor.current_patients)} of "
+                            f"{doctor.max_patients} patients")
+        for pid in doctor.current_patients:
+            if pid not in admitted or admitted[pid].assigned_doctor != doctor.doctor_id:
+                problems.append(f"doctor {doctor.doctor_id} lists {pid}, who is not their admitted patient")
+    for pid, patient in admitted.items():
+        room = hms.rooms.get(patient.room_number)
+        doctor = hms.doctors.get(patient.assigned_doctor)
+        if room is None or pid not in room.patients or doctor is None or pid not in doctor.current_patients:
+            problems.append(f"admitted patient {pid} is missing from their room or doctor")
+
+    waiting = {pid for pid, patient in hms.patients.items() if patient.status == PatientStatus.WAITING}
+    queued = [patient.patient_id for queue in (hms.emergency_queue, hms.regular_queue) for patient in queue.in_order()]
+    if len(queued) != len(set(queued)):
+        problems.append("a patient is queued twice")
+    if set(queued) != waiting:
+        problems.append(f"queues hold {len(queued)} patients but {len(waiting)} are waiting")
+
+    statuses = Counter(patient.status for patient in hms.patients.values())
+    for status in (PatientStatus.WAITING, PatientStatus.ADMITTED, PatientStatus.DISCHARGED):
+        if hms.stats.patients_by_status[status] != statuses[status]:
+            problems.append(f"statistics count {hms.stats.patients_by_status[status]} {status}, "
+                            f"records {statuses[status]}")
+    free_beds = Counter()
+    for room in hms.rooms.values():
+        free_beds[room.room_type] += room.capacity - room.occupied_beds
+    for room_type, free in free_beds.items():
+        if hms.room_index.free_beds[room_type] != free:
+            problems.append(f"index has {hms.room_index.free_beds[room_type]} free {room_type} beds, rooms {free}")
+    available = sum(1 for room in hms.rooms.values() if room.is_available)
+    if hms.room_index.available_count != available:
+        problems.append(f"index counts {hms.room_index.available_count} free rooms, rooms {available}")
+    busy = sum(1 for doctor in hms.doctors.values() if doctor.current_patients)
+    if hms.doctor_balancer.busy_doctors != busy:
+        problems.append(f"balancer counts {hms.doctor_balancer.busy_doctors} busy doctors, records {busy}")
+    if len(hms.patient_bst) != len(hms.patients):
+        problems.append(f"ID index holds {len(hms.patient_bst)} of {len(hms.patients)} patients")
+    return problems
+
+
+def desk(hms, rng, stop, counts):
+    """One reception desk issuing random operations until stop is set"""
+    while not stop.is_set():
+        roll = rng.random()
+        if roll < 0.30:
+            hms.register_patient(f"{rng.choice(NAMES)} {rng.randrange(10 ** 6)}", rng.randint(1, 95),
+                                 rng.choice(CONDITIONS), rng.randint(1, 4))
+        elif roll < 0.55:
+            hms.admit_patient()
+        elif roll < 0.60:
+            hms.admit_batch(rng.randint(2, 6))
+        elif roll < 0.82:
+            admitted = hms.admitted_patients()
+            if admitted:
+                hms.discharge_patient(rng.choice(admitted).patient_id)
+        elif roll < 0.88:
+            patient = hms.find_patient(f"P{rng.randint(1, max(1, len(hms.patients))):03d}")
+            if patient:
+                hms.retriage_patient(patient.patient_id, rng.randint(1, 4))
+        elif roll < 0.94:
+            patient = hms.find_patient(f"P{rng.randint(1, max(1, len(hms.patients))):03d}")
+            if patient:
+                hms.schedule_appointment(patient.patient_id, rng.choice(list(hms.doctors)),
+                                         hms.clock.now() + timedelta(hours=rng.randint(2, 500)))
+        elif roll < 0.97:
+            hms.undo_last()
+        else:
+            hms.redo_last()
+        counts['writes'] += 1
+
+
+def reader(hms, rng, stop, counts):
+    while not stop.is_set():
+        roll = rng.random()
+        if roll < 0.4:
+            hms.get_statistics()
+        elif roll < 0.7:
+            hms.record_page("patients", rng.randrange(100), 50, sort_by=rng.choice(["name", "priority", None]))
+        else:
+            hms.search_patients_by_name(rng.choice(NAMES), 10)
+        counts['reads'] += 1
+
+
+def checker(hms, stop, problems, counts):
+    while not stop.is_set():
+        with hms.lock.read():
+            found = check_invariants(hms)
+        counts['checks'] += 1
+        if found:
+            problems.extend(found)
+            stop.set()
+        time.sleep(0.01)
+
+
+def run(desks, readers, seconds, rooms, doctors, seed, locked=True):
+    hms = build_hospital(rooms, doctors, locked)
+    stop = threading.Event()
+    problems = []
+    errors = []
+    counters = []
+    threads = []
+
+    def guarded(target, *args):
+        try:
+            target(*args)
+        except Exception as e:  # A corrupted structure tends to raise somewhere
+            errors.append(f"{type(e).__name__}: {e}")
+            stop.set()
+
+    for number in range(desks + readers):
+        counts = Counter()
+        counters.append(counts)
+        target = desk if number < desks else reader
+        threads.append(threading.Thread(target=guarded, args=(target, hms, random.Random(seed + number), stop,
+                                                              counts), name=f"{target.__name__}-{number}"))
+    check_counts = Counter()
+    threads.append(threading.Thread(target=guarded, args=(checker, hms, stop, problems, check_counts)))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    stop.wait(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if not errors:
+        with hms.lock.read():
+            problems.extend(check_invariants(hms))
+    totals = sum(counters, Counter())
+    with hms.lock.read():
+        statistics = hms.get_statistics()
+    return {'desks': desks, 'writes_per_sec': round(totals['writes'] / elapsed),
+            'reads_per_sec': round(totals['reads'] / elapsed), 'checks': check_counts['checks'],
+            'patients': statistics['total_patients'], 'admitted': statistics['admitted_patients'],
+            'problems': problems[:5] + errors[:5]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent front desks against one hospital")
+    parser.add_argument("--desks", default="1,2,4,8", help="comma-separated desk thread counts")
+    parser.add_argument("--readers", type=int, default=2, help="threads paging, searching and reading statistics")
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration of each run")
+    parser.add_argument("--rooms", type=int, default=24)
+    parser.add_argument("--doctors", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--switch-interval", type=float, default=0.00005,
+                        help="seconds between thread switches; shorter makes races more likely")
+    parser.add_argument("--no-lock", action="store_true", help="disable the hospital lock (expect failures)")
+    args = parser.parse_args(argv)
+    sys.setswitchinterval(args.switch_interval)
+
+    failed = False
+    print(f"{'desks':>5} {'writes/s':>10} {'reads/s':>10} {'checks':>7} {'patients':>9} {'admitted':>9}  result")
+    for desks in (int(count) for count in args.desks.split(",")):
+        result = run(desks, args.readers, args.seconds, args.rooms, args.doctors, args.seed, not args.no_lock)
+        failed |= bool(result['problems'])
+        print(f"{result['desks']:>5} {result['writes_per_sec']:>10} {result['reads_per_sec']:>10} "
+              f"{result['checks']:>7} {result['patients']:>9} {result['admitted']:>9}  "
+              f"{'FAILED' if result['problems'] else 'ok'}")
+        for problem in result['problems']:
+            print(f"        {problem}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
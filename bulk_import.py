@@ -0,0 +1,159 @@
+"""Bulk patient import from CSV or JSONL files.
+
+Rows are streamed from the input file and registered in batches, so memory
+use does not depend on the size of the file. Each row needs name, age and
+condition; a blank priority is suggested by the triage rules, and an
+optional patient_id is kept when it is free. Rows are checked with the same
+rules as interactive registration. Rows that fail
+are written to a reject file as JSON lines holding the input line number,
+the error and the original record; the import carries on.
+
+    python bulk_import.py transfers.csv --db hospital.db
+    python bulk_import.py transfers.jsonl --data-dir data --rejects bad.jsonl
+"""
+import argparse
+import csv
+import json
+import os
+import time
+
+from main import HospitalManagementSystem, Patient, Priority, open_storage, validate_patient_fields
+
+
+def read_rows(path, fmt=None):
+    """Yield (line_number, record) for every row; malformed JSON lines are yielded as raw strings"""
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".json", ".ndjson")) else "csv")
+    with open(path, "r", encoding="utf-8", newline="") as source:
+        if fmt == "csv":
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row
+        elif fmt == "jsonl":
+            for line_number, line in enumerate(source, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError:
+                    yield line_number, line.rstrip("\n")
+        else:
+            raise ValueError(f"Unsupported import format: {fmt}")
+
+
+class ImportReport:
+    """Counts from one bulk import"""
+    __slots__ = ('imported', 'rejected', 'emergency', 'regular', 'reject_path', 'seconds')
+
+    def __init__(self, reject_path):
+        self.imported = 0
+        self.rejected = 0
+        self.emergency = 0
+        self.regular = 0
+        self.reject_path = reject_path
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return (f"ImportReport(imported={self.imported}, rejected={self.rejected}, "
+                f"seconds={self.seconds:.2f})")
+
+
+class PatientImporter:
+    """Validates streamed rows and registers them with the hospital in batches"""
+
+    def __init__(self, hms, reject_path, batch_size=1000, progress=None):
+        self.hms = hms
+        self.batch_size = batch_size
+        self.progress = progress  # Called with the ImportReport after every batch
+        self.report = ImportReport(reject_path)
+        self._batch = []  # (line_number, record, patient)
+        self._rejects = None
+
+    def run(self, rows):
+        start = time.perf_counter()
+        try:
+            for line_number, record in rows:
+                try:
+                    self._batch.append((line_number, record, self._build_patient(record)))
+                except ValueError as e:
+                    self._reject(line_number, str(e), record)
+                    continue
+                if len(self._batch) >= self.batch_size:
+                    self._flush()
+            self._flush()
+        finally:
+            if self._rejects is not None:
+                self._rejects.close()
+        self.report.seconds = time.perf_counter() - start
+        return self.report
+
+    def _build_patient(self, record):
+        if not isinstance(record, dict):
+            raise ValueError("Record is not a JSON object")
+        priority = record.get("priority")
+        if priority is None or priority == "":
+            priority = self.hms.suggest_triage(record.get("condition") or "").priority or Priority.MEDIUM
+        name, age, condition, priority = validate_patient_fields(
+            record.get("name") or "", record.get("age"), record.get("condition") or "", priority)
+        # A blank patient_id is filled in, and a taken one rejected, by enqueue_patients under the lock
+        patient_id = str(record.get("patient_id") or "").strip() or None
+        return Patient(patient_id, name, age, condition, priority, self.hms.clock.now())
+
+    def _flush(self):
+        if not self._batch:
+            return
+        patients = [patient for _, _, patient in self._batch]
+        rejected = {id(patient) for patient in self.hms.enqueue_patients(patients)}
+        for line_number, record, patient in self._batch:
+            if id(patient) in rejected:
+                self._reject(line_number, f"Patient ID '{patient.patient_id}' already exists!", record)
+            elif patient.priority <= 2:
+                self.report.emergency += 1
+            else:
+                self.report.regular += 1
+        self.report.imported = self.report.emergency + self.report.regular
+        self._batch = []
+        if self.progress is not None:
+            self.progress(self.report)
+
+    def _reject(self, line_number, error, record):
+        if self._rejects is None:
+            self._rejects = open(self.report.reject_path, "w", encoding="utf-8")
+        self._rejects.write(json.dumps({"line": line_number, "error": error, "record": record}) + "\n")
+        self.report.rejected += 1
+
+
+def import_patients(hms, path, reject_path=None, batch_size=1000, fmt=None, progress=None):
+    """Stream patients from a CSV or JSONL file into hms and return an ImportReport.
+    
+    progress, if given, is called with the running ImportReport after each
+    batch; an exception it raises stops the import after that batch.
+    """
+    reject_path = reject_path or os.path.splitext(path)[0] + ".rejects.jsonl"
+    return PatientImporter(hms, reject_path, batch_size, progress).run(read_rows(path, fmt))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import patients from CSV or JSONL")
+    parser.add_argument("path", help="input file (.csv, or .jsonl with one JSON object per line)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="override format detection by extension")
+    parser.add_argument("--rejects", help="where to write rejected rows (default: <input>.rejects.jsonl)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    storage_group = parser.add_mutually_exclusive_group()
+    storage_group.add_argument("--data-dir", help="hospital state directory (write-ahead log and snapshots)")
+    storage_group.add_argument("--db", help="hospital SQLite database")
+    args = parser.parse_args(argv)
+
+    hms = HospitalManagementSystem(storage=open_storage(args.data_dir, args.db))
+    try:
+        report = import_patients(hms, args.path, args.rejects, args.batch_size, args.format)
+    finally:
+        hms.close()
+
+    print(f"Imported {report.imported} patients in {report.seconds:.2f}s "
+          f"({report.emergency} emergency, {report.regular} regular)")
+    if report.rejected:
+        print(f"Rejected {report.rejected} rows, see {report.reject_path}")
+
+
+if __name__ == "__main__":
+    main()
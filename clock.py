@@ -0,0 +1,33 @@
+"""Clocks for the hospital: the wall clock by default, or a virtual one for simulations.
+
+Anything that stamps or compares times asks its clock for now(), so a
+simulation can replay months of operations in seconds by moving a
+VirtualClock forward itself.
+"""
+from datetime import datetime, timedelta
+
+
+class SystemClock:
+    """The real local time"""
+
+    def now(self):
+        return datetime.now()
+
+
+class VirtualClock:
+    """A clock that only moves when advanced"""
+
+    def __init__(self, start=None):
+        self.current = start or datetime(2025, 1, 1)
+
+    def now(self):
+        return self.current
+
+    def advance(self, **delta):
+        """Move forward by a timedelta given as keywords, e.g. advance(hours=2)"""
+        self.advance_to(self.current + timedelta(**delta))
+
+    def advance_to(self, moment):
+        if moment < self.current:
+            raise ValueError("A virtual clock cannot go backwards")
+        self.current = moment
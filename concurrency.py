@@ -0,0 +1,192 @@
+"""Locking for a HospitalManagementSystem shared by several front desks.
+
+Every mutation touches several structures at once: an admission pops a
+queue, takes a bed from the room index, adds a patient to a doctor, updates
+the statistics and journals the change. The hospital therefore has one lock
+for all of its state and a single writer at a time, holding hms.lock for
+writing while it changes memory and hands the change to the storage engine,
+which writes and fsyncs on its own threads. Readers such as searches, grid
+pages and statistics share the lock and run alongside each other. Queued
+writers go ahead of new readers, and readers that have waited a few
+milliseconds go ahead of the next writer, so neither side can starve the
+other.
+
+Public methods declare which side they need with @read_locked and
+@write_locked. The writing thread may call other locked methods freely,
+including readers; a reader must not call a writer, which raises
+RuntimeError instead of deadlocking. Once a thread's outermost write is
+over, @write_locked calls the object's after_write() if it has one, so
+work such as waiting for an fsync happens without holding the lock.
+"""
+import functools
+import threading
+import time
+
+
+class ReadWriteLock:
+    """Shared read lock and exclusive, re-entrant write lock, fair between the two.
+
+    A writer holds the gate for its whole write; a reader passes through the
+    gate only to register itself. A writer waiting for readers to leave
+    already holds the gate, so no new reader can get in ahead of it. In turn,
+    once readers have waited max_read_wait seconds, the ones waiting when the
+    current write ends all get in before the next writer, so a stream of
+    writes cannot starve them either. Until then writers follow each other
+    directly, which keeps write throughput up under a steady read load.
+    """
+
+    def __init__(self, max_read_wait=0.005):
+        self.max_read_wait = max_read_wait
+        self._gate = threading.Lock()
+        self._readers_lock = threading.Lock()
+        self._no_readers = threading.Condition(self._readers_lock)
+        self._readers_in = threading.Condition(self._readers_lock)
+        self._readers = 0
+        self._waiting_readers = 0
+        self._waiting_since = 0.0  # When the oldest waiting reader started waiting
+        self._admitting = 0  # Readers still to get in before the next writer
+        self._writer_waiting = False
+        self._writer = None  # Thread ident holding the write lock
+        self._writer_depth = 0
+        self._local = threading.local()  # Read depth of the current thread
+
+    def acquire_read(self, blocking=True):
+        """Take the read lock; with blocking=False, return False instead of waiting for a writer"""
+        local = self._local
+        depth = getattr(local, 'depth', 0)
+        if depth or self._writer == threading.get_ident():
+            # Nested read, or the writer reading its own state
+            local.depth = depth + 1
+            return True
+        if self._gate.acquire(False):
+            with self._readers_lock:
+                self._readers += 1
+            self._gate.release()
+        elif not blocking:
+            return False
+        else:
+            # A writer has the gate: queue up, so that release_write() can give readers a turn
+            with self._readers_lock:
+                if not self._waiting_readers:
+                    self._waiting_since = time.monotonic()
+                self._waiting_readers += 1
+            with self._gate:
+                with self._readers_lock:
+                    self._waiting_readers -= 1
+                    self._readers += 1
+                    if self._admitting:
+                        self._admitting -= 1
+                        if not self._admitting:
+                            self._readers_in.notify_all()
+        local.depth = 1
+        return True
+
+    def release_read(self):
+        local = self._local
+        local.depth -= 1
+        if local.depth or self._writer == threading.get_ident():
+            return
+        with self._readers_lock:
+            self._readers -= 1
+            if not self._readers and self._writer_waiting:
+                self._no_readers.notify()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            self._writer_depth += 1
+            return
+        # A reader asking to write would wait for itself; this is only checked
+        # once the lock is contended, to keep uncontended writes cheap
+        if not self._gate.acquire(False):
+            if self._reading():
+                raise RuntimeError("Cannot take the write lock while holding the read lock")
+            self._gate.acquire()
+        while self._admitting:
+            # Readers' turn after the previous write: let them through the gate first
+            self._gate.release()
+            with self._readers_lock:
+                while self._admitting:
+                    self._readers_in.wait()
+            self._gate.acquire()
+        if self._readers:
+            if self._reading():
+                self._gate.release()
+                raise RuntimeError("Cannot take the write lock while holding the read lock")
+            with self._readers_lock:
+                self._writer_waiting = True
+                while self._readers:
+                    self._no_readers.wait()
+                self._writer_waiting = False
+        self._writer = me
+        self._writer_depth = 1
+
+    def release_write(self):
+        self._writer_depth -= 1
+        if not self._writer_depth:
+            self._writer = None
+            if self._waiting_readers and time.monotonic() - self._waiting_since >= self.max_read_wait:
+                with self._readers_lock:
+                    self._admitting = self._waiting_readers
+                    self._waiting_since = time.monotonic()  # Readers arriving from now on wait afresh
+            self._gate.release()
+
+    def _reading(self):
+        return getattr(self._local, 'depth', 0) > 0
+
+    def writing(self):
+        """True if the calling thread holds the write lock"""
+        return self._writer == threading.get_ident()
+
+    def read(self):
+        return _Held(self.acquire_read, self.release_read)
+
+    def write(self):
+        return _Held(self.acquire_write, self.release_write)
+
+
+class _Held:
+    __slots__ = ('_acquire', '_release')
+
+    def __init__(self, acquire, release):
+        self._acquire = acquire
+        self._release = release
+
+    def __enter__(self):
+        self._acquire()
+
+    def __exit__(self, *exc_info):
+        self._release()
+
+
+def read_locked(method):
+    """Run a method of an object with a ReadWriteLock in self.lock under the shared read lock"""
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        lock = self.lock
+        lock.acquire_read()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            lock.release_read()
+    return locked
+
+
+def write_locked(method):
+    """Run a method of an object with a ReadWriteLock in self.lock as the only writer.
+
+    When this was the thread's outermost write, self.after_write() (if
+    defined) runs after the lock has been released.
+    """
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        lock = self.lock
+        lock.acquire_write()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            lock.release_write()
+            after_write = getattr(self, 'after_write', None)
+            if after_write is not None and not lock.writing():
+                after_write()
+    return locked
@@ -0,0 +1,133 @@
+"""In-process change stream for hospital state.
+
+Every mutation of a HospitalManagementSystem publishes an Event on its
+EventBus (hms.events). Events carry a sequence number that increases by one
+per event, so a subscriber can tell whether it missed any:
+
+    subscription = hms.events.subscribe(kinds={EventType.PATIENT_ADMITTED})
+    ...
+    for event in subscription.poll():
+        print(event.seq, event.kind, event.data['patient_id'])
+
+Each subscription buffers at most maxlen events. When a slow consumer lets
+the buffer fill up, the oldest events are dropped and counted in
+subscription.dropped; a consumer that sees a gap in sequence numbers should
+re-read the state it mirrors. A subscription may also take a callback,
+which is called synchronously for every matching event as it is published.
+"""
+import threading
+from collections import deque, namedtuple
+from datetime import datetime
+
+Event = namedtuple('Event', ['seq', 'kind', 'timestamp', 'data'])
+
+
+class EventType:
+    """Event kinds published by the hospital"""
+    PATIENT_REGISTERED = "patient_registered"
+    PATIENT_QUEUED = "patient_queued"
+    PATIENT_RETRIAGED = "patient_retriaged"
+    PATIENT_ADMITTED = "patient_admitted"
+    PATIENT_ADMISSION_UNDONE = "patient_admission_undone"
+    PATIENT_DISCHARGED = "patient_discharged"
+    PATIENT_REMOVED = "patient_removed"
+    APPOINTMENT_CREATED = "appointment_created"
+    APPOINTMENT_REMOVED = "appointment_removed"
+    DOCTOR_ADDED = "doctor_added"
+    DOCTOR_REMOVED = "doctor_removed"
+    ROOM_ADDED = "room_added"
+    ROOM_REMOVED = "room_removed"
+
+    # Storage operation names (see HospitalManagementSystem.apply_operation) -> event kind
+    FOR_OPERATION = {
+        'register': PATIENT_REGISTERED,
+        'retriage': PATIENT_RETRIAGED,
+        'admit': PATIENT_ADMITTED,
+        'discharge': PATIENT_DISCHARGED,
+        'unregister': PATIENT_REMOVED,
+        'appointment': APPOINTMENT_CREATED,
+        'add_doctor': DOCTOR_ADDED,
+        'add_room': ROOM_ADDED,
+        'unadmit': PATIENT_ADMISSION_UNDONE,
+        'remove_appointment': APPOINTMENT_REMOVED,
+        'remove_doctor': DOCTOR_REMOVED,
+        'remove_room': ROOM_REMOVED,
+    }
+
+
+class Subscription:
+    """A bounded buffer of events for one consumer"""
+
+    def __init__(self, bus, kinds=None, maxlen=1024, callback=None):
+        self.bus = bus
+        self.kinds = frozenset(kinds) if kinds else None
+        self.callback = callback
+        self.buffer = deque(maxlen=maxlen)
+        self.dropped = 0
+        self.errors = 0  # Exceptions raised by the callback
+        self.last_error = None
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def wants(self, kind):
+        return self.kinds is None or kind in self.kinds
+
+    def deliver(self, event):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append(event)
+        if self.callback is not None:
+            try:
+                self.callback(event)
+            except Exception as e:
+                # A failing observer must not undo or fail a mutation that already happened
+                self.errors += 1
+                self.last_error = e
+
+    def poll(self, max_events=None):
+        """Remove and return buffered events, oldest first"""
+        events = []
+        while self.buffer and (max_events is None or len(events) < max_events):
+            try:
+                events.append(self.buffer.popleft())
+            except IndexError:
+                break
+        return events
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """Publishes events to subscriptions in sequence order; safe to publish from several threads"""
+
+    def __init__(self, clock=None):
+        self.clock = clock  # Anything with now(); events are stamped with the wall clock without one
+        self.seq = 0
+        self._subscriptions = []
+        self._lock = threading.RLock()
+
+    def subscribe(self, kinds=None, maxlen=1024, callback=None):
+        """Start buffering events, optionally only those whose kind is in kinds"""
+        subscription = Subscription(self, kinds, maxlen, callback)
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+
+    def publish(self, kind, data):
+        """Assign the next sequence number to an event and hand it to every interested subscription"""
+        with self._lock:
+            self.seq += 1
+            subscriptions = self._subscriptions
+            if not subscriptions:
+                return None
+            event = Event(self.seq, kind, self.clock.now() if self.clock else datetime.now(), data)
+            for subscription in subscriptions:
+                if subscription.wants(kind):
+                    subscription.deliver(event)
+        return event
@@ -0,0 +1,112 @@
+"""Bounded undo/redo history of hospital mutations.
+
+Every mutation pushes a small command tuple holding just what is needed to
+invert it, for example ('admit', patient_id, room_number, doctor_id). The
+newest `depth` commands stay in memory; older ones are spilled to a
+temporary file as JSON lines and read back newest first once the in-memory
+ones have been undone, so a long shift never grows memory without limit.
+
+Undone commands move to a redo stack of the same depth (its oldest entries
+are dropped when it overflows); any new mutation clears it. Commands pushed
+while the history is paused, e.g. while loading state or while undoing, are
+not recorded.
+"""
+import json
+import os
+import tempfile
+from collections import deque
+from contextlib import contextmanager
+
+
+class CommandHistory:
+    """Undo and redo stacks of command tuples"""
+
+    def __init__(self, depth=1000):
+        if depth < 1:
+            raise ValueError("History depth must be at least 1")
+        self.depth = depth
+        self._recent = deque()
+        self._redo = deque(maxlen=depth)
+        self._spill = None  # Binary temp file of JSON lines, oldest first
+        self.spilled = 0
+        self._paused = 0
+
+    def __len__(self):
+        """Number of commands that can be undone"""
+        return len(self._recent) + self.spilled
+
+    @property
+    def redo_depth(self):
+        return len(self._redo)
+
+    @contextmanager
+    def paused(self):
+        self._paused += 1
+        try:
+            yield
+        finally:
+            self._paused -= 1
+
+    def push(self, command):
+        """Record a new mutation; this forgets everything that could be redone"""
+        if self._paused:
+            return
+        self._redo.clear()
+        self._append(command)
+
+    def pop(self):
+        """The most recent command, or None"""
+        if self._recent:
+            return self._recent.pop()
+        if self.spilled:
+            return self._pop_spilled()
+        return None
+
+    def restore(self, command):
+        """Put back a command that was popped but could not be undone"""
+        self._append(command)
+
+    def push_redo(self, command):
+        self._redo.append(command)
+
+    def pop_redo(self):
+        return self._redo.pop() if self._redo else None
+
+    def clear(self):
+        self._recent.clear()
+        self._redo.clear()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+        self.spilled = 0
+
+    close = clear
+
+    def _append(self, command):
+        self._recent.append(command)
+        if len(self._recent) > self.depth:
+            self._write_spilled(self._recent.popleft())
+
+    def _write_spilled(self, command):
+        if self._spill is None:
+            self._spill = tempfile.TemporaryFile("w+b")
+        self._spill.seek(0, os.SEEK_END)
+        self._spill.write(json.dumps(command).encode("utf-8") + b"\n")
+        self.spilled += 1
+
+    def _pop_spilled(self):
+        """Read the last line of the spill file and truncate it away"""
+        spill = self._spill
+        end = spill.seek(0, os.SEEK_END) - 1  # Leave out the final newline
+        start = end
+        while True:
+            # Read backwards in blocks until the newline before the last line
+            start = max(0, start - 4096)
+            spill.seek(start)
+            tail = spill.read(end - start)
+            newline = tail.rfind(b"\n")
+            if newline != -1 or start == 0:
+                break
+        spill.truncate(start + newline + 1)
+        self.spilled -= 1
+        return tuple(json.loads(tail[newline + 1:]))
@@ -1,30 +1,106 @@
+import argparse
+import bisect
 import heapq
-from collections import deque, defaultdict
+import math
+import re
+import sys
+import threading
+from collections import Counter, OrderedDict, deque, defaultdict, namedtuple
 from datetime import datetime, timedelta
+from itertools import islice
 import uuid
 
+from clock import SystemClock
+from concurrency import ReadWriteLock, read_locked, write_locked
+from events import EventBus, EventType
+from history import CommandHistory
+from metrics import HospitalMetrics
+from triage import TriageClassifier
+
+class Priority:
+    """Triage priority codes - lower number = higher priority"""
+    CRITICAL = 1
+    HIGH = 2
+    MEDIUM = 3
+    LOW = 4
+    LABELS = {1: 'Critical', 2: 'High', 3: 'Medium', 4: 'Low'}
+
+class PatientStatus:
+    """Patient status codes, shared by every Patient instead of per-record strings"""
+    WAITING = "Waiting"
+    ADMITTED = "Admitted"
+    DISCHARGED = "Discharged"
+
+class AppointmentStatus:
+    """Appointment status codes"""
+    SCHEDULED = "Scheduled"
+    COMPLETED = "Completed"
+    CANCELLED = "Cancelled"
+
+MedicalRecord = namedtuple('MedicalRecord', ['timestamp', 'record'])
+
+ID_PATTERN = re.compile(r"(\D*)(\d+)")
+
+def record_id_key(record_id):
+    """Sort key for IDs like P001 that orders the number numerically, so P999 comes before P1000"""
+    match = ID_PATTERN.fullmatch(record_id)
+    if match:
+        return (match.group(1), int(match.group(2)), record_id)
+    return (record_id, -1, record_id)
+
 class Patient:
-    def __init__(self, patient_id, name, age, condition, priority=3):
+    __slots__ = ('patient_id', 'name', 'age', 'condition', 'priority', 'admission_time',
+                 'medical_history', 'assigned_doctor', 'room_number', 'status', 'arrival_seq')
+    
+    def __init__(self, patient_id, name, age, condition, priority=3, admission_time=None):
         self.patient_id = patient_id
         self.name = name
         self.age = age
         self.condition = condition
         self.priority = priority  # 1 = Critical, 2 = High, 3 = Medium, 4 = Low
-        self.admission_time = datetime.now()
-        self.medical_history = []
+        self.admission_time = admission_time or datetime.now()
+        self.medical_history = ()  # Replaced by a list on the first record
         self.assigned_doctor = None
         self.room_number = None
-        self.status = "Waiting"  # Waiting, Admitted, Discharged
+        self.status = PatientStatus.WAITING
+        self.arrival_seq = 0  # Registration order, assigned by the system; breaks priority ties
     
     def __lt__(self, other):
-        # For priority queue - lower number = higher priority
-        return self.priority < other.priority
+        # For priority queue - lower number = higher priority, then first come first served
+        return (self.priority, self.arrival_seq) < (other.priority, other.arrival_seq)
+    
+    def add_medical_record(self, record, timestamp=None):
+        if not self.medical_history:
+            self.medical_history = []
+        self.medical_history.append(MedicalRecord(timestamp or datetime.now(), record))
     
-    def add_medical_record(self, record):
-        self.medical_history.append({
-            'timestamp': datetime.now(),
-            'record': record
-        })
+    def to_dict(self):
+        return {
+            'patient_id': self.patient_id,
+            'name': self.name,
+            'age': self.age,
+            'condition': self.condition,
+            'priority': self.priority,
+            'admission_time': self.admission_time.isoformat(),
+            'status': self.status,
+            'room_number': self.room_number,
+            'assigned_doctor': self.assigned_doctor,
+            'medical_history': [[entry.timestamp.isoformat(), entry.record] for entry in self.medical_history],
+            'arrival_seq': self.arrival_seq,
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        patient = cls(data['patient_id'], data['name'], data['age'], data['condition'], data['priority'])
+        patient.admission_time = datetime.fromisoformat(data['admission_time'])
+        patient.arrival_seq = data.get('arrival_seq') or 0
+        patient.status = sys.intern(data.get('status', PatientStatus.WAITING))
+        patient.room_number = data.get('room_number')
+        patient.assigned_doctor = data.get('assigned_doctor')
+        if data.get('medical_history'):
+            patient.medical_history = [MedicalRecord(datetime.fromisoformat(timestamp), record)
+                                       for timestamp, record in data['medical_history']]
+        return patient
     
     def display_info(self):
         """Display patient information"""
@@ -33,8 +109,7 @@ class Patient:
         print(f"Name: {self.name}")
         print(f"Age: {self.age} years")
         print(f"Medical Condition: {self.condition}")
-        priority_text = {1: 'Critical', 2: 'High', 3: 'Medium', 4: 'Low'}
-        print(f"Priority Level: {priority_text.get(self.priority, 'Unknown')} ({self.priority})")
+        print(f"Priority Level: {Priority.LABELS.get(self.priority, 'Unknown')} ({self.priority})")
         print(f"Current Status: {self.status}")
         print(f"Assigned Room: {self.room_number if self.room_number else 'Not assigned yet'}")
         print(f"Assigned Doctor: {self.assigned_doctor if self.assigned_doctor else 'Not assigned yet'}")
@@ -42,28 +117,48 @@ class Patient:
             print(f"Registration Time: {self.admission_time.strftime('%Y-%m-%d %H:%M:%S')}")
 
 class Doctor:
+    __slots__ = ('doctor_id', 'name', 'specialization', 'max_patients', 'current_patients',
+                 'schedule', 'availability', 'load_balancer')
+    
     def __init__(self, doctor_id, name, specialization, max_patients=10):
         self.doctor_id = doctor_id
         self.name = name
         self.specialization = specialization
         self.max_patients = max_patients
-        self.current_patients = []
-        self.schedule = {}  # date -> list of appointments
+        self.current_patients = set()
+        self.schedule = DoctorCalendar()  # scheduled appointments ordered by start time
         self.availability = True
+        self.load_balancer = None  # DoctorLoadBalancer kept current on every change
     
     def assign_patient(self, patient):
         if len(self.current_patients) < self.max_patients:
-            self.current_patients.append(patient.patient_id)
+            self.current_patients.add(patient.patient_id)
             patient.assigned_doctor = self.doctor_id
+            if self.load_balancer:
+                self.load_balancer.load_changed(self)
             return True
         return False
     
     def discharge_patient(self, patient_id):
         if patient_id in self.current_patients:
             self.current_patients.remove(patient_id)
+            if self.load_balancer:
+                self.load_balancer.load_changed(self)
             return True
         return False
     
+    def to_dict(self):
+        return {
+            'doctor_id': self.doctor_id,
+            'name': self.name,
+            'specialization': self.specialization,
+            'max_patients': self.max_patients,
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['doctor_id'], data['name'], data['specialization'], data['max_patients'])
+    
     def display_info(self):
         """Display doctor information"""
         print(f"\n--- Doctor Information ---")
@@ -74,21 +169,212 @@ class Doctor:
         availability_status = "Available" if len(self.current_patients) < self.max_patients else "Fully Booked"
         print(f"Availability Status: {availability_status}")
 
+class IndexedHeap:
+    """Binary min-heap with a position map.
+
+    Entries are (key, item_id, item); the item_id breaks ties and lets an
+    entry be re-keyed or removed in O(log n) without rebuilding the heap.
+    """
+    def __init__(self):
+        self._heap = []
+        self._position = {}  # item_id -> index in _heap
+    
+    def __len__(self):
+        return len(self._heap)
+    
+    def __contains__(self, item_id):
+        return item_id in self._position
+    
+    def push(self, item_id, key, item):
+        """Insert an item, or re-key it if it is already in the heap"""
+        index = self._position.get(item_id)
+        if index is None:
+            self._heap.append((key, item_id, item))
+            self._sift_up(len(self._heap) - 1)
+        else:
+            old_key = self._heap[index][0]
+            self._heap[index] = (key, item_id, item)
+            if key < old_key:
+                self._sift_up(index)
+            else:
+                self._sift_down(index)
+    
+    def peek(self):
+        return self._heap[0][2] if self._heap else None
+    
+    def pop(self):
+        if not self._heap:
+            return None
+        return self._remove_at(0)
+    
+    def remove(self, item_id):
+        index = self._position.get(item_id)
+        if index is None:
+            return None
+        return self._remove_at(index)
+    
+    def sorted_items(self):
+        """Items in pop order, without modifying the heap"""
+        return [entry[2] for entry in sorted(self._heap, key=lambda entry: entry[:2])]
+    
+    def key_of(self, item_id):
+        index = self._position.get(item_id)
+        return None if index is None else self._heap[index][0]
+    
+    def _remove_at(self, index):
+        heap = self._heap
+        entry = heap[index]
+        del self._position[entry[1]]
+        last = heap.pop()
+        if index < len(heap):
+            heap[index] = last
+            self._position[last[1]] = index
+            self._sift_up(index)
+            self._sift_down(self._position[last[1]])
+        return entry[2]
+    
+    def _sift_up(self, index):
+        heap = self._heap
+        entry = heap[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            if entry[:2] < heap[parent][:2]:
+                heap[index] = heap[parent]
+                self._position[heap[index][1]] = index
+                index = parent
+            else:
+                break
+        heap[index] = entry
+        self._position[entry[1]] = index
+    
+    def _sift_down(self, index):
+        heap = self._heap
+        size = len(heap)
+        entry = heap[index]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1][:2] < heap[child][:2]:
+                child += 1
+            if heap[child][:2] < entry[:2]:
+                heap[index] = heap[child]
+                self._position[heap[index][1]] = index
+                index = child
+            else:
+                break
+        heap[index] = entry
+        self._position[entry[1]] = index
+
+class PatientQueue:
+    """Waiting queue on an IndexedHeap, ordered by order(patient).
+    
+    Orders must be unique per patient (e.g. include arrival_seq) so the
+    queue is stable. A patient can be removed, re-keyed after re-triage or
+    moved to another queue by ID in O(log n).
+    """
+    def __init__(self, order):
+        self._heap = IndexedHeap()
+        self._order = order
+    
+    def __len__(self):
+        return len(self._heap)
+    
+    def __contains__(self, patient_id):
+        return patient_id in self._heap
+    
+    def push(self, patient):
+        """Add a patient, or reposition them if already queued"""
+        self._heap.push(patient.patient_id, self._order(patient), patient)
+    
+    update = push
+    
+    def peek(self):
+        return self._heap.peek()
+    
+    def pop(self):
+        return self._heap.pop()
+    
+    def remove(self, patient_id):
+        return self._heap.remove(patient_id)
+    
+    def move_to(self, patient_id, other):
+        """Move a queued patient into another queue, keeping their arrival order"""
+        patient = self._heap.remove(patient_id)
+        if patient is not None:
+            other.push(patient)
+        return patient
+    
+    def in_order(self):
+        """Queued patients in the order they will be popped"""
+        return self._heap.sorted_items()
+
+class DoctorLoadBalancer:
+    """Indexed min-heaps of doctors with spare capacity, keyed by current load.
+
+    One heap covers all doctors and one more is kept per specialization.
+    Doctors report every change to their patient list, which re-keys them in
+    O(log n); fully booked doctors leave the heaps until a patient leaves.
+    """
+    def __init__(self):
+        self.available = IndexedHeap()
+        self.by_specialization = defaultdict(IndexedHeap)
+        self.busy_doctors = 0  # doctors treating at least one patient
+        self._loads = {}       # doctor_id -> last reported load
+    
+    def add_doctor(self, doctor):
+        doctor.load_balancer = self
+        self.load_changed(doctor)
+    
+    def load_changed(self, doctor):
+        load = len(doctor.current_patients)
+        previous = self._loads.get(doctor.doctor_id, 0)
+        self._loads[doctor.doctor_id] = load
+        if previous == 0 and load > 0:
+            self.busy_doctors += 1
+        elif previous > 0 and load == 0:
+            self.busy_doctors -= 1
+        for heap in (self.available, self.by_specialization[doctor.specialization]):
+            if load < doctor.max_patients:
+                heap.push(doctor.doctor_id, load, doctor)
+            else:
+                heap.remove(doctor.doctor_id)
+    
+    def remove_doctor(self, doctor):
+        if self._loads.pop(doctor.doctor_id, 0) > 0:
+            self.busy_doctors -= 1
+        self.available.remove(doctor.doctor_id)
+        self.by_specialization[doctor.specialization].remove(doctor.doctor_id)
+        doctor.load_balancer = None
+    
+    def least_loaded(self, specialization=None):
+        """Doctor with the fewest patients and spare capacity, or None"""
+        if specialization is None:
+            return self.available.peek()
+        heap = self.by_specialization.get(specialization)
+        return heap.peek() if heap else None
+
 class Room:
+    __slots__ = ('room_number', 'room_type', 'capacity', 'occupied_beds', 'patients',
+                 'is_available', 'availability_index')
+    
     def __init__(self, room_number, room_type, capacity=1):
         self.room_number = room_number
         self.room_type = room_type  # ICU, General, Private, Emergency
         self.capacity = capacity
         self.occupied_beds = 0
-        self.patients = []
+        self.patients = set()
         self.is_available = True
+        self.availability_index = None  # RoomAvailabilityIndex kept current on every change
     
     def admit_patient(self, patient_id):
         if self.occupied_beds < self.capacity:
-            self.patients.append(patient_id)
+            self.patients.add(patient_id)
             self.occupied_beds += 1
             if self.occupied_beds == self.capacity:
                 self.is_available = False
+            if self.availability_index:
+                self.availability_index.room_changed(self, 1)
             return True
         return False
     
@@ -97,9 +383,22 @@ class Room:
             self.patients.remove(patient_id)
             self.occupied_beds -= 1
             self.is_available = True
+            if self.availability_index:
+                self.availability_index.room_changed(self, -1)
             return True
         return False
     
+    def to_dict(self):
+        return {
+            'room_number': self.room_number,
+            'room_type': self.room_type,
+            'capacity': self.capacity,
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['room_number'], data['room_type'], data['capacity'])
+    
     def display_info(self):
         """Display room information"""
         print(f"\n--- Room Information ---")
@@ -111,15 +410,229 @@ class Room:
         status = "Available" if self.is_available else "Full"
         print(f"Room Status: {status}")
 
+class RoomAvailabilityIndex:
+    """Free-capacity index of rooms keyed by room type.
+
+    Rooms report every occupancy change, so finding a bed is a heap peek per
+    room type instead of a scan over every room in the hospital. The policy
+    decides which free room of a type is handed out first.
+    """
+    POLICIES = {
+        "lowest_number": lambda room: (record_id_key(room.room_number),),
+        "fullest_first": lambda room: (-room.occupied_beds, record_id_key(room.room_number)),
+    }
+    
+    def __init__(self, policy="lowest_number"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown room allocation policy: {policy}")
+        self.policy = policy
+        self.available_rooms = defaultdict(dict)  # room_type -> {room_number: room}
+        self.free_beds = defaultdict(int)         # room_type -> free beds across all rooms
+        self._heaps = defaultdict(list)           # room_type -> [(policy key, room_number)]
+        self.available_count = 0                  # rooms with at least one free bed
+    
+    def add_room(self, room):
+        room.availability_index = self
+        self.free_beds[room.room_type] += room.capacity - room.occupied_beds
+        self._refresh(room)
+    
+    def remove_room(self, room):
+        """Forget a room; its stale heap entries are skipped by find_room()"""
+        self.free_beds[room.room_type] -= room.capacity - room.occupied_beds
+        if self.available_rooms[room.room_type].pop(room.room_number, None) is not None:
+            self.available_count -= 1
+        room.availability_index = None
+    
+    def room_changed(self, room, beds_taken):
+        """Called by Room after a bed is taken (1) or released (-1)"""
+        self.free_beds[room.room_type] -= beds_taken
+        self._refresh(room)
+    
+    def set_policy(self, policy):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown room allocation policy: {policy}")
+        self.policy = policy
+        for room_type in self.available_rooms:
+            self._rebuild_heap(room_type)
+    
+    def find_room(self, room_type):
+        """Return the free room of this type preferred by the policy, or None"""
+        rooms = self.available_rooms.get(room_type)
+        heap = self._heaps.get(room_type)
+        sort_key = self.POLICIES[self.policy]
+        while heap:
+            key, room_number = heap[0]
+            room = rooms.get(room_number)
+            if room is not None and key == sort_key(room):
+                return room
+            # Stale entry: the room filled up or its policy key changed
+            heapq.heappop(heap)
+        return None
+    
+    def _refresh(self, room):
+        rooms = self.available_rooms[room.room_type]
+        if room.is_available:
+            if room.room_number not in rooms:
+                self.available_count += 1
+            rooms[room.room_number] = room
+            heap = self._heaps[room.room_type]
+            heapq.heappush(heap, (self.POLICIES[self.policy](room), room.room_number))
+            # Lazy deletion leaves stale entries behind; compact once they dominate
+            if len(heap) > 2 * len(rooms) + 16:
+                self._rebuild_heap(room.room_type)
+        elif rooms.pop(room.room_number, None) is not None:
+            self.available_count -= 1
+    
+    def _rebuild_heap(self, room_type):
+        sort_key = self.POLICIES[self.policy]
+        heap = [(sort_key(room), number) for number, room in self.available_rooms[room_type].items()]
+        heapq.heapify(heap)
+        self._heaps[room_type] = heap
+
+def _min_cost_flow(graph, source, sink, units):
+    """Push `units` units of flow from source to sink along successive shortest paths.
+    
+    graph[u] is a list of [target, capacity, cost, reverse index] edges and
+    is updated in place to the residual graph of the final flow.
+    """
+    for _ in range(units):
+        # Shortest augmenting path in the residual graph (SPFA handles the negative reverse edges)
+        distance = [float("inf")] * len(graph)
+        previous = [None] * len(graph)
+        distance[source] = 0
+        queue = deque([source])
+        queued = {source}
+        while queue:
+            u = queue.popleft()
+            queued.discard(u)
+            for index, (v, capacity, cost, _) in enumerate(graph[u]):
+                if capacity > 0 and distance[u] + cost < distance[v]:
+                    distance[v] = distance[u] + cost
+                    previous[v] = (u, index)
+                    if v not in queued:
+                        queued.add(v)
+                        queue.append(v)
+        if previous[sink] is None:
+            raise ValueError("Not enough capacity to place every item")
+        v = sink
+        while v != source:
+            u, index = previous[v]
+            edge = graph[u][index]
+            edge[1] -= 1
+            graph[v][edge[3]][1] += 1
+            v = u
+
+def _flow_graph(size):
+    graph = [[] for _ in range(size)]  # node -> [target, capacity, cost, reverse index]
+    
+    def add_edge(u, v, capacity, cost):
+        graph[u].append([v, capacity, cost, len(graph[v])])
+        graph[v].append([u, 0, -cost, len(graph[u]) - 1])
+    return graph, add_edge
+
+def _chosen(graph, node, first, count):
+    """Index of the used edge from node into nodes first .. first + count - 1"""
+    return next(edge[0] - first for edge in graph[node] if first <= edge[0] < first + count and edge[1] == 0)
+
+def min_cost_assignment(costs, capacities):
+    """Give every row a column, minimising the total cost.
+    
+    costs[i][t] is the cost of putting item i in column t and capacities[t]
+    how many items column t takes; sum(capacities) must be >= len(costs).
+    Solved as a min-cost flow with successive shortest paths, so it stays
+    exact when several items compete for the same scarce column. Returns
+    the chosen column index for each row.
+    """
+    rows, columns = len(costs), len(capacities)
+    source, sink = rows + columns, rows + columns + 1
+    graph, add_edge = _flow_graph(rows + columns + 2)
+    for i in range(rows):
+        add_edge(source, i, 1, 0)
+        for t in range(columns):
+            add_edge(i, rows + t, 1, costs[i][t])
+    for t in range(columns):
+        if capacities[t] > 0:
+            add_edge(rows + t, sink, capacities[t], 0)
+    _min_cost_flow(graph, source, sink, rows)
+    return [_chosen(graph, i, rows, columns) for i in range(rows)]
+
+def min_cost_double_assignment(first_costs, first_capacities, second_costs, second_capacities):
+    """Give every row one column from each of two groups, minimising the total cost.
+    
+    Like min_cost_assignment, for items that need two scarce resources at
+    once (a doctor and a bed): the flow runs source -> first-group column ->
+    row -> second-group column -> sink, so both capacities hold together.
+    Returns a (first column, second column) pair for each row.
+    """
+    rows, firsts, seconds = len(first_costs), len(first_capacities), len(second_capacities)
+    # Nodes: row inputs, row outputs, first-group columns, second-group columns, source, sink
+    first_base, second_base = 2 * rows, 2 * rows + firsts
+    source, sink = second_base + seconds, second_base + seconds + 1
+    graph, add_edge = _flow_graph(sink + 1)
+    for f in range(firsts):
+        if first_capacities[f] > 0:
+            add_edge(source, first_base + f, first_capacities[f], 0)
+            for i in range(rows):
+                add_edge(first_base + f, i, 1, first_costs[i][f])
+    for i in range(rows):
+        add_edge(i, rows + i, 1, 0)  # Each row takes one unit of flow
+        for t in range(seconds):
+            add_edge(rows + i, second_base + t, 1, second_costs[i][t])
+    for t in range(seconds):
+        if second_capacities[t] > 0:
+            add_edge(second_base + t, sink, second_capacities[t], 0)
+    _min_cost_flow(graph, source, sink, rows)
+    # The used edge into a row is the reverse edge with spare capacity left behind by the flow
+    return [(next(edge[0] - first_base for edge in graph[i]
+                  if first_base <= edge[0] < second_base and edge[1] > 0),
+             _chosen(graph, rows + i, second_base, seconds)) for i in range(rows)]
+
 class Appointment:
-    def __init__(self, patient_id, doctor_id, appointment_time, appointment_type="Consultation"):
+    __slots__ = ('appointment_id', 'patient_id', 'doctor_id', 'appointment_time',
+                 'appointment_type', 'status', 'notes', 'duration_minutes')
+    
+    DEFAULT_DURATION = 30  # minutes
+    
+    def __init__(self, patient_id, doctor_id, appointment_time, appointment_type="Consultation",
+                 duration_minutes=DEFAULT_DURATION):
         self.appointment_id = str(uuid.uuid4())[:8]  # Shorter ID for display
         self.patient_id = patient_id
         self.doctor_id = doctor_id
         self.appointment_time = appointment_time
         self.appointment_type = appointment_type
-        self.status = "Scheduled"  # Scheduled, Completed, Cancelled
+        self.status = AppointmentStatus.SCHEDULED
         self.notes = ""
+        self.duration_minutes = duration_minutes
+    
+    @property
+    def end_time(self):
+        return self.appointment_time + timedelta(minutes=self.duration_minutes)
+    
+    def overlaps(self, start, end):
+        """True if this appointment intersects the half-open interval [start, end)"""
+        return self.appointment_time < end and start < self.end_time
+    
+    def to_dict(self):
+        return {
+            'appointment_id': self.appointment_id,
+            'patient_id': self.patient_id,
+            'doctor_id': self.doctor_id,
+            'appointment_time': self.appointment_time.isoformat(),
+            'appointment_type': self.appointment_type,
+            'status': self.status,
+            'notes': self.notes,
+            'duration_minutes': self.duration_minutes,
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        appointment = cls(data['patient_id'], data['doctor_id'],
+                          datetime.fromisoformat(data['appointment_time']), data['appointment_type'],
+                          data.get('duration_minutes') or cls.DEFAULT_DURATION)
+        appointment.appointment_id = data['appointment_id']
+        appointment.status = sys.intern(data.get('status', AppointmentStatus.SCHEDULED))
+        appointment.notes = data.get('notes', "")
+        return appointment
     
     def display_info(self):
         """Display appointment information"""
@@ -128,82 +641,760 @@ class Appointment:
         print(f"Patient ID: {self.patient_id}")
         print(f"Doctor ID: {self.doctor_id}")
         print(f"Scheduled Date: {self.appointment_time.strftime('%A, %B %d, %Y')}")
-        print(f"Scheduled Time: {self.appointment_time.strftime('%I:%M %p')}")
+        print(f"Scheduled Time: {self.appointment_time.strftime('%I:%M %p')} - {self.end_time.strftime('%I:%M %p')}")
         print(f"Appointment Type: {self.appointment_type}")
         print(f"Current Status: {self.status}")
 
-class BinarySearchTree:
-    """BST for efficient patient search and retrieval"""
+class DoctorCalendar:
+    """Interval index of one doctor's scheduled appointments.
+    
+    Appointments sit in an AVL tree ordered by start time. Any appointment
+    that overlaps [start, end) must start after start minus the longest
+    duration on the calendar, so an overlap check is a range scan of that
+    window: O(log n + k) instead of a pass over the whole calendar.
+    """
+    __slots__ = ('_tree', '_longest')
+    
+    def __init__(self):
+        self._tree = AVLTree(key=lambda appointment: (appointment.appointment_time, appointment.appointment_id))
+        self._longest = timedelta(0)  # upper bound; not shrunk on removal
+    
+    def __len__(self):
+        return len(self._tree)
+    
+    def add(self, appointment):
+        self._tree.insert(appointment)
+        duration = appointment.end_time - appointment.appointment_time
+        if duration > self._longest:
+            self._longest = duration
+    
+    def remove(self, appointment):
+        return self._tree.delete((appointment.appointment_time, appointment.appointment_id))
+    
+    def starting_between(self, start=None, end=None):
+        """Appointments with start <= appointment_time < end, in time order"""
+        # Appointment IDs are never empty, so (end, "") sorts before every key at `end`
+        low = None if start is None else (start, "")
+        high = None if end is None else (end, "")
+        return self._tree.range_scan(low, high)
+    
+    def on_date(self, day):
+        """Appointments starting on the given date"""
+        start = datetime(day.year, day.month, day.day)
+        return list(self.starting_between(start, start + timedelta(days=1)))
+    
+    def overlapping(self, start, end):
+        """Appointments that intersect [start, end)"""
+        return [appointment for appointment in self.starting_between(start - self._longest, end)
+                if appointment.overlaps(start, end)]
+    
+    def conflicts(self, start=None, end=None):
+        """Pairs of appointments that overlap each other, limited to overlaps inside [start, end)"""
+        window_start = None if start is None else start - self._longest
+        pairs = []
+        active = []
+        for appointment in self.starting_between(window_start, end):
+            active = [other for other in active if other.end_time > appointment.appointment_time]
+            for other in active:
+                if start is None or min(other.end_time, appointment.end_time) > start:
+                    pairs.append((other, appointment))
+            active.append(appointment)
+        return pairs
+
+def appointment_key(appointment):
+    return (appointment.appointment_time, appointment.appointment_id)
+
+class AppointmentIndex:
+    """Every appointment in start-time order, with secondary indexes.
+    
+    The primary AVL tree is keyed by (appointment_time, appointment_id);
+    each patient, doctor and status has its own tree with the same key, so
+    a filtered query walks only the matching appointments. Range queries,
+    "next N" and cursor pages are O(log n + k) and nothing is re-sorted
+    per view.
+    """
+    __slots__ = ('by_time', 'by_patient', 'by_doctor', 'by_status')
+    
+    def __init__(self):
+        self.by_time = AVLTree(key=appointment_key)
+        self.by_patient = defaultdict(lambda: AVLTree(key=appointment_key))
+        self.by_doctor = defaultdict(lambda: AVLTree(key=appointment_key))
+        self.by_status = defaultdict(lambda: AVLTree(key=appointment_key))
+    
+    def __len__(self):
+        return len(self.by_time)
+    
+    def add(self, appointment):
+        self.by_time.insert(appointment)
+        self.by_patient[appointment.patient_id].insert(appointment)
+        self.by_doctor[appointment.doctor_id].insert(appointment)
+        self.by_status[appointment.status].insert(appointment)
+    
+    def remove(self, appointment):
+        key = appointment_key(appointment)
+        self.by_time.delete(key)
+        self.by_patient[appointment.patient_id].delete(key)
+        self.by_doctor[appointment.doctor_id].delete(key)
+        self.by_status[appointment.status].delete(key)
+    
+    def status_changed(self, appointment, old_status):
+        key = appointment_key(appointment)
+        self.by_status[old_status].delete(key)
+        self.by_status[appointment.status].insert(appointment)
+    
+    def _scan(self, low, high, patient_id, doctor_id, status):
+        # Walk the smallest matching index and filter on the other criteria
+        trees = [self.by_time]
+        if patient_id is not None:
+            trees.append(self.by_patient.get(patient_id) or AVLTree(key=appointment_key))
+        if doctor_id is not None:
+            trees.append(self.by_doctor.get(doctor_id) or AVLTree(key=appointment_key))
+        if status is not None:
+            trees.append(self.by_status.get(status) or AVLTree(key=appointment_key))
+        tree = min(trees, key=len)
+        for appointment in tree.range_scan(low, high):
+            if ((patient_id is None or appointment.patient_id == patient_id) and
+                    (doctor_id is None or appointment.doctor_id == doctor_id) and
+                    (status is None or appointment.status == status)):
+                yield appointment
+    
+    def between(self, start=None, end=None, patient_id=None, doctor_id=None, status=None):
+        """Appointments with start <= appointment_time < end in time order (bounds optional)"""
+        # Appointment IDs are never empty, so (end, "") sorts before every key at `end`
+        low = None if start is None else (start, "")
+        high = None if end is None else (end, "")
+        return self._scan(low, high, patient_id, doctor_id, status)
+    
+    def upcoming(self, count, now=None, patient_id=None, doctor_id=None, status=AppointmentStatus.SCHEDULED):
+        """The next `count` appointments starting at or after now"""
+        return list(islice(self.between(now or datetime.now(), None, patient_id, doctor_id, status), count))
+    
+    def page(self, cursor=None, limit=20, start=None, end=None, patient_id=None, doctor_id=None, status=None):
+        """One page of appointments in time order and the cursor for the next page (None at the end)"""
+        low = None if start is None else (start, "")
+        if cursor:
+            timestamp, _, appointment_id = cursor.rpartition("|")
+            # "\0" makes the bound sort just after the cursor's own key
+            low = (datetime.fromisoformat(timestamp), appointment_id + "\0")
+        high = None if end is None else (end, "")
+        items = list(islice(self._scan(low, high, patient_id, doctor_id, status), limit + 1))
+        if len(items) <= limit:
+            return items, None
+        items.pop()
+        last = items[-1]
+        return items, f"{last.appointment_time.isoformat()}|{last.appointment_id}"
+
+class HospitalStatistics:
+    """Live dashboard counters, updated in O(1) by every mutation.
+
+    Patient and appointment counts by status are kept here; room occupancy and
+    busy doctors come from the free-bed index and the load balancer, which
+    already observe every change.
+    """
+    def __init__(self):
+        self.patients_by_status = defaultdict(int)
+        self.appointments_by_status = defaultdict(int)
+    
+    def patient_added(self, patient):
+        self.patients_by_status[patient.status] += 1
+    
+    def patient_removed(self, patient):
+        self.patients_by_status[patient.status] -= 1
+    
+    def status_changed(self, old_status, new_status):
+        self.patients_by_status[old_status] -= 1
+        self.patients_by_status[new_status] += 1
+    
+    def appointment_added(self, appointment):
+        self.appointments_by_status[appointment.status] += 1
+    
+    def appointment_removed(self, appointment):
+        self.appointments_by_status[appointment.status] -= 1
+
+class AVLTree:
+    """Self-balancing AVL tree for patient search and retrieval.
+
+    All operations are iterative, so the tree never hits Python's recursion
+    limit, and monotonically increasing IDs (P001, P002, ...) keep the height
+    at O(log n) instead of degenerating into a linked list. Patients are keyed
+    by record_id_key(patient_id); search, delete and range_scan take keys.
+    """
     class TreeNode:
-        def __init__(self, patient):
-            self.patient = patient
+        __slots__ = ('key', 'value', 'left', 'right', 'height')
+
+        def __init__(self, key, value):
+            self.key = key
+            self.value = value
             self.left = None
             self.right = None
+            self.height = 1
     
-    def __init__(self):
+    def __init__(self, key=lambda patient: record_id_key(patient.patient_id)):
         self.root = None
+        self.key = key
+        self.size = 0
     
-    def insert(self, patient):
-        if not self.root:
-            self.root = self.TreeNode(patient)
-        else:
-            self._insert_recursive(self.root, patient)
+    def __len__(self):
+        return self.size
     
-    def _insert_recursive(self, node, patient):
-        if patient.patient_id < node.patient.patient_id:
-            if not node.left:
-                node.left = self.TreeNode(patient)
-            else:
-                self._insert_recursive(node.left, patient)
+    @staticmethod
+    def _height(node):
+        return node.height if node else 0
+    
+    def _rotate_right(self, node):
+        pivot = node.left
+        node.left = pivot.right
+        pivot.right = node
+        node.height = 1 + max(self._height(node.left), self._height(node.right))
+        pivot.height = 1 + max(self._height(pivot.left), self._height(pivot.right))
+        return pivot
+    
+    def _rotate_left(self, node):
+        pivot = node.right
+        node.right = pivot.left
+        pivot.left = node
+        node.height = 1 + max(self._height(node.left), self._height(node.right))
+        pivot.height = 1 + max(self._height(pivot.left), self._height(pivot.right))
+        return pivot
+    
+    def _rebalance(self, node):
+        node.height = 1 + max(self._height(node.left), self._height(node.right))
+        balance = self._height(node.left) - self._height(node.right)
+        if balance > 1:
+            if self._height(node.left.left) < self._height(node.left.right):
+                node.left = self._rotate_left(node.left)
+            return self._rotate_right(node)
+        if balance < -1:
+            if self._height(node.right.right) < self._height(node.right.left):
+                node.right = self._rotate_right(node.right)
+            return self._rotate_left(node)
+        return node
+    
+    def _rebalance_path(self, path):
+        """Rebalance a root-to-leaf path bottom up, stopping once a subtree's height is unchanged"""
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            old_height = node.height
+            subtree = self._rebalance(node)
+            if subtree is not node:
+                if i == 0:
+                    self.root = subtree
+                elif path[i - 1].left is node:
+                    path[i - 1].left = subtree
+                else:
+                    path[i - 1].right = subtree
+            if subtree.height == old_height:
+                # Nothing above this subtree can have changed
+                break
+    
+    def insert(self, value):
+        """Insert a value, replacing any existing value with the same key"""
+        key = self.key(value)
+        path = []
+        node = self.root
+        while node:
+            if key == node.key:
+                node.value = value
+                return
+            path.append(node)
+            node = node.left if key < node.key else node.right
+        
+        new_node = self.TreeNode(key, value)
+        if not path:
+            self.root = new_node
+        elif key < path[-1].key:
+            path[-1].left = new_node
         else:
-            if not node.right:
-                node.right = self.TreeNode(patient)
-            else:
-                self._insert_recursive(node.right, patient)
+            path[-1].right = new_node
+        self.size += 1
+        self._rebalance_path(path)
     
-    def search(self, patient_id):
-        return self._search_recursive(self.root, patient_id)
+    def search(self, key):
+        node = self.root
+        while node:
+            if key == node.key:
+                return node.value
+            node = node.left if key < node.key else node.right
+        return None
     
-    def _search_recursive(self, node, patient_id):
+    def delete(self, key):
+        """Remove the value stored under key, returning it (or None if absent)"""
+        path = []
+        node = self.root
+        while node and node.key != key:
+            path.append(node)
+            node = node.left if key < node.key else node.right
         if not node:
             return None
-        if patient_id == node.patient.patient_id:
-            return node.patient
-        elif patient_id < node.patient.patient_id:
-            return self._search_recursive(node.left, patient_id)
+        
+        removed = node.value
+        if node.left and node.right:
+            # Copy the in-order successor into this node, then unlink the successor
+            path.append(node)
+            successor = node.right
+            while successor.left:
+                path.append(successor)
+                successor = successor.left
+            node.key, node.value = successor.key, successor.value
+            node = successor
+        
+        child = node.left or node.right
+        if not path:
+            self.root = child
+        elif path[-1].left is node:
+            path[-1].left = child
         else:
-            return self._search_recursive(node.right, patient_id)
+            path[-1].right = child
+        self.size -= 1
+        self._rebalance_path(path)
+        return removed
+    
+    def range_scan(self, low=None, high=None):
+        """Yield values with low <= key <= high in key order (bounds optional)"""
+        stack = []
+        node = self.root
+        while stack or node:
+            while node:
+                if low is not None and node.key < low:
+                    node = node.right
+                else:
+                    stack.append(node)
+                    node = node.left
+            if not stack:
+                return
+            node = stack.pop()
+            if high is not None and node.key > high:
+                return
+            yield node.value
+            node = node.right
     
     def inorder_traversal(self):
-        patients = []
-        self._inorder_recursive(self.root, patients)
-        return patients
-    
-    def _inorder_recursive(self, node, patients):
-        if node:
-            self._inorder_recursive(node.left, patients)
-            patients.append(node.patient)
-            self._inorder_recursive(node.right, patients)
+        return list(self.range_scan())
 
-class HospitalManagementSystem:
+def normalize_name(name):
+    return " ".join(re.findall(r"\w+", name.lower()))
+
+def name_trigrams(name):
+    """Trigrams of each word padded with two leading spaces and one trailing, as in pg_trgm"""
+    grams = set()
+    for word in name.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+class SortedStringList:
+    """Sorted strings kept in buckets of about LOAD items.
+    
+    Inserting or removing is a binary search over bucket maxima plus a short
+    list insert inside one bucket, several times faster than a Python tree
+    for bulk loads; range scans walk the buckets in order.
+    """
+    LOAD = 1000
+    
     def __init__(self):
-        
-        self.emergency_queue = []
-        self.regular_queue = deque()
+        self._buckets = []
+        self._maxes = []  # last (largest) string in each bucket
+        self.size = 0
+    
+    def __len__(self):
+        return self.size
+    
+    def add(self, item):
+        buckets, maxes = self._buckets, self._maxes
+        self.size += 1
+        if not buckets:
+            buckets.append([item])
+            maxes.append(item)
+            return
+        index = bisect.bisect_left(maxes, item)
+        if index == len(maxes):
+            index -= 1
+            buckets[index].append(item)
+            maxes[index] = item
+        else:
+            bisect.insort(buckets[index], item)
+        bucket = buckets[index]
+        if len(bucket) > 2 * self.LOAD:
+            upper = bucket[self.LOAD:]
+            del bucket[self.LOAD:]
+            buckets.insert(index + 1, upper)
+            maxes[index] = bucket[-1]
+            maxes.insert(index + 1, upper[-1])
+    
+    def discard(self, item):
+        index = bisect.bisect_left(self._maxes, item)
+        if index == len(self._maxes):
+            return False
+        bucket = self._buckets[index]
+        position = bisect.bisect_left(bucket, item)
+        if position == len(bucket) or bucket[position] != item:
+            return False
+        del bucket[position]
+        self.size -= 1
+        if not bucket:
+            del self._buckets[index]
+            del self._maxes[index]
+        elif position == len(bucket):
+            self._maxes[index] = bucket[-1]
+        return True
+    
+    def range_scan(self, low, high):
+        """Yield items with low <= item <= high in order"""
+        index = bisect.bisect_left(self._maxes, low)
+        if index == len(self._buckets):
+            return
+        position = bisect.bisect_left(self._buckets[index], low)
+        for bucket in self._buckets[index:]:
+            for item in islice(bucket, position, None):
+                if item > high:
+                    return
+                yield item
+            position = 0
+
+class PatientNameIndex:
+    """Type-ahead and typo-tolerant search over patient names.
+    
+    Prefix search uses a sorted list holding every word-start suffix of each
+    normalized name ("alice smith", "smith"), so "smi" finds Alice Smith
+    with one range scan. Fuzzy search uses a trigram inverted index and ranks
+    candidates by the share of the query's trigrams found in their name, then
+    by Dice similarity, so a misspelt first name still finds the full name. Both are updated
+    per patient on registration and removal.
+    """
+    def __init__(self):
+        self._prefixes = SortedStringList()  # "<name suffix>\0<patient_id>"
+        self._postings = defaultdict(set)  # trigram -> patient IDs
+        self._trigram_counts = {}          # patient_id -> number of distinct trigrams in the name
+        self._patients = {}
+    
+    def __len__(self):
+        return len(self._patients)
+    
+    @staticmethod
+    def _suffixes(name):
+        words = name.split()
+        return [" ".join(words[i:]) for i in range(len(words))]
+    
+    def add(self, patient):
+        name = normalize_name(patient.name)
+        patient_id = patient.patient_id
+        self._patients[patient_id] = patient
+        for suffix in self._suffixes(name):
+            self._prefixes.add(f"{suffix}\0{patient_id}")
+        grams = name_trigrams(name)
+        for gram in grams:
+            self._postings[gram].add(patient_id)
+        self._trigram_counts[patient_id] = len(grams)
+    
+    def remove(self, patient):
+        patient_id = patient.patient_id
+        if self._patients.pop(patient_id, None) is None:
+            return
+        name = normalize_name(patient.name)
+        for suffix in self._suffixes(name):
+            self._prefixes.discard(f"{suffix}\0{patient_id}")
+        for gram in name_trigrams(name):
+            postings = self._postings[gram]
+            postings.discard(patient_id)
+            if not postings:
+                del self._postings[gram]
+        del self._trigram_counts[patient_id]
+    
+    def prefix(self, query, limit=10):
+        """Patients whose name, or any word onwards in it, starts with query; alphabetical"""
+        query = normalize_name(query)
+        if not query or limit <= 0:
+            return []
+        results = []
+        seen = set()
+        # "\uffff" sorts after any character that can follow the prefix
+        for entry in self._prefixes.range_scan(query, query + "\uffff"):
+            patient_id = entry.rpartition("\0")[2]
+            if patient_id not in seen:
+                seen.add(patient_id)
+                results.append(self._patients[patient_id])
+                if len(results) == limit:
+                    break
+        return results
+    
+    def fuzzy(self, query, limit=10, min_score=0.3):
+        """Patients with names similar to query, best first, as (share of query trigrams matched, patient)"""
+        grams = name_trigrams(normalize_name(query))
+        if not grams:
+            return []
+        size = len(grams)
+        # A name scoring >= min_score shares at least `needed` trigrams with the query, so it
+        # must appear in one of the size - needed + 1 rarest postings; the commonest trigrams
+        # are only checked against the candidates found that way
+        needed = max(1, math.ceil(min_score * size))
+        postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+        shared = Counter()
+        for posting in postings[:size - needed + 1]:
+            shared.update(posting)
+        for posting in postings[size - needed + 1:]:
+            shared.update(posting.intersection(shared))
+        counts = self._trigram_counts
+        scored = ((common / size, 2 * common / (size + counts[patient_id]), patient_id)
+                  for patient_id, common in shared.items() if common >= needed)
+        best = heapq.nlargest(limit, scored)
+        return [(score, self._patients[patient_id]) for score, _, patient_id in best]
+    
+    def search(self, query, limit=10):
+        """Prefix matches first, then fuzzy matches, without duplicates"""
+        if limit <= 0:
+            return []
+        results = self.prefix(query, limit)
+        if len(results) < limit:
+            found = {patient.patient_id for patient in results}
+            for _, patient in self.fuzzy(query, limit):
+                if patient.patient_id not in found:
+                    results.append(patient)
+                    if len(results) == limit:
+                        break
+        return results
+
+class RecordViews:
+    """Sorted, filtered lists of patients, doctors, rooms or appointments for paged grids.
+    
+    A view is built once per (kind, sort, filters) from the existing indexes
+    and cached until the hospital's revision changes, so a grid scrolling
+    through 100k patients only slices a list per page instead of sorting or
+    scanning again. Text columns sort case-insensitively, with None as "".
+    """
+    SORT_COLUMNS = {
+        'patients': ('patient_id', 'name', 'age', 'condition', 'priority', 'status', 'room_number',
+                     'assigned_doctor'),
+        'doctors': ('doctor_id', 'name', 'specialization', 'load', 'max_patients'),
+        'rooms': ('room_number', 'room_type', 'capacity', 'occupied_beds', 'is_available'),
+        'appointments': ('appointment_time', 'appointment_id', 'patient_id', 'doctor_id', 'appointment_type',
+                         'duration_minutes', 'status'),
+    }
+    # Columns the base source is already ordered by, so sorting on them is free
+    NATURAL_ORDER = {'patients': 'patient_id', 'doctors': 'doctor_id', 'rooms': 'room_number',
+                     'appointments': 'appointment_time'}
+    NUMERIC_COLUMNS = {'age', 'priority', 'load', 'max_patients', 'capacity', 'occupied_beds', 'is_available',
+                       'duration_minutes'}
+    SEARCH_FIELDS = {
+        'patients': ('patient_id', 'name', 'condition'),
+        'doctors': ('doctor_id', 'name', 'specialization'),
+        'rooms': ('room_number', 'room_type'),
+        'appointments': ('appointment_id', 'patient_id', 'doctor_id', 'appointment_type'),
+    }
+    
+    def __init__(self, hms, cache_size=8):
+        self.hms = hms
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # view key -> (revision, records)
+        self._cache_lock = threading.Lock()  # Readers share the hospital lock but each update the cache
+    
+    def page(self, kind, offset=0, limit=50, sort_by=None, descending=False, text=None, **filters):
+        """(records, total) for one window of a view; offset counts from the start of the view"""
+        records = self.view(kind, sort_by, descending, text, **filters)
+        offset = max(0, min(offset, len(records)))
+        return records[offset:offset + limit], len(records)
+    
+    def view(self, kind, sort_by=None, descending=False, text=None, **filters):
+        if kind not in self.SORT_COLUMNS:
+            raise ValueError(f"Unknown record kind: {kind}")
+        sort_by = sort_by or self.NATURAL_ORDER[kind]
+        if sort_by not in self.SORT_COLUMNS[kind]:
+            raise ValueError(f"Cannot sort {kind} by {sort_by}")
+        text = " ".join((text or "").lower().split())
+        filters = {name: value for name, value in filters.items() if value not in (None, "")}
+        key = (kind, sort_by, descending, text, tuple(sorted(filters.items())))
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == self.hms.revision:
+                self._cache.move_to_end(key)
+                return cached[1]
+        records = self._build(kind, sort_by, descending, text, filters)
+        with self._cache_lock:
+            self._cache[key] = (self.hms.revision, records)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return records
+    
+    def _source(self, kind, filters):
+        hms = self.hms
+        if kind == 'patients':
+            return hms.patient_bst.range_scan()
+        if kind == 'doctors':
+            return sorted(hms.doctors.values(), key=lambda doctor: record_id_key(doctor.doctor_id))
+        if kind == 'rooms':
+            return sorted(hms.rooms.values(), key=lambda room: record_id_key(room.room_number))
+        # The appointment index narrows by patient, doctor and status itself
+        return hms.appointment_index.between(patient_id=filters.pop('patient_id', None),
+                                             doctor_id=filters.pop('doctor_id', None),
+                                             status=filters.pop('status', None))
+    
+    @staticmethod
+    def column_value(record, column):
+        if column == 'load':
+            return len(record.current_patients)
+        return getattr(record, column)
+    
+    def _sort_key(self, record, column):
+        value = self.column_value(record, column)
+        if column in self.NUMERIC_COLUMNS:
+            return value
+        return "" if value is None else str(value).lower()
+    
+    def _build(self, kind, sort_by, descending, text, filters):
+        filters = dict(filters)
+        records = self._source(kind, filters)
+        if filters:
+            records = (record for record in records
+                       if all(str(getattr(record, name)) == str(value) for name, value in filters.items()))
+        if text:
+            fields = self.SEARCH_FIELDS[kind]
+            records = (record for record in records
+                       if any(text in str(getattr(record, field) or "").lower() for field in fields))
+        records = list(records)
+        if sort_by != self.NATURAL_ORDER[kind]:
+            # Stable, so ties stay in natural order either way
+            records.sort(key=lambda record: self._sort_key(record, sort_by), reverse=descending)
+        elif descending:
+            records.reverse()
+        return records
+
+class OperationResult:
+    """Outcome of a headless API call: success flag, message and affected record"""
+    __slots__ = ('success', 'message', 'data', 'details')
+    
+    def __init__(self, success, message, data=None, **details):
+        self.success = success
+        self.message = message
+        self.data = data
+        self.details = details
+    
+    def __bool__(self):
+        return self.success
+    
+    def __repr__(self):
+        return f"OperationResult(success={self.success}, message={self.message!r})"
+
+def to_json(value):
+    """Records, results and timestamps as plain JSON data"""
+    if isinstance(value, OperationResult):
+        body = {name: to_json(detail) for name, detail in value.details.items()}
+        body.update(success=value.success, message=value.message, data=to_json(value.data))
+        return body
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {str(key): to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [to_json(item) for item in value]
+    return value
+
+ROOM_TYPES = ["ICU", "General", "Private", "Emergency"]
+
+def validate_patient_fields(name, age, condition, priority):
+    """Check registration fields, returning them cleaned or raising ValueError"""
+    name = str(name).strip()
+    if len(name) < 2:
+        raise ValueError("Patient name must be at least 2 characters long!")
+    try:
+        age = int(age)
+    except (TypeError, ValueError):
+        raise ValueError("Please enter a valid number for age!")
+    if not 0 < age <= 120:
+        raise ValueError("Age must be between 1 and 120 years!")
+    condition = str(condition).strip()
+    if len(condition) < 3:
+        raise ValueError("Condition description must be at least 3 characters long!")
+    try:
+        priority = int(priority)
+    except (TypeError, ValueError):
+        raise ValueError("Please enter a valid number for priority level!")
+    if not 1 <= priority <= 4:
+        raise ValueError("Priority must be between 1 and 4!")
+    return name, age, condition, priority
+
+class HospitalManagementSystem:
+    """The hospital's records and operations.
+    
+    Safe to share between threads: public methods take self.lock, one
+    writer at a time or any number of readers (see concurrency.py).
+    """
+    def __init__(self, room_policy="lowest_number", storage=None, triage=None, clock=None, history_depth=1000,
+                 seed_defaults=True):
+        self.lock = ReadWriteLock()
+        
+        # Emergency patients by (priority, arrival); regular patients first come first served
+        self.emergency_queue = PatientQueue(lambda patient: (patient.priority, patient.arrival_seq))
+        self.regular_queue = PatientQueue(lambda patient: patient.arrival_seq)
+        self.arrivals = 0
         self.patients = {}  
         self.doctors = {}   
+        self.doctor_balancer = DoctorLoadBalancer()
         self.rooms = {}     
+        self.room_index = RoomAvailabilityIndex(room_policy)
         self.appointments = {} 
-        self.patient_bst = BinarySearchTree()
+        self.appointment_index = AppointmentIndex()
+        self.stats = HospitalStatistics()
+        self.patient_bst = AVLTree()
+        self.name_index = PatientNameIndex()
         self.department_graph = defaultdict(list)
-        self.operation_history = []
-        
-        self._initialize_hospital()
+        self.triage = triage or TriageClassifier.from_file()
+        self.history = CommandHistory(history_depth)  # Undo/redo; older entries spill to a temp file
+        self.revision = 0  # Bumped on every mutation; paged views are cached per revision
+        self.clock = clock or SystemClock()  # Every timestamp and "now" comparison goes through this
+        self.events = EventBus(self.clock)
+        self.metrics = HospitalMetrics(self)  # Disabled until metrics.enable()
+        self.record_views = RecordViews(self)
+        self.storage = None  # Attached below, once existing state has been loaded
+        self._uncommitted = threading.local()  # Journal position of this thread's last change, see after_write()
+        self.archive = None  # Storage engine holding closed records that were not loaded, if any
+        self.id_floor = defaultdict(int)  # Highest ID number per prefix among those closed records
+        self.archived_ids = set()  # Patient IDs of those closed records, so duplicate checks stay in memory
+        
+        # Undo history is per session: neither restored state nor the seeded staff can be undone
+        with self.history.paused():
+            self.restored = storage is not None and storage.attach(self)
+            self.storage = storage
+            if not self.restored and seed_defaults:
+                self._initialize_hospital()
+    
+    @write_locked
+    def close(self):
+        """Flush and close the attached storage engine, if any, and stop serving metrics"""
+        self.metrics.close()
+        self.history.close()
+        self.archive = None
+        if self.storage is not None:
+            self.storage.close()
+            self.storage = None
+    
+    def _record(self, op, payload):
+        """Pass a completed mutation to the storage engine, if one is attached, and publish it"""
+        self.revision += 1
+        if self.storage is not None:
+            self._uncommitted.seq = self.storage.record(op, payload)
+        self.events.publish(EventType.FOR_OPERATION[op], payload)
+    
+    def _record_many(self, op, payloads):
+        """Pass a batch of mutations of one kind to the storage engine in one write"""
+        self.revision += 1
+        if self.storage is not None and payloads:
+            self._uncommitted.seq = self.storage.bulk_record(op, payloads)
+        kind = EventType.FOR_OPERATION[op]
+        for payload in payloads:
+            self.events.publish(kind, payload)
+    
+    def after_write(self):
+        """Wait until this thread's changes are durable; runs once its write lock is released"""
+        seq = getattr(self._uncommitted, 'seq', None)
+        commit = getattr(self.storage, 'commit', None)
+        if seq is not None and commit is not None:
+            self._uncommitted.seq = None
+            commit(seq)
     
     def _initialize_hospital(self):
-        
-        print("Initializing hospital system with default staff and facilities...")
-        
+        """Seed the default staff and facilities"""
         # Add some doctors
         doctors_data = [
             ("D001", "Dr. Sarah Smith", "Cardiology"),
@@ -214,8 +1405,7 @@ class HospitalManagementSystem:
         ]
         
         for doctor_id, name, specialization in doctors_data:
-            doctor = Doctor(doctor_id, name, specialization)
-            self.doctors[doctor_id] = doctor
+            self.register_doctor(Doctor(doctor_id, name, specialization))
         
         # Add some rooms
         rooms_data = [
@@ -224,24 +1414,747 @@ class HospitalManagementSystem:
         ]
         
         for room_number, room_type in rooms_data:
-            room = Room(room_number, room_type)
-            self.rooms[room_number] = room
+            self.register_room(Room(room_number, room_type))
         
         # Set up department connections
         self.department_graph["Emergency"].extend(["ICU", "General"])
         self.department_graph["ICU"].extend(["General", "Cardiology"])
         self.department_graph["General"].extend(["Discharge"])
+    
+    @write_locked
+    def register_doctor(self, doctor):
+        """Add a doctor to the staff and to the load balancer"""
+        self.doctors[doctor.doctor_id] = doctor
+        self.doctor_balancer.add_doctor(doctor)
+        self.history.push(('add_doctor', doctor.doctor_id))
+        self._record('add_doctor', doctor.to_dict())
+        return doctor
+    
+    @write_locked
+    def register_room(self, room):
+        """Add a room to the hospital and to the free-bed index"""
+        self.rooms[room.room_number] = room
+        self.room_index.add_room(room)
+        self.history.push(('add_room', room.room_number))
+        self._record('add_room', room.to_dict())
+        return room
+    
+    @write_locked
+    def enqueue_patient(self, patient, arrival_seq=None):
+        """Record a newly registered patient and place them in the right waiting queue.
+        
+        arrival_seq puts back a patient whose registration is redone or
+        replayed in their original place; new patients get the next number.
+        """
+        self._index_patient(patient)
+        if arrival_seq:
+            patient.arrival_seq = arrival_seq
+            self.arrivals = max(self.arrivals, arrival_seq)
+            queue_type = self._enqueue_waiting(patient)
+        else:
+            queue_type = self._add_arrival(patient)
+        self.history.push(('register', patient.patient_id))
+        self._record('register', patient.to_dict())
+        self._publish_queued(patient, queue_type)
+        return queue_type
+    
+    @write_locked
+    def enqueue_patients(self, patients):
+        """Register a batch of new patients, journaling them with a single storage write.
+        
+        Patients whose patient_id is None get the next free ID here, under the
+        write lock, so desks registering meanwhile cannot take the same one.
+        Patients whose ID is already in use are left out and returned.
+        """
+        accepted, rejected, queue_types = [], [], []
+        for patient in patients:
+            if patient.patient_id is None:
+                patient.patient_id = self._next_id("P", self.patients)
+            elif patient.patient_id in self.patients or self.is_archived(patient.patient_id):
+                rejected.append(patient)
+                continue
+            self._index_patient(patient)
+            queue_types.append(self._add_arrival(patient))
+            self.history.push(('register', patient.patient_id))
+            accepted.append(patient)
+        self._record_many('register', [patient.to_dict() for patient in accepted])
+        for patient, queue_type in zip(accepted, queue_types):
+            self._publish_queued(patient, queue_type)
+        return rejected
+    
+    def _publish_queued(self, patient, queue_type):
+        self.events.publish(EventType.PATIENT_QUEUED, {'patient_id': patient.patient_id, 'queue': queue_type,
+                                                       'priority': patient.priority})
+    
+    def _index_patient(self, patient):
+        self.patients[patient.patient_id] = patient
+        self.patient_bst.insert(patient)
+        self.name_index.add(patient)
+        self.stats.patient_added(patient)
+    
+    def _add_arrival(self, patient):
+        """Give a new patient the next arrival number and queue them"""
+        self.arrivals += 1
+        patient.arrival_seq = self.arrivals
+        return self._enqueue_waiting(patient)
+    
+    def _queue_for(self, patient):
+        if patient.priority <= 2:
+            return self.emergency_queue, "Emergency"
+        return self.regular_queue, "Regular"
+    
+    def _enqueue_waiting(self, patient):
+        queue, queue_type = self._queue_for(patient)
+        queue.push(patient)
+        return queue_type
+    
+    def _retriage(self, patient, priority):
+        """Change a waiting patient's priority, moving them between queues if needed"""
+        old_queue, _ = self._queue_for(patient)
+        self.history.push(('retriage', patient.patient_id, patient.priority, priority))
+        patient.priority = priority
+        new_queue, queue_type = self._queue_for(patient)
+        if patient.patient_id in old_queue:
+            if new_queue is old_queue:
+                old_queue.update(patient)
+            else:
+                old_queue.move_to(patient.patient_id, new_queue)
+        self._record('retriage', {'patient_id': patient.patient_id, 'priority': priority})
+        return queue_type
+    
+    @write_locked
+    def release_patient(self, patient):
+        """Discharge an admitted patient, freeing their room and doctor"""
+        # Free up room
+        if patient.room_number:
+            room = self.rooms.get(patient.room_number)
+            if room:
+                room.discharge_patient(patient.patient_id)
+        
+        # Free up doctor
+        if patient.assigned_doctor:
+            doctor = self.doctors.get(patient.assigned_doctor)
+            if doctor:
+                doctor.discharge_patient(patient.patient_id)
         
-        print("Hospital system initialized successfully!")
-        print(f"Available: {len(self.doctors)} doctors, {len(self.rooms)} rooms")
+        self._set_status(patient, PatientStatus.DISCHARGED)
+        old_room = patient.room_number
+        old_doctor = patient.assigned_doctor
+        patient.room_number = None
+        patient.assigned_doctor = None
+        
+        self.history.push(('discharge', patient.patient_id, old_room, old_doctor))
+        self._record('discharge', {'patient_id': patient.patient_id})
+        return old_room, old_doctor
+    
+    @write_locked
+    def book_appointment(self, appointment):
+        """Store an appointment and add it to the doctor's schedule"""
+        self.appointments[appointment.appointment_id] = appointment
+        self.appointment_index.add(appointment)
+        self.stats.appointment_added(appointment)
+        
+        doctor = self.doctors.get(appointment.doctor_id)
+        if doctor and appointment.status == AppointmentStatus.SCHEDULED:
+            doctor.schedule.add(appointment)
+        self.history.push(('appointment', appointment.appointment_id))
+        self._record('appointment', appointment.to_dict())
+        return appointment
+    
+    def _set_status(self, patient, status):
+        self.stats.status_changed(patient.status, status)
+        patient.status = status
+    
+    def _complete_admission(self, patient, room, doctor):
+        """Place a patient (already assigned to doctor) into a room"""
+        room.admit_patient(patient.patient_id)
+        patient.room_number = room.room_number
+        self._set_status(patient, PatientStatus.ADMITTED)
+        self.history.push(('admit', patient.patient_id, room.room_number, doctor.doctor_id))
+        self._record('admit', {'patient_id': patient.patient_id, 'room_number': room.room_number,
+                               'doctor_id': doctor.doctor_id})
+    
+    def _remove_from_queues(self, patient_id):
+        """Remove a waiting patient from whichever queue holds them"""
+        return self.emergency_queue.remove(patient_id) or self.regular_queue.remove(patient_id)
+    
+    def _unregister_patient(self, patient_id):
+        """Remove a patient from every record, index and queue"""
+        self._remove_from_queues(patient_id)
+        patient = self.patients.pop(patient_id)
+        self.stats.patient_removed(patient)
+        self.patient_bst.delete(record_id_key(patient_id))
+        self.name_index.remove(patient)
+        self._record('unregister', {'patient_id': patient_id})
+        return patient
+    
+    def _unadmit(self, patient):
+        """Return an admitted patient to their original place in the waiting queue"""
+        self.rooms[patient.room_number].discharge_patient(patient.patient_id)
+        self.doctors[patient.assigned_doctor].discharge_patient(patient.patient_id)
+        patient.room_number = None
+        patient.assigned_doctor = None
+        self._set_status(patient, PatientStatus.WAITING)
+        self._enqueue_waiting(patient)  # arrival_seq is unchanged, so the old position comes back
+        self._record('unadmit', {'patient_id': patient.patient_id})
+    
+    def _readmit(self, patient, room, doctor):
+        """Put a discharged patient back into a given room with a given doctor"""
+        if not room.is_available or len(doctor.current_patients) >= doctor.max_patients:
+            return False
+        doctor.assign_patient(patient)
+        self._complete_admission(patient, room, doctor)
+        return True
+    
+    def _remove_appointment(self, appointment_id):
+        appointment = self.appointments.pop(appointment_id)
+        self.appointment_index.remove(appointment)
+        self.stats.appointment_removed(appointment)
+        doctor = self.doctors.get(appointment.doctor_id)
+        if doctor and appointment.status == AppointmentStatus.SCHEDULED:
+            doctor.schedule.remove(appointment)
+        self._record('remove_appointment', {'appointment_id': appointment_id})
+        return appointment
+    
+    def _remove_doctor(self, doctor_id):
+        doctor = self.doctors.pop(doctor_id)
+        self.doctor_balancer.remove_doctor(doctor)
+        self._record('remove_doctor', {'doctor_id': doctor_id})
+        return doctor
+    
+    def _remove_room(self, room_number):
+        room = self.rooms.pop(room_number)
+        self.room_index.remove_room(room)
+        self._record('remove_room', {'room_number': room_number})
+        return room
+    
+    @read_locked
+    def export_state(self):
+        """Full hospital state as plain data, for snapshots"""
+        return {
+            'doctors': [doctor.to_dict() for doctor in self.doctors.values()],
+            'rooms': [room.to_dict() for room in self.rooms.values()],
+            'patients': [patient.to_dict() for patient in self.patients.values()],
+            'emergency_queue': [patient.patient_id for patient in self.emergency_queue.in_order()],
+            'regular_queue': [patient.patient_id for patient in self.regular_queue.in_order()],
+            'appointments': [appointment.to_dict() for appointment in self.appointments.values()],
+        }
+    
+    @write_locked
+    def load_state(self, state):
+        """Rebuild every record, index and counter from export_state() data"""
+        for data in state['doctors']:
+            self.register_doctor(Doctor.from_dict(data))
+        for data in state['rooms']:
+            self.register_room(Room.from_dict(data))
+        for data in state['patients']:
+            patient = Patient.from_dict(data)
+            if patient.arrival_seq:
+                self.arrivals = max(self.arrivals, patient.arrival_seq)
+            else:
+                # Saved before arrival numbers were stored: registration order is all they encode
+                self.arrivals += 1
+                patient.arrival_seq = self.arrivals
+            self._index_patient(patient)
+            if patient.status == PatientStatus.ADMITTED:
+                if patient.room_number in self.rooms:
+                    self.rooms[patient.room_number].admit_patient(patient.patient_id)
+                if patient.assigned_doctor in self.doctors:
+                    self.doctors[patient.assigned_doctor].assign_patient(patient)
+        for patient_id in state['emergency_queue'] + state['regular_queue']:
+            self._enqueue_waiting(self.patients[patient_id])
+        for data in state['appointments']:
+            self.book_appointment(Appointment.from_dict(data))
+        # Closed records the storage engine kept back still count towards the totals and the IDs in use
+        archive = state.get('archive', {})
+        for status, count in archive.get('patients_by_status', {}).items():
+            self.stats.patients_by_status[status] += count
+        for status, count in archive.get('appointments_by_status', {}).items():
+            self.stats.appointments_by_status[status] += count
+        self.id_floor.update(archive.get('last_ids', {}))
+        self.archived_ids.update(archive.get('patient_ids', ()))
+    
+    @write_locked
+    def apply_operation(self, op, payload):
+        """Re-apply a recorded operation, e.g. when replaying the write-ahead log"""
+        if op == 'register':
+            patient = Patient.from_dict(payload)
+            self.enqueue_patient(patient, patient.arrival_seq)
+        elif op == 'admit':
+            patient = self.patients[payload['patient_id']]
+            self._remove_from_queues(patient.patient_id)
+            self.doctors[payload['doctor_id']].assign_patient(patient)
+            self._complete_admission(patient, self.rooms[payload['room_number']],
+                                     self.doctors[payload['doctor_id']])
+        elif op == 'discharge':
+            self.release_patient(self.patients[payload['patient_id']])
+        elif op == 'appointment':
+            self.book_appointment(Appointment.from_dict(payload))
+        elif op == 'add_doctor':
+            self.register_doctor(Doctor.from_dict(payload))
+        elif op == 'add_room':
+            self.register_room(Room.from_dict(payload))
+        elif op == 'unregister':
+            self._unregister_patient(payload['patient_id'])
+        elif op == 'retriage':
+            self._retriage(self.patients[payload['patient_id']], payload['priority'])
+        elif op == 'unadmit':
+            self._unadmit(self.patients[payload['patient_id']])
+        elif op == 'remove_appointment':
+            self._remove_appointment(payload['appointment_id'])
+        elif op == 'remove_doctor':
+            self._remove_doctor(payload['doctor_id'])
+        elif op == 'remove_room':
+            self._remove_room(payload['room_number'])
+        else:
+            raise ValueError(f"Unknown operation in log: {op}")
+    
+    # ---------- Headless API: no print()/input(), returns OperationResult ----------
+    def _next_id(self, prefix, records):
+        number = max(len(records), self.id_floor[prefix]) + 1
+        while f"{prefix}{number:03d}" in records:
+            number += 1
+        return f"{prefix}{number:03d}"
+    
+    def _requeue(self, patient):
+        """Return a patient whose admission failed to their old place in the queue"""
+        self._enqueue_waiting(patient)
+    
+    @write_locked
+    def register_patient(self, name, age, condition, priority=None, patient_id=None):
+        """Register a new patient and queue them for admission.
+        
+        Without a priority the triage rules suggest one, defaulting to Medium.
+        patient_id is normally generated; a sharded deployment passes its own.
+        """
+        if priority is None or priority == "":
+            priority = self.suggest_triage(condition).priority or Priority.MEDIUM
+        try:
+            name, age, condition, priority = validate_patient_fields(name, age, condition, priority)
+        except ValueError as e:
+            return OperationResult(False, str(e))
+        if patient_id is None:
+            patient_id = self._next_id("P", self.patients)
+        elif patient_id in self.patients or self.is_archived(patient_id):
+            return OperationResult(False, f"Patient ID '{patient_id}' already exists!")
+        patient = Patient(patient_id, name, age, condition, priority, self.clock.now())
+        queue_type = self.enqueue_patient(patient)
+        return OperationResult(True, f"Patient {name} registered (ID: {patient.patient_id}) in the {queue_type} queue",
+                               patient, queue=queue_type)
+    
+    @write_locked
+    def admit_patient(self):
+        """Admit the next waiting patient: emergency queue first, then regular (FIFO)"""
+        if self.emergency_queue:
+            patient = self.emergency_queue.pop()
+            queue_type = "Emergency"
+        elif self.regular_queue:
+            patient = self.regular_queue.pop()
+            queue_type = "Regular"
+        else:
+            return OperationResult(False, "No patients are currently waiting for admission.")
+        
+        room = self._find_available_room(patient.condition)
+        if not room:
+            self._requeue(patient)
+            return OperationResult(False, f"No available rooms suitable for patient {patient.name}",
+                                   patient, queue=queue_type, reason="no_room")
+        
+        doctor = self._assign_doctor(patient, self.triage.classify(patient.condition).specialization)
+        if not doctor:
+            self._requeue(patient)
+            return OperationResult(False, f"No available doctor for patient {patient.name}",
+                                   patient, queue=queue_type, reason="no_doctor")
+        
+        self._complete_admission(patient, room, doctor)
+        return OperationResult(True, f"Patient {patient.name} admitted to room {room.room_number}",
+                               patient, queue=queue_type, room=room, doctor=doctor)
+    
+    @write_locked
+    def discharge_patient(self, patient_id):
+        """Discharge an admitted patient, freeing their room and doctor"""
+        patient = self.patients.get(patient_id)
+        if not patient:
+            return OperationResult(False, f"Patient with ID '{patient_id}' not found in system.")
+        if patient.status != PatientStatus.ADMITTED:
+            return OperationResult(False, f"Patient {patient.name} is not currently admitted.", patient)
+        old_room, old_doctor = self.release_patient(patient)
+        return OperationResult(True, f"Patient {patient.name} has been discharged successfully!",
+                               patient, room_number=old_room, doctor_id=old_doctor)
+    
+    @write_locked
+    def schedule_appointment(self, patient_id, doctor_id, appointment_time, appointment_type="Consultation",
+                             duration_minutes=Appointment.DEFAULT_DURATION):
+        """Book an appointment at least one hour in the future that does not overlap the doctor's others"""
+        if patient_id not in self.patients and not self.is_archived(patient_id):
+            return OperationResult(False, f"Patient with ID '{patient_id}' not found.")
+        if doctor_id not in self.doctors:
+            return OperationResult(False, f"Doctor with ID '{doctor_id}' not found.")
+        if appointment_time < self.clock.now():
+            return OperationResult(False, "Cannot schedule appointment in the past!")
+        if appointment_time < self.clock.now() + timedelta(hours=1):
+            return OperationResult(False, "Appointment must be scheduled at least 1 hour in advance!")
+        try:
+            duration_minutes = int(duration_minutes)
+        except (TypeError, ValueError):
+            return OperationResult(False, "Please enter a valid number of minutes!")
+        if not 5 <= duration_minutes <= 480:
+            return OperationResult(False, "Appointment duration must be between 5 and 480 minutes!")
+        
+        doctor = self.doctors[doctor_id]
+        end_time = appointment_time + timedelta(minutes=duration_minutes)
+        clashes = doctor.schedule.overlapping(appointment_time, end_time)
+        if clashes:
+            clash = clashes[0]
+            return OperationResult(False, f"{doctor.name} already has appointment {clash.appointment_id} "
+                                          f"from {clash.appointment_time.strftime('%Y-%m-%d %H:%M')} "
+                                          f"to {clash.end_time.strftime('%H:%M')}",
+                                   reason="conflict", conflicts=clashes)
+        appointment = self.book_appointment(
+            Appointment(patient_id, doctor_id, appointment_time, appointment_type or "Consultation",
+                        duration_minutes))
+        return OperationResult(True, f"Appointment scheduled (ID: {appointment.appointment_id})", appointment)
+    
+    @write_locked
+    def add_doctor(self, name, specialization, max_patients=10, doctor_id=None):
+        """Add a doctor to the staff"""
+        name = str(name).strip()
+        specialization = str(specialization).strip()
+        if len(name) < 2:
+            return OperationResult(False, "Doctor name must be at least 2 characters long!")
+        if len(specialization) < 3:
+            return OperationResult(False, "Specialization must be at least 3 characters long!")
+        try:
+            max_patients = int(max_patients)
+        except (TypeError, ValueError):
+            return OperationResult(False, "Please enter a valid number!")
+        if not 1 <= max_patients <= 50:
+            return OperationResult(False, "Patient capacity must be between 1 and 50!")
+        if doctor_id is None:
+            doctor_id = self._next_id("D", self.doctors)
+        elif doctor_id in self.doctors:
+            return OperationResult(False, f"Doctor ID '{doctor_id}' already exists!")
+        doctor = self.register_doctor(Doctor(doctor_id, name, specialization, max_patients))
+        return OperationResult(True, f"Dr. {name} has been added to the hospital staff!", doctor)
+    
+    @write_locked
+    def add_room(self, room_type, capacity=1, room_number=None):
+        """Add a room to the hospital"""
+        if room_type not in ROOM_TYPES:
+            return OperationResult(False, f"Room type must be one of: {', '.join(ROOM_TYPES)}")
+        try:
+            capacity = int(capacity)
+        except (TypeError, ValueError):
+            return OperationResult(False, "Please enter a valid number!")
+        if not 1 <= capacity <= 10:
+            return OperationResult(False, "Room capacity must be between 1 and 10 beds!")
+        if room_number is None:
+            room_number = self._next_id("R", self.rooms)
+        elif room_number in self.rooms:
+            return OperationResult(False, f"Room {room_number} already exists!")
+        room = self.register_room(Room(room_number, room_type, capacity))
+        return OperationResult(True, f"Room {room.room_number} ({room_type}) has been added to the hospital!", room)
+    
+    def suggest_triage(self, condition):
+        """Triage suggestion (room types, priority, specialization) for a condition"""
+        return self.triage.classify(condition)
+    
+    @write_locked
+    def retriage_patient(self, patient_id, priority):
+        """Change a waiting patient's priority; they keep their arrival order within the new level"""
+        patient = self.patients.get(patient_id)
+        if not patient:
+            return OperationResult(False, f"Patient with ID '{patient_id}' not found in system.")
+        if patient.status != PatientStatus.WAITING:
+            return OperationResult(False, f"Patient {patient.name} is not waiting for admission.", patient)
+        try:
+            priority = int(priority)
+        except (TypeError, ValueError):
+            return OperationResult(False, "Please enter a valid number for priority level!")
+        if not 1 <= priority <= 4:
+            return OperationResult(False, "Priority must be between 1 and 4!")
+        old_priority = patient.priority
+        queue_type = self._retriage(patient, priority)
+        return OperationResult(True, f"Patient {patient.name} re-triaged from {Priority.LABELS[old_priority]} "
+                                     f"to {Priority.LABELS[priority]} ({queue_type} queue)",
+                               patient, queue=queue_type, old_priority=old_priority)
+    
+    @write_locked
+    def admit_batch(self, count=10):
+        """Admit up to `count` waiting patients at once, e.g. at shift change.
+        
+        Patients are taken in queue order, as many as there are free beds and
+        doctor places. Their room types and doctors' specializations are then
+        chosen together, minimising how far each patient falls down their
+        room preference list plus a penalty for a doctor outside the
+        specialization triage asks for, weighted so that higher priorities get
+        their preferred rooms and specialists first. Within the chosen
+        specialization the least-loaded doctor takes the patient. Anyone who
+        cannot be placed goes back to their original place in the queue.
+        """
+        candidates = []
+        while len(candidates) < count and (self.emergency_queue or self.regular_queue):
+            queue = self.emergency_queue if self.emergency_queue else self.regular_queue
+            candidates.append(queue.pop())
+        if not candidates:
+            return OperationResult(False, "No patients are currently waiting for admission.")
+        
+        room_types = [room_type for room_type in ROOM_TYPES if self.room_index.free_beds[room_type] > 0]
+        places = Counter()  # Free doctor places per specialization
+        for doctor in self.doctors.values():
+            places[doctor.specialization] += max(0, doctor.max_patients - len(doctor.current_patients))
+        specializations = [specialization for specialization in places if places[specialization] > 0]
+        doctor_places = sum(places.values())
+        placed_count = min(len(candidates), doctor_places,
+                           sum(self.room_index.free_beds[room_type] for room_type in room_types))
+        placed = candidates[:placed_count]
+        admitted = []
+        try:
+            doctor_costs = []
+            room_costs = []
+            for patient in placed:
+                triage = self.triage.classify(patient.condition)
+                preferences = triage.room_types
+                weight = 2 ** (4 - patient.priority)
+                # Another specialty's doctor counts as badly as the least preferred room
+                doctor_costs.append([0 if triage.specialization in (None, specialization)
+                                     else weight * len(preferences) for specialization in specializations])
+                room_costs.append([weight * (preferences.index(room_type) if room_type in preferences
+                                             else len(preferences)) for room_type in room_types])
+            choices = min_cost_double_assignment(
+                doctor_costs, [places[specialization] for specialization in specializations],
+                room_costs, [self.room_index.free_beds[room_type] for room_type in room_types]) if placed else []
+            
+            for patient, (doctor_choice, room_choice) in zip(placed, choices):
+                room = self.room_index.find_room(room_types[room_choice])
+                doctor = self.doctor_balancer.least_loaded(specializations[doctor_choice])
+                doctor.assign_patient(patient)
+                self._complete_admission(patient, room, doctor)
+                admitted.append((patient, room, doctor))
+        finally:
+            # Everyone not admitted returns to the queues, including after an error
+            for patient in candidates[len(admitted):]:
+                self._requeue(patient)
+        
+        waiting = candidates[len(admitted):]
+        if not admitted:
+            reason = "no_doctor" if doctor_places == 0 else "no_room"
+            return OperationResult(False, "No free beds or doctors for the waiting patients.",
+                                   [], admitted=admitted, requeued=waiting, reason=reason)
+        return OperationResult(True, f"Admitted {len(admitted)} of {len(candidates)} patients",
+                               [patient for patient, _, _ in admitted], admitted=admitted, requeued=waiting)
+    
+    def find_patient(self, patient_id):
+        """The patient with this ID, read from the archive (outside the lock) if it is a closed record"""
+        patient = self._find_loaded_patient(patient_id)
+        if patient is None and self.archive is not None:
+            patient = self.archive.find_patient(patient_id)
+        return patient
+    
+    @read_locked
+    def _find_loaded_patient(self, patient_id):
+        return self.patient_bst.search(record_id_key(patient_id))
+    
+    def search_patients_by_name(self, query, limit=10):
+        """Type-ahead and typo-tolerant name search, topped up with archived name prefix matches"""
+        results = self._search_loaded_patients(query, limit)
+        if len(results) < limit and self.archive is not None:
+            found = {patient.patient_id for patient in results}
+            for patient in self.archive.search_patients(query, limit):
+                if patient.patient_id not in found and len(results) < limit:
+                    results.append(patient)
+        return results
+    
+    @read_locked
+    def _search_loaded_patients(self, query, limit):
+        return self.name_index.search(query, limit)
+    
+    def is_archived(self, patient_id):
+        """True if patient_id belongs to a closed record that was left in storage"""
+        return patient_id in self.archived_ids
     
+    @read_locked
+    def find_patients_in_range(self, low=None, high=None):
+        """Patients with low <= ID <= high, comparing the numbers in IDs numerically"""
+        return list(self.patient_bst.range_scan(low and record_id_key(low), high and record_id_key(high)))
+    
+    @read_locked
+    def appointments_between(self, start=None, end=None, patient_id=None, doctor_id=None, status=None):
+        return list(self.appointment_index.between(start, end, patient_id, doctor_id, status))
+    
+    @read_locked
+    def upcoming_appointments(self, count=10, patient_id=None, doctor_id=None):
+        return self.appointment_index.upcoming(count, self.clock.now(), patient_id, doctor_id)
+    
+    @read_locked
+    def appointment_page(self, cursor=None, limit=20, **filters):
+        """(appointments, next_cursor); pass next_cursor back to continue after the last one"""
+        return self.appointment_index.page(cursor, limit, **filters)
+    
+    @read_locked
+    def record_page(self, kind, offset=0, limit=50, sort_by=None, descending=False, text=None, names=False,
+                    **filters):
+        """One window of a sorted, filtered record list for grid views, as (records, total).
+        
+        kind is 'patients', 'doctors', 'rooms' or 'appointments'; filters match
+        attributes exactly (e.g. status="Admitted") and text matches IDs, names
+        and descriptions case-insensitively. With names=True the result is
+        (records, total, names), names mapping the patient and doctor IDs the
+        records refer to onto their names, read under the same lock.
+        """
+        records, total = self.record_views.page(kind, offset, limit, sort_by, descending, text, **filters)
+        if not names:
+            return records, total
+        names = {}
+        for record in records:
+            for attribute, table in (('patient_id', self.patients), ('doctor_id', self.doctors),
+                                     ('assigned_doctor', self.doctors)):
+                record_id = getattr(record, attribute, None)
+                if record_id in table:
+                    names[record_id] = table[record_id].name
+        return records, total, names
+    
+    @read_locked
+    def doctor_specializations(self):
+        return sorted({doctor.specialization for doctor in self.doctors.values()})
+    
+    @read_locked
+    def appointment_conflicts(self, start=None, end=None, doctor_id=None):
+        """Double-booked appointment pairs overlapping [start, end), for one doctor or all"""
+        doctors = [self.doctors[doctor_id]] if doctor_id else self.doctors.values()
+        return [pair for doctor in doctors for pair in doctor.schedule.conflicts(start, end)]
+    
+    @read_locked
+    def admitted_patients(self):
+        return [p for p in self.patients.values() if p.status == PatientStatus.ADMITTED]
+    
+    @write_locked
+    def undo_last(self):
+        """Undo the most recent operation still in the history"""
+        command = self.history.pop()
+        if command is None:
+            return OperationResult(False, "No recent operations available to undo.")
+        with self.history.paused():
+            result, redo = self._undo(command)
+        if result:
+            self.history.push_redo(redo)
+        else:
+            self.history.restore(command)
+        return result
+    
+    @write_locked
+    def redo_last(self):
+        """Re-apply the most recently undone operation"""
+        command = self.history.pop_redo()
+        if command is None:
+            return OperationResult(False, "Nothing to redo.")
+        with self.history.paused():
+            result, undo = self._redo(command)
+        if result:
+            self.history.restore(undo)
+        else:
+            self.history.push_redo(command)
+        return result
+    
+    def _undo(self, command):
+        """Apply the inverse of one history command: (OperationResult, command that redoes it)"""
+        operation, key = command[0], command[1]
+        if operation == 'register':
+            patient = self._unregister_patient(key)
+            return (OperationResult(True, f"Undid registration of patient {patient.name} (ID: {key})",
+                                    patient, operation=operation), ('register', patient, patient.arrival_seq))
+        if operation == 'admit':
+            patient = self.patients[key]
+            self._unadmit(patient)
+            queue_type = self._queue_for(patient)[1]
+            return (OperationResult(True, f"Undid admission of {patient.name}; back in the {queue_type} queue",
+                                    patient, operation=operation), command)
+        if operation == 'discharge':
+            patient, room, doctor = self.patients[key], self.rooms.get(command[2]), self.doctors.get(command[3])
+            if room is None or doctor is None or not self._readmit(patient, room, doctor):
+                return (OperationResult(False, f"Cannot undo discharge of {patient.name}: "
+                                               f"room {command[2]} or doctor {command[3]} is no longer free",
+                                        patient, operation=operation, reason="no_capacity"), None)
+            return (OperationResult(True, f"Undid discharge of {patient.name}; back in room {room.room_number}",
+                                    patient, operation=operation), command)
+        if operation == 'appointment':
+            appointment = self._remove_appointment(key)
+            return (OperationResult(True, f"Undid appointment {key}", appointment, operation=operation),
+                    ('appointment', appointment))
+        if operation == 'add_doctor':
+            doctor = self.doctors[key]
+            if doctor.current_patients or len(doctor.schedule):
+                return (OperationResult(False, f"Cannot remove {doctor.name}: they still have patients or "
+                                               "appointments", doctor, operation=operation, reason="in_use"), None)
+            self._remove_doctor(key)
+            return (OperationResult(True, f"Undid adding {doctor.name} ({key})", doctor, operation=operation),
+                    ('add_doctor', doctor))
+        if operation == 'add_room':
+            room = self.rooms[key]
+            if room.occupied_beds:
+                return (OperationResult(False, f"Cannot remove room {key}: it is occupied", room,
+                                        operation=operation, reason="in_use"), None)
+            self._remove_room(key)
+            return (OperationResult(True, f"Undid adding room {key}", room, operation=operation),
+                    ('add_room', room))
+        if operation == 'retriage':
+            patient = self.patients[key]
+            self._retriage(patient, command[2])
+            return (OperationResult(True, f"Undid re-triage of {patient.name}; priority is "
+                                          f"{Priority.LABELS.get(command[2], command[2])} again",
+                                    patient, operation=operation), command)
+        raise ValueError(f"Unknown history command: {operation}")
+    
+    def _redo(self, command):
+        """Re-apply an undone command: (OperationResult, command that undoes it again)"""
+        operation, target = command[0], command[1]
+        if operation == 'register':
+            self.enqueue_patient(target, command[2])  # Back in their original place in the queue
+            return (OperationResult(True, f"Redid registration of patient {target.name} (ID: {target.patient_id})",
+                                    target, operation=operation), ('register', target.patient_id))
+        if operation == 'admit':
+            patient, room, doctor = self.patients[target], self.rooms.get(command[2]), self.doctors.get(command[3])
+            if (room is None or doctor is None or not room.is_available
+                    or len(doctor.current_patients) >= doctor.max_patients):
+                return (OperationResult(False, f"Cannot redo admission of {patient.name}: room {command[2]} or "
+                                               f"doctor {command[3]} is no longer free", patient,
+                                        operation=operation, reason="no_capacity"), None)
+            self._remove_from_queues(target)
+            doctor.assign_patient(patient)
+            self._complete_admission(patient, room, doctor)
+            return (OperationResult(True, f"Redid admission of {patient.name} to room {room.room_number}",
+                                    patient, operation=operation), command)
+        if operation == 'discharge':
+            patient = self.patients[target]
+            self.release_patient(patient)
+            return (OperationResult(True, f"Redid discharge of {patient.name}", patient, operation=operation),
+                    command)
+        if operation == 'appointment':
+            self.book_appointment(target)
+            return (OperationResult(True, f"Redid appointment {target.appointment_id}", target,
+                                    operation=operation), ('appointment', target.appointment_id))
+        if operation == 'add_doctor':
+            self.register_doctor(target)
+            return (OperationResult(True, f"Redid adding {target.name} ({target.doctor_id})", target,
+                                    operation=operation), ('add_doctor', target.doctor_id))
+        if operation == 'add_room':
+            self.register_room(target)
+            return (OperationResult(True, f"Redid adding room {target.room_number}", target,
+                                    operation=operation), ('add_room', target.room_number))
+        if operation == 'retriage':
+            patient = self.patients[target]
+            self._retriage(patient, command[3])
+            return (OperationResult(True, f"Redid re-triage of {patient.name}", patient, operation=operation),
+                    command)
+        raise ValueError(f"Unknown history command: {operation}")
+    
+    # ---------- Interactive console front end ----------
     def get_user_input_for_patient(self):
         """Get patient information from user"""
         print("\n========== New Patient Registration ==========")
         
         # Generate patient ID
-        patient_count = len(self.patients) + 1
-        patient_id = f"P{patient_count:03d}"
+        patient_id = self._next_id("P", self.patients)
         
         # Get patient details
         print(f"Generated Patient ID: {patient_id}")
@@ -274,9 +2187,15 @@ class HospitalManagementSystem:
         print("3. Medium      - Standard care needed today (routine illness)")
         print("4. Low         - Minor issues (check-ups, minor complaints)")
         
+        suggestion = self.suggest_triage(condition)
+        suggested = suggestion.priority or Priority.MEDIUM
+        if suggestion.matched:
+            print(f"\nSuggested from condition: {Priority.LABELS[suggested]} ({suggested})"
+                  + (f", {suggestion.specialization}" if suggestion.specialization else ""))
+        
         while True:
             try:
-                priority = int(input("\nSelect priority level (1-4): "))
+                priority = int(input(f"\nSelect priority level (1-4, press Enter for {suggested}): ") or suggested)
                 if 1 <= priority <= 4:
                     break
                 else:
@@ -290,19 +2209,18 @@ class HospitalManagementSystem:
         """Register a new patient with user input"""
         patient_id, name, age, condition, priority = self.get_user_input_for_patient()
         
-        patient = Patient(patient_id, name, age, condition, priority)
-        self.patients[patient_id] = patient
-        self.patient_bst.insert(patient)
-        if priority <= 2:  
-            heapq.heappush(self.emergency_queue, patient)
+        result = self.register_patient(name, age, condition, priority, patient_id=patient_id)
+        if not result:
+            print(f"Error: {result.message}")
+            return None
+        patient = result.data
+        if result.details['queue'] == "Emergency":
             print(f"\nPatient added to EMERGENCY QUEUE due to {('Critical' if priority == 1 else 'High')} priority")
         else:
-            self.regular_queue.append(patient)
             print(f"\nPatient added to REGULAR QUEUE")
-        self.operation_history.append(('register', patient_id))
         
         print(f"\nSUCCESS: Patient {name} has been registered successfully!")
-        print(f"Patient ID: {patient_id}")
+        print(f"Patient ID: {patient.patient_id}")
         patient.display_info()
         return patient
     
@@ -311,8 +2229,7 @@ class HospitalManagementSystem:
         print("\n========== Add New Doctor to Staff ==========")
         
         # Generate doctor ID
-        doctor_count = len(self.doctors) + 1
-        doctor_id = f"D{doctor_count:03d}"
+        doctor_id = self._next_id("D", self.doctors)
         print(f"Generated Doctor ID: {doctor_id}")
         
         while True:
@@ -350,10 +2267,13 @@ class HospitalManagementSystem:
             except ValueError:
                 print("Error: Please enter a valid number!")
         
-        doctor = Doctor(doctor_id, name, specialization, max_patients)
-        self.doctors[doctor_id] = doctor
+        result = self.add_doctor(name, specialization, max_patients, doctor_id=doctor_id)
+        if not result:
+            print(f"Error: {result.message}")
+            return None
+        doctor = result.data
         
-        print(f"\nSUCCESS: Dr. {name} has been added to the hospital staff!")
+        print(f"\nSUCCESS: {result.message}")
         doctor.display_info()
         return doctor
     
@@ -362,8 +2282,7 @@ class HospitalManagementSystem:
         print("\n========== Add New Room to Hospital ==========")
         
         # Generate room number
-        room_count = len(self.rooms) + 1
-        room_number = f"R{room_count:03d}"
+        room_number = self._next_id("R", self.rooms)
         print(f"Generated Room Number: {room_number}")
         
         print("\nAvailable Room Types:")
@@ -372,7 +2291,7 @@ class HospitalManagementSystem:
         print("3. Private Room - For patients preferring privacy")
         print("4. Emergency Room - For emergency treatments")
         
-        room_types = ["ICU", "General", "Private", "Emergency"]
+        room_types = ROOM_TYPES
         while True:
             try:
                 choice = int(input("\nSelect room type (1-4): "))
@@ -399,10 +2318,13 @@ class HospitalManagementSystem:
             except ValueError:
                 print("Error: Please enter a valid number!")
         
-        room = Room(room_number, room_type, capacity)
-        self.rooms[room_number] = room
+        result = self.add_room(room_type, capacity, room_number=room_number)
+        if not result:
+            print(f"Error: {result.message}")
+            return None
+        room = result.data
         
-        print(f"\nSUCCESS: Room {room_number} ({room_type}) has been added to the hospital!")
+        print(f"\nSUCCESS: {result.message}")
         room.display_info()
         return room
     
@@ -410,84 +2332,75 @@ class HospitalManagementSystem:
         """Admit next patient using priority queue logic"""
         print("\n========== Processing Next Patient Admission ==========")
         
-        patient = None
-        queue_type = ""
-        
-        # Check emergency queue first (priority queue)
-        if self.emergency_queue:
-            patient = heapq.heappop(self.emergency_queue)
-            queue_type = "Emergency"
-        # Then check regular queue (FIFO)
-        elif self.regular_queue:
-            patient = self.regular_queue.popleft()
-            queue_type = "Regular"
-        
+        result = self.admit_patient()
+        patient = result.data
         if not patient:
-            print("No patients are currently waiting for admission.")
+            print(result.message)
             return None
         
-        print(f"Processing patient from {queue_type} queue: {patient.name}")
+        print(f"Processing patient from {result.details['queue']} queue: {patient.name}")
         
-        # Find available room
-        available_room = self._find_available_room(patient.condition)
-        if not available_room:
-            print(f"\nERROR: No available rooms suitable for patient {patient.name}")
+        if not result:
+            print(f"\nERROR: {result.message}")
+            if result.details['reason'] == "no_doctor":
+                print("All doctors are currently at maximum capacity.")
             print("Patient will be returned to the queue.")
-            # Put patient back in queue
-            if patient.priority <= 2:
-                heapq.heappush(self.emergency_queue, patient)
-            else:
-                self.regular_queue.appendleft(patient)
             return None
         
-        # Assign doctor using load balancing
-        assigned_doctor = self._assign_doctor(patient)
-        if not assigned_doctor:
-            print(f"\nERROR: No available doctor for patient {patient.name}")
-            print("All doctors are currently at maximum capacity.")
-            return None
-        
-        # Admit patient
-        available_room.admit_patient(patient.patient_id)
-        patient.room_number = available_room.room_number
-        patient.status = "Admitted"
-        
+        room = result.details['room']
+        doctor = result.details['doctor']
         print(f"\nSUCCESS: Patient admission completed!")
         print(f"Patient Name: {patient.name}")
-        print(f"Assigned Room: {available_room.room_number} ({available_room.room_type})")
-        print(f"Assigned Doctor: {assigned_doctor.name} ({assigned_doctor.specialization})")
-        print(f"Admission Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Assigned Room: {room.room_number} ({room.room_type})")
+        print(f"Assigned Doctor: {doctor.name} ({doctor.specialization})")
+        print(f"Admission Time: {self.clock.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
         return patient
     
+    def admit_batch_interactive(self):
+        """Admit several waiting patients in one pass"""
+        print("\n========== Batch Admission ==========")
+        try:
+            count = int(input("How many waiting patients to admit? (press Enter for 10): ").strip() or 10)
+        except ValueError:
+            print("Error: Please enter a valid number!")
+            return None
+        
+        result = self.admit_batch(count)
+        if not result.details.get('admitted'):
+            print(result.message)
+            return None
+        
+        for patient, room, doctor in result.details['admitted']:
+            print(f"  {patient.patient_id} {patient.name}: Room {room.room_number} ({room.room_type}), {doctor.name}")
+        print(f"\nSUCCESS: {result.message}")
+        if result.details['requeued']:
+            print(f"{len(result.details['requeued'])} patients returned to the queue (no free bed or doctor).")
+        return result.data
+    
+    def _room_preferences(self, condition):
+        """Room types in order of preference for a patient's condition (see triage_rules.json)"""
+        return self.triage.classify(condition).room_types
+    
     def _find_available_room(self, condition):
-        """Find available room based on patient condition using linear search"""
-        # Priority: ICU for critical, then General, then Private
-        room_priority = ["ICU", "Emergency", "General", "Private"]
-        
-        # Adjust priority based on condition keywords
-        condition_lower = condition.lower()
-        if any(keyword in condition_lower for keyword in ["critical", "emergency", "heart attack", "stroke", "trauma"]):
-            room_priority = ["ICU", "Emergency", "General", "Private"]
-        elif any(keyword in condition_lower for keyword in ["surgery", "operation", "serious"]):
-            room_priority = ["ICU", "General", "Private", "Emergency"]
-        
-        for room_type in room_priority:
-            for room in self.rooms.values():
-                if room.room_type == room_type and room.is_available:
-                    return room
+        """Find available room based on patient condition using the free-bed index"""
+        for room_type in self._room_preferences(condition):
+            room = self.room_index.find_room(room_type)
+            if room:
+                return room
         return None
     
-    def _assign_doctor(self, patient):
+    def _assign_doctor(self, patient, specialization=None):
         """Assign doctor using load balancing algorithm"""
-        available_doctors = [doc for doc in self.doctors.values() 
-                           if len(doc.current_patients) < doc.max_patients]
-        
-        if not available_doctors:
+        # Least-loaded doctor of the requested specialization, else any doctor
+        best_doctor = None
+        if specialization:
+            best_doctor = self.doctor_balancer.least_loaded(specialization)
+        if not best_doctor:
+            best_doctor = self.doctor_balancer.least_loaded()
+        if not best_doctor:
             return None
         
-        # Find doctor with minimum current patients (load balancing)
-        best_doctor = min(available_doctors, key=lambda doc: len(doc.current_patients))
         best_doctor.assign_patient(patient)
         
         return best_doctor
@@ -496,20 +2409,43 @@ class HospitalManagementSystem:
         """Search for a patient with user input"""
         print("\n========== Patient Search System ==========")
         
-        if not self.patients:
+        if not self.patients and self.archive is None:
             print("No patients are currently registered in the system.")
             return None
         
-        patient_id = input("Enter Patient ID to search for: ").strip().upper()
+        query = input("Enter Patient ID, an ID range such as P001-P010, or a name: ").strip()
+        patient_id = query.upper()
         
         if not patient_id:
             print("Error: Patient ID cannot be empty!")
             return None
         
+        # Anything that is neither a known ID nor shaped like an ID or ID range is a name
+        if patient_id not in self.patients and not re.fullmatch(r"P\d+|P?\d*\s*-\s*P?\d*", patient_id):
+            matches = self.search_patients_by_name(query)
+            if not matches:
+                print(f"\nNo patients found with a name like '{query}'.")
+                return None
+            print(f"\nPatients matching '{query}':")
+            for patient in matches:
+                print(f"  {patient.patient_id}: {patient.name} (Status: {patient.status})")
+            return matches
+        
+        if "-" in patient_id:
+            low, high = (part.strip() for part in patient_id.split("-", 1))
+            matches = self.find_patients_in_range(low or None, high or None)
+            if not matches:
+                print(f"\nNo patients found with IDs between {low or 'start'} and {high or 'end'}.")
+                return None
+            print(f"\nFound {len(matches)} patient(s) in range:")
+            for patient in matches:
+                print(f"  {patient.patient_id}: {patient.name} (Status: {patient.status})")
+            return matches
+        
         print(f"Searching for patient with ID: {patient_id}...")
         
-        # Search using BST
-        patient = self.patient_bst.search(patient_id)
+        # Search using the patient index
+        patient = self.find_patient(patient_id)
         
         if patient:
             print(f"\nPatient found in hospital database!")
@@ -519,7 +2455,7 @@ class HospitalManagementSystem:
             if patient.medical_history:
                 print(f"\n--- Medical History ---")
                 for i, record in enumerate(patient.medical_history, 1):
-                    print(f"{i}. {record['record']} (Date: {record['timestamp'].strftime('%Y-%m-%d %H:%M')})")
+                    print(f"{i}. {record.record} (Date: {record.timestamp.strftime('%Y-%m-%d %H:%M')})")
             else:
                 print("\nNo medical history recorded yet.")
         else:
@@ -532,13 +2468,13 @@ class HospitalManagementSystem:
         """Discharge patient with user input"""
         print("\n========== Patient Discharge System ==========")
         
-        if not any(p.status == "Admitted" for p in self.patients.values()):
+        admitted_patients = self.admitted_patients()
+        if not admitted_patients:
             print("No patients are currently admitted in the hospital.")
             return False
         
         # Show admitted patients
         print("\nCurrently Admitted Patients:")
-        admitted_patients = [p for p in self.patients.values() if p.status == "Admitted"]
         for i, patient in enumerate(admitted_patients, 1):
             print(f"{i}. {patient.patient_id}: {patient.name} (Room: {patient.room_number})")
         
@@ -553,7 +2489,7 @@ class HospitalManagementSystem:
             print(f"Error: Patient with ID '{patient_id}' not found in system.")
             return False
         
-        if patient.status != "Admitted":
+        if patient.status != PatientStatus.ADMITTED:
             print(f"Error: Patient {patient.name} is not currently admitted.")
             print(f"Current status: {patient.status}")
             return False
@@ -569,31 +2505,18 @@ class HospitalManagementSystem:
             print("Discharge operation cancelled.")
             return False
         
-        # Free up room
-        if patient.room_number:
-            room = self.rooms.get(patient.room_number)
-            if room:
-                room.discharge_patient(patient_id)
-        
-        # Free up doctor
-        if patient.assigned_doctor:
-            doctor = self.doctors.get(patient.assigned_doctor)
-            if doctor:
-                doctor.discharge_patient(patient_id)
-        
-        patient.status = "Discharged"
-        old_room = patient.room_number
-        old_doctor = patient.assigned_doctor
-        patient.room_number = None
-        patient.assigned_doctor = None
-        
-        # Record operation for undo functionality
-        self.operation_history.append(('discharge', patient_id))
+        result = self.discharge_patient(patient_id)
+        if not result:
+            print(f"Error: {result.message}")
+            return False
+        old_room = result.details['room_number']
+        old_doctor = result.details['doctor_id']
         
-        print(f"\nSUCCESS: Patient {patient.name} has been discharged successfully!")
+        print(f"\nSUCCESS: {result.message}")
         print(f"Room {old_room} is now available for new patients.")
-        print(f"Dr. {self.doctors[old_doctor].name} now has additional capacity.")
-        print(f"Discharge Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        if old_doctor in self.doctors:
+            print(f"Dr. {self.doctors[old_doctor].name} now has additional capacity.")
+        print(f"Discharge Time: {self.clock.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
         return True
     
@@ -649,11 +2572,11 @@ class HospitalManagementSystem:
                 datetime_str = f"{date_str} {time_str}"
                 appointment_time = datetime.strptime(datetime_str, "%Y-%m-%d %H:%M")
                 
-                if appointment_time < datetime.now():
+                if appointment_time < self.clock.now():
                     print("Error: Cannot schedule appointment in the past!")
                     continue
                 
-                if appointment_time < datetime.now() + timedelta(hours=1):
+                if appointment_time < self.clock.now() + timedelta(hours=1):
                     print("Error: Appointment must be scheduled at least 1 hour in advance!")
                     continue
                 
@@ -673,21 +2596,41 @@ class HospitalManagementSystem:
         if not appointment_type:
             appointment_type = "Consultation"
         
-        appointment = Appointment(patient_id, doctor_id, appointment_time, appointment_type)
-        self.appointments[appointment.appointment_id] = appointment
+        duration = input(f"Enter duration in minutes (press Enter for {Appointment.DEFAULT_DURATION}): ").strip()
         
-        # Add to doctor's schedule
-        doctor = self.doctors[doctor_id]
-        date_str = appointment_time.strftime("%Y-%m-%d")
-        if date_str not in doctor.schedule:
-            doctor.schedule[date_str] = []
-        doctor.schedule[date_str].append(appointment.appointment_id)
+        result = self.schedule_appointment(patient_id, doctor_id, appointment_time, appointment_type,
+                                           duration or Appointment.DEFAULT_DURATION)
+        if not result:
+            print(f"Error: {result.message}")
+            return None
+        appointment = result.data
         
         print(f"\nSUCCESS: Appointment has been scheduled successfully!")
         appointment.display_info()
         
         return appointment
     
+    def retriage_patient_interactive(self):
+        """Change the priority of a patient who is still waiting"""
+        print("\n========== Re-triage Waiting Patient ==========")
+        waiting = self.emergency_queue.in_order() + self.regular_queue.in_order()
+        if not waiting:
+            print("No patients are currently waiting for admission.")
+            return None
+        
+        for patient in waiting:
+            print(f"{patient.patient_id}: {patient.name} - {Priority.LABELS.get(patient.priority, 'Unknown')} "
+                  f"({patient.condition})")
+        
+        patient_id = input("\nEnter Patient ID to re-triage: ").strip().upper()
+        priority = input("New priority (1=Critical, 2=High, 3=Medium, 4=Low): ").strip()
+        result = self.retriage_patient(patient_id, priority)
+        if not result:
+            print(f"Error: {result.message}")
+            return None
+        print(f"\nSUCCESS: {result.message}")
+        return result.data
+    
     def get_patient_queue_status(self):
         """Get current queue status"""
         emergency_count = len(self.emergency_queue)
@@ -700,7 +2643,7 @@ class HospitalManagementSystem:
         print(f"Total Patients Waiting: {total_waiting}")
         
         if self.emergency_queue:
-            next_emergency = self.emergency_queue[0]
+            next_emergency = self.emergency_queue.peek()
             priority_text = "Critical" if next_emergency.priority == 1 else "High"
             print(f"\nNext Emergency Patient: {next_emergency.name}")
             print(f"  - Priority Level: {priority_text}")
@@ -708,7 +2651,7 @@ class HospitalManagementSystem:
             print(f"  - Waiting Since: {next_emergency.admission_time.strftime('%H:%M:%S')}")
         
         if self.regular_queue:
-            next_regular = self.regular_queue[0]
+            next_regular = self.regular_queue.peek()
             print(f"\nNext Regular Patient: {next_regular.name}")
             print(f"  - Condition: {next_regular.condition}")
             print(f"  - Waiting Since: {next_regular.admission_time.strftime('%H:%M:%S')}")
@@ -718,22 +2661,45 @@ class HospitalManagementSystem:
         else:
             print(f"\nNote: Emergency patients are given priority over regular patients.")
     
+    @read_locked
+    def get_statistics(self):
+        """Current dashboard figures, read from live counters in O(1)"""
+        total_rooms = len(self.rooms)
+        occupied_rooms = total_rooms - self.room_index.available_count
+        total_doctors = len(self.doctors)
+        busy_doctors = self.doctor_balancer.busy_doctors
+        return {
+            'total_patients': sum(self.stats.patients_by_status.values()),
+            'admitted_patients': self.stats.patients_by_status[PatientStatus.ADMITTED],
+            'discharged_patients': self.stats.patients_by_status[PatientStatus.DISCHARGED],
+            'waiting_patients': len(self.emergency_queue) + len(self.regular_queue),
+            'total_rooms': total_rooms,
+            'occupied_rooms': occupied_rooms,
+            'available_rooms': total_rooms - occupied_rooms,
+            'total_doctors': total_doctors,
+            'busy_doctors': busy_doctors,
+            'available_doctors': total_doctors - busy_doctors,
+            'total_appointments': sum(self.stats.appointments_by_status.values()),
+            'scheduled_appointments': self.stats.appointments_by_status[AppointmentStatus.SCHEDULED],
+        }
+    
     def get_hospital_statistics(self):
-        """Generate hospital statistics using various data structures"""
-        total_patients = len(self.patients)
-        admitted_patients = sum(1 for p in self.patients.values() if p.status == "Admitted")
-        discharged_patients = sum(1 for p in self.patients.values() if p.status == "Discharged")
-        waiting_patients = len(self.emergency_queue) + len(self.regular_queue)
+        """Display the hospital statistics dashboard"""
+        stats = self.get_statistics()
+        total_patients = stats['total_patients']
+        admitted_patients = stats['admitted_patients']
+        discharged_patients = stats['discharged_patients']
+        waiting_patients = stats['waiting_patients']
         
-        total_rooms = len(self.rooms)
-        occupied_rooms = sum(1 for r in self.rooms.values() if not r.is_available)
-        available_rooms = total_rooms - occupied_rooms
+        total_rooms = stats['total_rooms']
+        occupied_rooms = stats['occupied_rooms']
+        available_rooms = stats['available_rooms']
         
-        total_doctors = len(self.doctors)
-        busy_doctors = sum(1 for d in self.doctors.values() if d.current_patients)
-        available_doctors = total_doctors - busy_doctors
+        total_doctors = stats['total_doctors']
+        busy_doctors = stats['busy_doctors']
+        available_doctors = stats['available_doctors']
         
-        scheduled_appointments = len([a for a in self.appointments.values() if a.status == "Scheduled"])
+        scheduled_appointments = stats['scheduled_appointments']
         
         print(f"\n========== Hospital Statistics Dashboard ==========")
         print(f"\nPatient Statistics:")
@@ -753,7 +2719,7 @@ class HospitalManagementSystem:
         print(f"  Doctors Available for New Patients: {available_doctors}")
         
         print(f"\nAppointment Statistics:")
-        print(f"  Total Appointments Scheduled: {len(self.appointments)}")
+        print(f"  Total Appointments Scheduled: {stats['total_appointments']}")
         print(f"  Upcoming Appointments: {scheduled_appointments}")
         
         # Calculate occupancy rates
@@ -783,14 +2749,13 @@ class HospitalManagementSystem:
             print(f"   Medical Condition: {patient.condition}")
             print(f"   Current Status: {patient.status}")
             
-            if patient.status == "Admitted":
+            if patient.status == PatientStatus.ADMITTED:
                 print(f"   Assigned Room: {patient.room_number}")
                 if patient.assigned_doctor and patient.assigned_doctor in self.doctors:
                     doctor = self.doctors[patient.assigned_doctor]
                     print(f"   Attending Doctor: Dr. {doctor.name} ({doctor.specialization})")
             
-            priority_text = {1: 'Critical', 2: 'High', 3: 'Medium', 4: 'Low'}
-            print(f"   Priority Level: {priority_text.get(patient.priority, 'Unknown')}")
+            print(f"   Priority Level: {Priority.LABELS.get(patient.priority, 'Unknown')}")
             print(f"   Registration Date: {patient.admission_time.strftime('%Y-%m-%d %H:%M')}")
     
     def view_all_doctors(self):
@@ -814,7 +2779,7 @@ class HospitalManagementSystem:
                 print(f"   Status: Fully booked")
             
             if doctor.current_patients:
-                print(f"   Currently treating patients: {', '.join(doctor.current_patients)}")
+                print(f"   Currently treating patients: {', '.join(sorted(doctor.current_patients, key=record_id_key))}")
     
     def view_all_rooms(self):
         """View all rooms"""
@@ -833,7 +2798,7 @@ class HospitalManagementSystem:
         
         for room_type, rooms in room_types.items():
             print(f"\n--- {room_type} Rooms ---")
-            for room in sorted(rooms, key=lambda x: x.room_number):
+            for room in sorted(rooms, key=lambda r: record_id_key(r.room_number)):
                 print(f"  Room {room.room_number}:")
                 print(f"    Capacity: {room.capacity} bed(s)")
                 print(f"    Currently Occupied: {room.occupied_beds} bed(s)")
@@ -842,7 +2807,7 @@ class HospitalManagementSystem:
                 print(f"    Status: {status}")
                 
                 if room.patients:
-                    print(f"    Current Patients: {', '.join(room.patients)}")
+                    print(f"    Current Patients: {', '.join(sorted(room.patients, key=record_id_key))}")
     
     def view_all_appointments(self):
         """View all appointments"""
@@ -852,13 +2817,8 @@ class HospitalManagementSystem:
         
         print(f"\n========== Appointment Schedule ({len(self.appointments)} total) ==========")
         
-        # Sort appointments by date and time
-        sorted_appointments = sorted(
-            self.appointments.values(), 
-            key=lambda x: x.appointment_time
-        )
-        
-        for i, appointment in enumerate(sorted_appointments, 1):
+        # The appointment index is already in date and time order
+        for i, appointment in enumerate(self.appointment_index.between(), 1):
             print(f"\n{i}. Appointment ID: {appointment.appointment_id}")
             
             # Get patient and doctor names
@@ -871,45 +2831,27 @@ class HospitalManagementSystem:
             print(f"   Patient: {patient_name} (ID: {appointment.patient_id})")
             print(f"   Doctor: {doctor_name} (ID: {appointment.doctor_id})")
             print(f"   Date: {appointment.appointment_time.strftime('%A, %B %d, %Y')}")
-            print(f"   Time: {appointment.appointment_time.strftime('%I:%M %p')}")
+            print(f"   Time: {appointment.appointment_time.strftime('%I:%M %p')} - {appointment.end_time.strftime('%I:%M %p')}")
             print(f"   Type: {appointment.appointment_type}")
             print(f"   Status: {appointment.status}")
     
     def undo_last_operation(self):
-        """Undo last operation using stack"""
-        if not self.operation_history:
-            print("No recent operations available to undo.")
+        """Undo the most recent operation"""
+        result = self.undo_last()
+        if not result:
+            print(f"ERROR: {result.message}")
             return False
-        
-        operation, patient_id = self.operation_history.pop()
-        
-        if operation == 'register':
-            # Remove patient from all data structures
-            if patient_id in self.patients:
-                patient_name = self.patients[patient_id].name
-                
-                # Remove from queues if still waiting
-                # This is a simplified approach - in a real system you'd need more sophisticated queue management
-                self.emergency_queue = [p for p in self.emergency_queue if p.patient_id != patient_id]
-                heapq.heapify(self.emergency_queue)  # Restore heap property
-                
-                # Remove from regular queue
-                new_regular_queue = deque()
-                for p in self.regular_queue:
-                    if p.patient_id != patient_id:
-                        new_regular_queue.append(p)
-                self.regular_queue = new_regular_queue
-                
-                # Remove from patients dictionary
-                del self.patients[patient_id]
-                
-                print(f"SUCCESS: Undid registration of patient {patient_name} (ID: {patient_id})")
-                print("Patient has been removed from all hospital records and queues.")
-                
-        elif operation == 'discharge':
-            print(f"INFO: Discharge operation for patient {patient_id} has been noted.")
-            print("Note: Full undo of discharge would require complex state restoration.")
-        
+        print(f"SUCCESS: {result.message}")
+        print(f"Operations left to undo: {len(self.history)} | Redo available: {self.history.redo_depth}")
+        return True
+    
+    def redo_last_operation(self):
+        """Redo the most recently undone operation"""
+        result = self.redo_last()
+        if not result:
+            print(f"ERROR: {result.message}")
+            return False
+        print(f"SUCCESS: {result.message}")
         return True
 
 def display_menu():
@@ -923,6 +2865,8 @@ def display_menu():
     print("  3.  Search for Patient")
     print("  4.  Discharge Patient")
     print("  5.  Schedule Patient Appointment")
+    print("  16. Re-triage Waiting Patient")
+    print("  17. Admit Batch of Waiting Patients")
     print("")
     print("INFORMATION & REPORTS:")
     print("  6.  View Patient Queue Status")
@@ -936,25 +2880,59 @@ def display_menu():
     print("  12. Add New Doctor to Staff")
     print("  13. Add New Room to Hospital")
     print("  14. Undo Last Operation")
+    print("  18. Redo Last Undone Operation")
     print("  15. Exit System")
     print("="*65)
 
-def main():
+def open_storage(data_dir=None, db=None):
+    """Build the storage engine selected on the command line, or None for in-memory only"""
+    if data_dir:
+        from persistence import WriteAheadStorage
+        return WriteAheadStorage(data_dir)
+    if db:
+        from sqlite_store import SQLiteStorage
+        return SQLiteStorage(db)
+    return None
+
+def main(argv=None):
     """Main function with interactive menu"""
+    parser = argparse.ArgumentParser(description="Hospital Management System")
+    storage_group = parser.add_mutually_exclusive_group()
+    storage_group.add_argument("--data-dir",
+                               help="keep hospital state in this directory (write-ahead log and snapshots); "
+                                    "without a storage option all state is lost on exit")
+    storage_group.add_argument("--db", help="keep hospital state in this SQLite database")
+    parser.add_argument("--metrics-file", help="write operation metrics in Prometheus text format to this file "
+                                               "after every action")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    args = parser.parse_args(argv)
+    
     print("="*65)
     print("    WELCOME TO THE HOSPITAL MANAGEMENT SYSTEM")
     print("="*65)
     print("Initializing system, please wait...")
     
+    hms = None
     try:
-        hms = HospitalManagementSystem()
+        hms = HospitalManagementSystem(storage=open_storage(args.data_dir, args.db))
+        if hms.restored:
+            print("Hospital state restored from storage.")
+            print(f"Available: {len(hms.doctors)} doctors, {len(hms.rooms)} rooms, {len(hms.patients)} patients")
+        else:
+            print("Hospital system initialized with default staff and facilities.")
+            print(f"Available: {len(hms.doctors)} doctors, {len(hms.rooms)} rooms")
+        if args.metrics_file or args.metrics_port:
+            hms.metrics.enable()
+        if args.metrics_port:
+            hms.metrics.serve(args.metrics_port)
+            print(f"Serving metrics on http://127.0.0.1:{args.metrics_port}/metrics")
         print("System initialization completed successfully!")
         
         while True:
             display_menu()
             
             try:
-                choice = input("\nPlease enter your choice (1-15): ").strip()
+                choice = input("\nPlease enter your choice (1-18): ").strip()
                 
                 if choice == '1':
                     hms.register_patient_interactive()
@@ -998,6 +2976,15 @@ def main():
                 elif choice == '14':
                     hms.undo_last_operation()
                 
+                elif choice == '16':
+                    hms.retriage_patient_interactive()
+                
+                elif choice == '17':
+                    hms.admit_batch_interactive()
+                
+                elif choice == '18':
+                    hms.redo_last_operation()
+                
                 elif choice == '15':
                     print("\n" + "="*50)
                     print("Thank you for using Hospital Management System!")
@@ -1007,7 +2994,7 @@ def main():
                     break
                 
                 else:
-                    print("ERROR: Invalid choice! Please select a number between 1 and 15.")
+                    print("ERROR: Invalid choice! Please select a number between 1 and 18.")
             
             except KeyboardInterrupt:
                 print("\n\nSystem interrupted by user.")
@@ -1017,12 +3004,18 @@ def main():
                 print(f"ERROR: An unexpected error occurred: {str(e)}")
                 print("Please try again or contact system administrator.")
             
+            if args.metrics_file:
+                hms.metrics.write(args.metrics_file)
+            
             # Wait for user to continue
             input("\nPress Enter to continue to main menu...")
     
     except Exception as e:
         print(f"CRITICAL ERROR: Failed to initialize system: {str(e)}")
         print("Please contact system administrator.")
+    finally:
+        if hms is not None:
+            hms.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,267 @@
+"""Operation latency metrics for the hospital, exported in Prometheus text format.
+
+Every HospitalManagementSystem owns a HospitalMetrics (hms.metrics), which is
+off by default. enable() wraps the instrumented methods on that one instance
+with a timer; disable() removes the wrappers again, so a disabled hospital
+runs exactly the same code as one without metrics. While enabled, each call
+records its latency in a fixed-bucket histogram, exceptions are counted, and
+an OperationResult that failed is counted by its reason. Queue depth, bed
+occupancy, doctor load and patient counts are gauges read from the live
+hospital when the metrics are rendered, so they cost nothing in between.
+
+    hms.metrics.enable()
+    hms.metrics.write("metrics.prom")   # for node_exporter's textfile collector
+    hms.metrics.serve(9108)             # or scrape http://localhost:9108/metrics
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds; hospital operations take microseconds to milliseconds
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+
+class CounterValue:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()  # Readers sharing the hospital lock update counters concurrently
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name, labels):
+        yield name, labels, self.value
+
+
+class HistogramValue:
+    __slots__ = ('bounds', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # The last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def samples(self, name, labels):
+        # Copy under the lock so the buckets, sum and count describe the same observations
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = 0
+        for bound, bucket in zip(self.bounds + (float("inf"),), counts):
+            cumulative += bucket
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield f"{name}_bucket", labels + (("le", le),), cumulative
+        yield f"{name}_sum", labels, total
+        yield f"{name}_count", labels, count
+
+
+class Metric:
+    """A named metric family; labels() returns the value for one label set, created on first use"""
+
+    def __init__(self, name, help_text, kind, factory=None, collect=None):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self.factory = factory
+        self.collect = collect  # For gauges: returns [(labels dict, value)] at render time
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels):
+        key = tuple(sorted(labels.items()))
+        value = self.values.get(key)
+        if value is None:
+            with self._lock:
+                value = self.values.setdefault(key, self.factory())
+        return value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        if self.collect is not None:
+            for labels, value in self.collect():
+                lines.append(f"{self.name}{_format_labels(tuple(sorted(labels.items())))} {value}")
+        else:
+            for key, value in list(self.values.items()):
+                for name, labels, sample in value.samples(self.name, key):
+                    lines.append(f"{name}{_format_labels(labels)} {sample}")
+        return lines
+
+
+class Registry:
+    """All metric families of one process, in registration order"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help_text):
+        return self._add(Metric(name, help_text, "counter", CounterValue))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._add(Metric(name, help_text, "histogram", lambda: HistogramValue(tuple(buckets))))
+
+    def gauge(self, name, help_text, collect):
+        return self._add(Metric(name, help_text, "gauge", collect=collect))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Every metric in Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class HospitalMetrics:
+    """Timers and gauges for one HospitalManagementSystem"""
+
+    # Timed when enabled; private helpers are included because admissions spend their time there
+    OPERATIONS = ('register_patient', 'enqueue_patient', 'enqueue_patients', 'admit_patient', 'admit_batch',
+                  'admit_next_patient', '_find_available_room', '_assign_doctor', 'discharge_patient',
+                  'schedule_appointment', 'retriage_patient', 'search_patients_by_name', 'record_page',
+                  'undo_last', 'redo_last')
+
+    def __init__(self, hms, registry=None):
+        self.hms = hms
+        self.registry = registry or Registry()
+        self.enabled = False
+        self.latency = self.registry.histogram("hms_operation_duration_seconds",
+                                               "Time spent in each hospital operation")
+        self.errors = self.registry.counter("hms_operation_errors_total",
+                                            "Operations that raised an exception")
+        self.failures = self.registry.counter("hms_operation_failures_total",
+                                              "Operations that returned an unsuccessful result, by reason")
+        self.registry.gauge("hms_queue_depth", "Patients waiting for admission", self._queue_depth)
+        self.registry.gauge("hms_beds", "Beds by state", self._beds)
+        self.registry.gauge("hms_bed_occupancy_ratio", "Occupied share of all beds", self._occupancy)
+        self.registry.gauge("hms_doctor_patients", "Patients assigned to doctors, against their capacity",
+                            self._doctor_load)
+        self.registry.gauge("hms_patients", "Registered patients by status", self._patients)
+        self._server = None
+
+    def enable(self):
+        if self.enabled:
+            return
+        for name in self.OPERATIONS:
+            method = getattr(self.hms, name, None)
+            if method is not None:
+                # An instance attribute shadows the class method, for outside and internal calls alike
+                setattr(self.hms, name, self._timed(name, method))
+        self.enabled = True
+
+    def disable(self):
+        for name in self.OPERATIONS:
+            self.hms.__dict__.pop(name, None)
+        self.enabled = False
+
+    def _timed(self, name, method):
+        histogram = self.latency.labels(operation=name)
+        errors = self.errors.labels(operation=name)
+        failures = self.failures
+        clock = time.perf_counter
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                histogram.observe(clock() - start)
+            if getattr(result, 'success', True) is False:
+                failures.labels(operation=name, reason=result.details.get('reason', 'rejected')).inc()
+            return result
+        return timed
+
+    # ---------- Gauges, read at render time ----------
+    def _queue_depth(self):
+        return [({'queue': 'emergency'}, len(self.hms.emergency_queue)),
+                ({'queue': 'regular'}, len(self.hms.regular_queue))]
+
+    def _bed_counts(self):
+        rooms = list(self.hms.rooms.values())
+        return sum(room.occupied_beds for room in rooms), sum(room.capacity for room in rooms)
+
+    def _beds(self):
+        occupied, total = self._bed_counts()
+        return [({'state': 'occupied'}, occupied), ({'state': 'free'}, total - occupied)]
+
+    def _occupancy(self):
+        occupied, total = self._bed_counts()
+        return [({}, round(occupied / total, 6) if total else 0)]
+
+    def _doctor_load(self):
+        doctors = list(self.hms.doctors.values())
+        return [({'state': 'assigned'}, sum(len(doctor.current_patients) for doctor in doctors)),
+                ({'state': 'capacity'}, sum(doctor.max_patients for doctor in doctors))]
+
+    def _patients(self):
+        counts = dict(self.hms.stats.patients_by_status)
+        return [({'status': status}, count) for status, count in sorted(counts.items())]
+
+    # ---------- Export ----------
+    def render(self):
+        # Gauges read live hospital state, so render as one reader
+        with self.hms.lock.read():
+            return self.registry.render()
+
+    def write(self, path):
+        """Write the metrics to a file atomically, so a collector never reads half of it"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(self.render())
+        os.replace(temp_path, path)
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serve GET /metrics from a daemon thread; returns the server (call shutdown() to stop it)"""
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the console menu
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        return self._server
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,339 @@
+"""Durable storage for HospitalManagementSystem: write-ahead log plus snapshots.
+
+Every completed mutation is appended to an operation log as one JSON line.
+Appends are group-committed: records are buffered and a background flusher
+writes and fsyncs them together, so many operations share one fsync. A
+change is only reported back once it is on disk, but the thread that made
+it waits for the fsync after releasing the hospital's write lock (commit()),
+so other desks carry on meanwhile. Once the log since the last snapshot
+holds `snapshot_every` operations, and at least as many as there were
+records in that snapshot, the full state is written to a compacted snapshot
+and the log starts a new segment; segments covered by the snapshot are
+deleted. Tying the interval to the size of the state keeps the total cost of
+snapshots linear in the number of operations, including during bulk imports.
+The state is copied to plain data under the read lock, also in commit(), and
+written out by a background thread. On startup the latest snapshot is loaded
+and the log tail after it is replayed.
+
+Layout of the data directory:
+
+    snapshot-<seq>.json   state after operation <seq>
+    wal-<seq>.log         log segment whose first record is <seq> + 1
+"""
+import json
+import os
+import threading
+import time
+
+
+class WriteAheadLog:
+    """Append-only, segmented operation log with group commit"""
+
+    def __init__(self, directory, batch_size=256, flush_interval=0.05):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.last_seq = 0      # last sequence number handed out
+        self.durable_seq = 0   # last sequence number known to be on disk
+        self._pending = []     # JSON lines, and the int first sequence number of each new segment
+        self._file = None
+        self._lock = threading.Lock()  # Guards the buffer and sequence numbers, never held during I/O
+        self._io_lock = threading.Lock()  # Held by whoever is writing the buffer out
+        self._durable = threading.Condition(self._lock)
+        self._wake = threading.Condition(self._lock)
+        self._closed = False
+        self._flusher = None
+        self._waiting = 0  # Threads blocked in wait(); the flusher does not linger while there are any
+
+    # ---------- Reading ----------
+    def segments(self):
+        """Log segment paths in sequence order"""
+        names = [name for name in os.listdir(self.directory)
+                 if name.startswith("wal-") and name.endswith(".log")]
+        names.sort(key=lambda name: int(name[4:-4]))
+        return [os.path.join(self.directory, name) for name in names]
+
+    def read(self, after_seq=0):
+        """Yield (seq, op, payload) for every durable record with seq > after_seq"""
+        for path in self.segments():
+            with open(path, "r", encoding="utf-8") as log_file:
+                for line in log_file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn write at the tail of the log from a crash
+                        break
+                    if record["seq"] > after_seq:
+                        yield record["seq"], record["op"], record["payload"]
+
+    # ---------- Writing ----------
+    def open(self, last_seq):
+        """Start appending after last_seq in a fresh segment"""
+        self.last_seq = self.durable_seq = last_seq
+        self._open_segment(last_seq)
+        self._flusher = threading.Thread(target=self._flush_loop, name="wal-flusher", daemon=True)
+        self._flusher.start()
+
+    def append(self, op, payload, wait=False):
+        """Queue a record for the next group commit and return its sequence number.
+
+        With wait=True the call blocks until the record has been fsynced.
+        """
+        with self._lock:
+            self.last_seq += 1
+            seq = self.last_seq
+            self._pending.append(json.dumps({"seq": seq, "op": op, "payload": payload},
+                                            separators=(",", ":")))
+            if len(self._pending) >= self.batch_size:
+                self._wake.notify()
+        if wait:
+            self.wait(seq)
+        return seq
+
+    def append_many(self, op, payloads):
+        """Queue several records for one group commit; returns the last sequence number"""
+        with self._lock:
+            for payload in payloads:
+                self.last_seq += 1
+                self._pending.append(json.dumps({"seq": self.last_seq, "op": op, "payload": payload},
+                                                separators=(",", ":")))
+            self._wake.notify()
+            return self.last_seq
+
+    def wait(self, seq):
+        """Block until every record up to seq has been fsynced by the flusher"""
+        with self._lock:
+            if self.durable_seq >= seq:
+                return
+            self._waiting += 1
+            self._wake.notify()
+            while self.durable_seq < seq and not self._closed:
+                self._durable.wait()
+            self._waiting -= 1
+
+    def sync(self):
+        """Write and fsync everything appended so far"""
+        self._flush()
+
+    def rotate(self):
+        """Continue in a new segment after the current sequence number, which is returned"""
+        with self._lock:
+            self._pending.append(self.last_seq)
+            return self.last_seq
+
+    def discard_segments_before(self, seq):
+        """Delete segments that only hold records up to seq"""
+        segments = self.segments()
+        for path, next_path in zip(segments, segments[1:]):
+            # A segment ends where the next one starts
+            if int(os.path.basename(next_path)[4:-4]) <= seq:
+                os.remove(path)
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wake.notify()
+        if self._flusher:
+            self._flusher.join()
+        self._flush()
+        with self._lock:
+            self._durable.notify_all()
+        if self._file:
+            self._file.close()
+
+    def _open_segment(self, first_seq):
+        path = os.path.join(self.directory, f"wal-{first_seq:012d}.log")
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _flush(self):
+        """Write out and fsync the buffer; appends carry on meanwhile"""
+        with self._io_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                last_seq = self.last_seq
+            if not pending:
+                return
+            lines = []
+            for item in pending:
+                if isinstance(item, int):
+                    # Segment boundary: finish the current segment and start the next
+                    self._write(lines)
+                    lines = []
+                    self._file.close()
+                    self._open_segment(item)
+                else:
+                    lines.append(item)
+            self._write(lines)
+            with self._lock:
+                self.durable_seq = last_seq
+                self._durable.notify_all()
+
+    def _write(self, lines):
+        if lines:
+            self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _flush_loop(self):
+        while True:
+            with self._lock:
+                if not self._closed and len(self._pending) < self.batch_size \
+                        and not (self._waiting and self._pending):
+                    self._wake.wait(self.flush_interval)
+                if self._closed:
+                    return
+            self._flush()
+
+
+class SnapshotStore:
+    """Atomically written, compacted snapshots of the full hospital state"""
+
+    def __init__(self, directory, keep=2):
+        self.directory = directory
+        self.keep = keep
+
+    def snapshots(self):
+        names = [name for name in os.listdir(self.directory)
+                 if name.startswith("snapshot-") and name.endswith(".json")]
+        names.sort(key=lambda name: int(name[9:-5]))
+        return [os.path.join(self.directory, name) for name in names]
+
+    def latest(self):
+        """Return (seq, state) for the newest snapshot, or (0, None)"""
+        for path in reversed(self.snapshots()):
+            try:
+                with open(path, "r", encoding="utf-8") as snapshot_file:
+                    snapshot = json.load(snapshot_file)
+                return snapshot["seq"], snapshot["state"]
+            except (OSError, ValueError, KeyError):
+                # Fall back to an older snapshot if the newest one is damaged
+                continue
+        return 0, None
+
+    def write(self, seq, state):
+        path = os.path.join(self.directory, f"snapshot-{seq:012d}.json")
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as snapshot_file:
+            json.dump({"seq": seq, "state": state}, snapshot_file, separators=(",", ":"))
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temp_path, path)
+        for old_path in self.snapshots()[:-self.keep]:
+            os.remove(old_path)
+
+
+class WriteAheadStorage:
+    """Storage engine combining the operation log and periodic snapshots.
+
+    Pass an instance as HospitalManagementSystem(storage=...); the system
+    calls attach() once at startup, record() after every mutation and
+    commit() once the write lock is released.
+    """
+
+    def __init__(self, directory, snapshot_every=1000, batch_size=256, flush_interval=0.05):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.log = WriteAheadLog(directory, batch_size, flush_interval)
+        self.snapshots = SnapshotStore(directory)
+        self.hms = None
+        self._since_snapshot = 0
+        self._snapshot_records = 0  # Records in the last snapshot
+        self._next_snapshot = None  # (seq, state) waiting to be written
+        self._snapshot_ready = threading.Condition()
+        self._checkpointing = threading.Lock()
+        self._snapshotter = None
+        self._closing = False
+
+    def attach(self, hms):
+        """Load the latest snapshot plus the log tail into hms.
+
+        Returns True if any saved state was found.
+        """
+        self.hms = hms
+        last_seq, state = self.snapshots.latest()
+        restored = state is not None
+        if restored:
+            hms.load_state(state)
+            self._snapshot_records = self._count_records(state)
+        for seq, op, payload in self.log.read(after_seq=last_seq):
+            hms.apply_operation(op, payload)
+            last_seq = seq
+            restored = True
+            self._since_snapshot += 1
+        self.log.open(last_seq)
+        return restored
+
+    def record(self, op, payload):
+        """Journal one operation; returns its sequence number for commit()"""
+        self._since_snapshot += 1
+        return self.log.append(op, payload)
+
+    def bulk_record(self, op, payloads):
+        """Journal many operations of one kind with a single fsync; returns the last sequence number"""
+        self._since_snapshot += len(payloads)
+        return self.log.append_many(op, payloads)
+
+    def commit(self, seq):
+        """Block until the log is durable up to seq, then snapshot if one is due.
+
+        Called without the write lock, so other writers go ahead during the
+        fsync; one thread at a time takes a due snapshot.
+        """
+        self.log.wait(seq)
+        if self._snapshot_due() and self._checkpointing.acquire(False):
+            try:
+                if self._snapshot_due():
+                    self.checkpoint()
+            finally:
+                self._checkpointing.release()
+
+    def _snapshot_due(self):
+        return self._since_snapshot >= max(self.snapshot_every, self._snapshot_records)
+
+    @staticmethod
+    def _count_records(state):
+        return sum(len(state[kind]) for kind in ('doctors', 'rooms', 'patients', 'appointments'))
+
+    def checkpoint(self):
+        """Snapshot the current state and compact the log.
+
+        Only the copy of the state is taken here, in memory, under the read
+        lock so that searches and reports carry on; a background thread
+        serializes and fsyncs it once the log up to that point is durable.
+        """
+        with self.hms.lock.read():
+            state = self.hms.export_state()
+            seq = self.log.rotate()
+            self._since_snapshot = 0
+        self._snapshot_records = self._count_records(state)
+        with self._snapshot_ready:
+            self._next_snapshot = (seq, state)  # Supersedes one that has not been written yet
+            self._snapshot_ready.notify()
+            if self._snapshotter is None:
+                self._snapshotter = threading.Thread(target=self._snapshot_loop, name="wal-snapshots",
+                                                     daemon=True)
+                self._snapshotter.start()
+
+    def _snapshot_loop(self):
+        while True:
+            with self._snapshot_ready:
+                while self._next_snapshot is None and not self._closing:
+                    self._snapshot_ready.wait()
+                if self._next_snapshot is None:
+                    return
+                seq, state = self._next_snapshot
+                self._next_snapshot = None
+            self.log.sync()  # The snapshot must not get ahead of the log it replaces
+            self.snapshots.write(seq, state)
+            self.log.discard_segments_before(seq)
+
+    def close(self):
+        with self._snapshot_ready:
+            self._closing = True
+            self._snapshot_ready.notify()
+        if self._snapshotter is not None:
+            self._snapshotter.join()
+        self.log.close()
@@ -0,0 +1,435 @@
+"""JSON-over-HTTP service for ward tablets and kiosks, using only asyncio.
+
+    python server.py --port 8080 --db hospital.db
+
+Endpoints (request and response bodies are JSON):
+
+    POST /patients                    {"name", "age", "condition", "priority"?}  register
+    GET  /patients?search=ann&limit=10                                           name search (limit <= 100)
+    GET  /patients/<id>                                                          one patient
+    POST /patients/<id>/discharge                                                discharge
+    POST /admissions                  {"count"?}  admit the next patient, or a batch
+    POST /appointments                {"patient_id", "doctor_id", "appointment_time" (ISO 8601),
+                                       "appointment_type"?, "duration_minutes"?}
+    POST /doctors                     {"name", "specialization", "max_patients"?}
+    POST /rooms                       {"room_type", "capacity"?}
+    GET  /stats                                                                  dashboard figures
+
+Every response is {"success", "message", "data", ...details}. A rejected
+operation (no free bed, unknown patient, invalid field) answers 422 with the
+hospital's message; malformed requests answer 400.
+
+Connections are kept alive and may pipeline requests; responses come back
+in request order. Writes are micro-batched: while one batch runs on the
+writer thread, newly arrived writes queue up and then run together under a
+single hold of the hospital's write lock, so a burst of requests costs one
+lock round trip and one thread hop per batch instead of per request. Reads
+run on a small thread pool under the shared read lock.
+"""
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from main import HospitalManagementSystem, open_storage, to_json
+
+MAX_BODY = 1024 * 1024
+MAX_PIPELINE = 64  # Requests read ahead of their responses on one connection
+MAX_SEARCH_LIMIT = 100
+
+
+class BadRequest(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def result_response(result, created=False):
+    """(status, body) for an OperationResult"""
+    if not result:
+        return HTTPStatus.UNPROCESSABLE_ENTITY, to_json(result)
+    return HTTPStatus.CREATED if created else HTTPStatus.OK, to_json(result)
+
+
+class WriteBatcher:
+    """Runs submitted writes in order on one thread, a batch per write-lock hold.
+
+    A write submitted while the writer is idle runs at once; writes that
+    arrive while a batch is running form the next batch, up to max_batch.
+    """
+
+    def __init__(self, hms, max_batch=256):
+        self.hms = hms
+        self.max_batch = max_batch
+        self.batches = 0
+        self.writes = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hms-writer")
+        self._pending = []  # (call, future)
+        self._running = False
+
+    def submit(self, call):
+        """Future for the value of call(), run with the write lock held"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((call, future))
+        if not self._running:
+            self._start_batch()
+        return future
+
+    def _start_batch(self):
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        self._running = True
+        task = asyncio.get_running_loop().run_in_executor(self._executor, self._run, [call for call, _ in batch])
+        task.add_done_callback(lambda done: self._finished(batch, done))
+
+    def _run(self, calls):
+        outcomes = []
+        with self.hms.lock.write():
+            for call in calls:
+                try:
+                    outcomes.append((call(), None))
+                except Exception as e:
+                    # One failing request must not fail the rest of its batch
+                    outcomes.append((None, e))
+        self.hms.after_write()  # The whole batch waits for one fsync, outside the lock
+        return outcomes
+
+    def _finished(self, batch, done):
+        self._running = False
+        self.batches += 1
+        self.writes += len(batch)
+        error = done.exception()
+        for index, (_, future) in enumerate(batch):
+            if future.cancelled():
+                continue
+            if error is not None:
+                future.set_exception(error)
+                continue
+            value, exception = done.result()[index]
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(value)
+        if self._pending:
+            self._start_batch()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+class HospitalServer:
+    """Serves one HospitalManagementSystem over HTTP/1.1"""
+
+    def __init__(self, hms, host="127.0.0.1", port=8080, read_threads=4, max_batch=256):
+        self.hms = hms
+        self.host = host
+        self.port = port
+        self.writes = WriteBatcher(hms, max_batch)
+        self._readers = ThreadPoolExecutor(max_workers=read_threads, thread_name_prefix="hms-reader")
+        self._server = None
+        self.requests = 0
+        self.routes = {
+            ('POST', 'patients'): self.register,
+            ('GET', 'patients'): self.search,
+            ('GET', 'patients', None): self.get_patient,
+            ('POST', 'patients', None, 'discharge'): self.discharge,
+            ('POST', 'admissions'): self.admit,
+            ('POST', 'appointments'): self.schedule,
+            ('POST', 'doctors'): self.add_doctor,
+            ('POST', 'rooms'): self.add_room,
+            ('GET', 'stats'): self.stats,
+        }
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # The real port when started on port 0
+        return self._server
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        self.writes.close()
+        self._readers.shutdown(wait=True)
+
+    # ---------- Running operations ----------
+    def write(self, call):
+        return self.writes.submit(call)
+
+    def read(self, call):
+        def locked():
+            # Serialize under the lock too, so the records cannot change half-way
+            with self.hms.lock.read():
+                return call()
+        return asyncio.get_running_loop().run_in_executor(self._readers, locked)
+
+    # ---------- Endpoints: each returns (status, body) ----------
+    async def register(self, request, body):
+        return await self.write(lambda: result_response(self.hms.register_patient(
+            body.get('name', ''), body.get('age'), body.get('condition', ''), body.get('priority')), created=True))
+
+    async def search(self, request, body):
+        query = request.query.get('search', [''])[0]
+        limit = request.int_param('limit', 10)
+        if not 1 <= limit <= MAX_SEARCH_LIMIT:
+            raise BadRequest(HTTPStatus.BAD_REQUEST, f"limit must be between 1 and {MAX_SEARCH_LIMIT}")
+        return await self.read(lambda: (HTTPStatus.OK, {
+            'success': True, 'message': "", 'data': to_json(self.hms.search_patients_by_name(query, limit))}))
+
+    async def get_patient(self, request, body):
+        patient_id = request.parts[1]
+
+        def find():
+            patient = self.hms.find_patient(patient_id)
+            if patient is None:
+                return self._error(HTTPStatus.NOT_FOUND, f"Patient with ID '{patient_id}' not found.")
+            return HTTPStatus.OK, {'success': True, 'message': "", 'data': patient.to_dict()}
+        return await self.read(find)
+
+    async def discharge(self, request, body):
+        return await self.write(lambda: result_response(self.hms.discharge_patient(request.parts[1])))
+
+    async def admit(self, request, body):
+        count = body.get('count')
+        if count is None:
+            return await self.write(lambda: result_response(self.hms.admit_patient()))
+        try:
+            count = int(count)
+        except (TypeError, ValueError):
+            raise BadRequest(HTTPStatus.BAD_REQUEST, "count must be a number")
+        return await self.write(lambda: result_response(self.hms.admit_batch(count)))
+
+    async def schedule(self, request, body):
+        try:
+            appointment_time = datetime.fromisoformat(str(body.get('appointment_time', '')))
+        except ValueError:
+            raise BadRequest(HTTPStatus.BAD_REQUEST, "appointment_time must be an ISO 8601 date and time")
+        if appointment_time.tzinfo is not None:
+            # The hospital clock is naive local time
+            appointment_time = appointment_time.astimezone().replace(tzinfo=None)
+        options = {name: body[name] for name in ('appointment_type', 'duration_minutes') if name in body}
+        return await self.write(lambda: result_response(self.hms.schedule_appointment(
+            body.get('patient_id'), body.get('doctor_id'), appointment_time, **options), created=True))
+
+    async def add_doctor(self, request, body):
+        return await self.write(lambda: result_response(self.hms.add_doctor(
+            body.get('name', ''), body.get('specialization', ''), body.get('max_patients', 10)), created=True))
+
+    async def add_room(self, request, body):
+        return await self.write(lambda: result_response(self.hms.add_room(
+            body.get('room_type', ''), body.get('capacity', 1)), created=True))
+
+    async def stats(self, request, body):
+        return await self.read(lambda: (HTTPStatus.OK, {'success': True, 'message': "",
+                                                        'data': self.hms.get_statistics()}))
+
+    # ---------- HTTP ----------
+    async def _connection(self, reader, writer):
+        responses = asyncio.Queue(MAX_PIPELINE)  # (awaitable (status, body), keep_alive), then None
+        sender = asyncio.create_task(self._send_responses(writer, responses))
+        loop = asyncio.get_running_loop()
+        # Pipelined requests keep their order: a run of reads (or of writes) proceeds together,
+        # but each run waits until the run before it has finished
+        run, run_is_read, previous_runs = [], None, None
+        try:
+            while True:
+                try:
+                    request = await Request.read(reader)
+                except BadRequest as e:
+                    rejected = loop.create_future()
+                    rejected.set_result(self._error(e.status, str(e)))
+                    await responses.put((rejected, False))
+                    break
+                if request is None:
+                    break
+                self.requests += 1
+                is_read = request.method == "GET"
+                if is_read != run_is_read:
+                    if run:
+                        previous_runs = asyncio.gather(*run)
+                    run, run_is_read = [], is_read
+                task = asyncio.create_task(self._dispatch(request, previous_runs))
+                run.append(task)
+                # The sender answers in request order
+                await responses.put((task, request.keep_alive))
+                if not request.keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            await responses.put(None)
+            await sender
+
+    async def _send_responses(self, writer, responses):
+        connected = True
+        while True:
+            item = await responses.get()
+            if item is None:
+                break
+            if not connected:
+                continue  # Keep taking answers so the reading side never blocks on a full queue
+            response, keep_alive = item
+            status, body = await response
+            try:
+                writer.write(self._encode(status, body, keep_alive))
+                if responses.empty() or not keep_alive:
+                    # Pipelined responses that are ready together go out in one write
+                    await writer.drain()
+            except ConnectionError:
+                keep_alive = False
+            if not keep_alive:
+                connected = False
+                writer.close()
+        if connected:
+            writer.close()
+
+    @staticmethod
+    def _encode(status, body, keep_alive):
+        payload = json.dumps(body, separators=(",", ":")).encode("utf-8")
+        head = [f"HTTP/1.1 {status.value} {status.phrase}", "Content-Type: application/json",
+                f"Content-Length: {len(payload)}"]
+        if not keep_alive:
+            head.append("Connection: close")
+        return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload
+
+    async def _dispatch(self, request, after=None):
+        if after is not None:
+            await after  # Never raises: _dispatch turns every error into a response
+        key = request.route_key()
+        handler = self.routes.get(key)
+        if handler is None:
+            if any(route[1:] == key[1:] for route in self.routes):
+                return self._error(HTTPStatus.METHOD_NOT_ALLOWED, f"{request.method} is not allowed here")
+            return self._error(HTTPStatus.NOT_FOUND, f"No endpoint at {request.path}")
+        try:
+            return await handler(request, request.json())
+        except BadRequest as e:
+            return self._error(e.status, str(e))
+        except Exception as e:
+            return self._error(HTTPStatus.INTERNAL_SERVER_ERROR, f"{type(e).__name__}: {e}")
+
+    @staticmethod
+    def _error(status, message):
+        return status, {'success': False, 'message': message, 'data': None}
+
+
+class Request:
+    __slots__ = ('method', 'path', 'parts', 'query', 'version', 'headers', 'body')
+
+    def __init__(self, method, target, version, headers, body):
+        url = urlsplit(target)
+        self.method = method
+        self.path = url.path
+        self.parts = [part for part in url.path.split("/") if part]
+        self.query = parse_qs(url.query)
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    @classmethod
+    async def read(cls, reader):
+        """The next request on the connection, or None once the client has closed it"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise BadRequest(HTTPStatus.BAD_REQUEST, "Incomplete request")
+            return None
+        except asyncio.LimitOverrunError:
+            raise BadRequest(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request headers are too large")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            raise BadRequest(HTTPStatus.BAD_REQUEST, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise BadRequest(HTTPStatus.NOT_IMPLEMENTED, "Chunked request bodies are not supported")
+        try:
+            length = int(headers.get('content-length', 0))
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            raise BadRequest(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length > MAX_BODY:
+            raise BadRequest(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body is too large")
+        try:
+            body = await reader.readexactly(length) if length else b""
+        except asyncio.IncompleteReadError:
+            raise BadRequest(HTTPStatus.BAD_REQUEST, "Request body is shorter than its Content-Length")
+        return cls(method.upper(), target, version, headers, body)
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get('connection', '').lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    def route_key(self):
+        """(method, 'patients', None, 'discharge') for POST /patients/P001/discharge"""
+        if len(self.parts) > 1:
+            return (self.method, self.parts[0], None) + tuple(self.parts[2:])
+        return (self.method,) + tuple(self.parts)
+
+    def json(self):
+        if not self.body:
+            return {}
+        try:
+            body = json.loads(self.body)
+        except ValueError:
+            raise BadRequest(HTTPStatus.BAD_REQUEST, "Request body is not valid JSON")
+        if not isinstance(body, dict):
+            raise BadRequest(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object")
+        return body
+
+    def int_param(self, name, default):
+        try:
+            return int(self.query.get(name, [default])[0])
+        except ValueError:
+            raise BadRequest(HTTPStatus.BAD_REQUEST, f"{name} must be a number")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the hospital as a JSON-over-HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080, help="0 picks a free port")
+    storage_group = parser.add_mutually_exclusive_group()
+    storage_group.add_argument("--data-dir", help="keep hospital state in this directory (write-ahead log)")
+    storage_group.add_argument("--db", help="keep hospital state in this SQLite database")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    args = parser.parse_args(argv)
+
+    hms = HospitalManagementSystem(storage=open_storage(args.data_dir, args.db))
+    if args.metrics_port:
+        hms.metrics.enable()
+        hms.metrics.serve(args.metrics_port)
+    server = HospitalServer(hms, args.host, args.port)
+
+    async def run():
+        await server.start()
+        print(f"Serving on http://{server.host}:{server.port}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        hms.close()
+
+
+if __name__ == "__main__":
+    main()
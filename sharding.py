@@ -0,0 +1,421 @@
+"""Sharded deployment: hospital state split across worker processes.
+
+Each shard is a process running its own HospitalManagementSystem over part
+of the hospital, e.g. one campus or one group of departments, with its own
+rooms, doctors and the patients placed there. A ShardRouter in the calling
+process starts the shards and routes every request:
+
+    router = ShardRouter(campus_specs(4))
+    router.register_patient("Ann Lee", 54, "chest pain")   # placed on the shard with capacity
+    router.admit_all()                                      # every shard admits in parallel
+    router.get_statistics()                                 # fanned out and summed
+    router.close()
+
+The router hands out patient, doctor and room IDs so they stay unique
+across shards, and remembers which shard holds each one. A new patient goes
+to a shard with spare beds and doctor places, preferring one with the
+specialization and room type triage picks for their condition (see
+ShardRouter.place). Admissions, discharges and appointments then stay
+inside that shard. Census, statistics and name search ask every shard at
+once and merge the answers.
+
+Messages to several shards are all sent before any reply is read, so the
+shards work in parallel. The bulk calls (register_patients, admit_all,
+discharge_patients) send one message per shard for a whole batch, and
+admissions scale with the number of cores. With data_dir each shard keeps
+its own write-ahead log in data_dir/<shard name>, and a restarted router
+rebuilds its directory from the shards.
+"""
+import multiprocessing
+import os
+import threading
+from collections import Counter
+
+from main import HospitalManagementSystem, ROOM_TYPES, open_storage, to_json, validate_patient_fields
+from triage import TriageClassifier
+
+# Router calls a shard may run: HospitalManagementSystem methods, plus the helpers below
+SHARD_METHODS = {'register_patient', 'admit_patient', 'discharge_patient', 'schedule_appointment', 'add_doctor',
+                 'add_room', 'find_patient', 'search_patients_by_name', 'get_statistics'}
+SPECIALIZATIONS = ["Cardiology", "Neurology", "Emergency Medicine", "Orthopedics", "Pediatrics"]
+
+
+class ShardSpec:
+    """Name, rooms and doctors of one shard when it starts without saved state.
+
+    rooms is a list of (room_type, capacity) and doctors of
+    (name, specialization, max_patients).
+    """
+
+    def __init__(self, name, rooms=(), doctors=()):
+        self.name = name
+        self.rooms = list(rooms)
+        self.doctors = list(doctors)
+
+
+def campus_specs(count, rooms_per_type=5, beds_per_room=2, doctors_per_specialization=2, max_patients=10):
+    """Identical campuses, each with every room type and specialization"""
+    return [ShardSpec(f"campus-{number}",
+                      [(room_type, beds_per_room) for room_type in ROOM_TYPES for _ in range(rooms_per_type)],
+                      [(f"Doctor {number}-{index}", specialization, max_patients)
+                       for index, specialization in enumerate(SPECIALIZATIONS * doctors_per_specialization)])
+            for number in range(count)]
+
+
+def department_specs(departments=None, rooms_per_type=5, beds_per_room=2, doctors_per_specialization=2,
+                     max_patients=10):
+    """One shard per department: {name: (room types, specializations)}"""
+    departments = departments or {
+        'acute': (["ICU", "Emergency"], ["Cardiology", "Neurology", "Emergency Medicine"]),
+        'wards': (["General", "Private"], ["Orthopedics", "Pediatrics"]),
+    }
+    return [ShardSpec(name,
+                      [(room_type, beds_per_room) for room_type in room_types for _ in range(rooms_per_type)],
+                      [(f"Doctor {name}-{index}", specialization, max_patients)
+                       for index, specialization in enumerate(specializations * doctors_per_specialization)])
+            for name, (room_types, specializations) in departments.items()]
+
+
+# ---------- Shard process ----------
+def _summary(hms):
+    """What the router needs to place patients: free beds, doctor places and the queue"""
+    waiting = hms.emergency_queue or hms.regular_queue
+    return {'free_beds': dict(hms.room_index.free_beds),
+            'doctor_places': sum(doctor.max_patients - len(doctor.current_patients)
+                                 for doctor in hms.doctors.values()),
+            'waiting': len(hms.emergency_queue) + len(hms.regular_queue),
+            'next_priority': waiting.peek().priority if waiting else None}
+
+
+def _admit_waiting(hms, limit=None):
+    """Admit waiting patients one by one until limit, or until the next one cannot be placed"""
+    admitted = []
+    reason = None
+    while limit is None or len(admitted) < limit:
+        result = hms.admit_patient()
+        if not result:
+            reason = result.details.get('reason', 'no_patients')
+            break
+        admitted.append(result.data.patient_id)
+    return {'success': bool(admitted), 'admitted': admitted, 'reason': reason}
+
+
+def _directory(hms):
+    return {'patients': list(hms.patients), 'doctors': list(hms.doctors), 'rooms': list(hms.rooms),
+            'specializations': sorted({doctor.specialization for doctor in hms.doctors.values()})}
+
+
+def _census(hms):
+    census = dict(hms.stats.patients_by_status)
+    census['emergency_queue'] = len(hms.emergency_queue)
+    census['regular_queue'] = len(hms.regular_queue)
+    return census
+
+
+SHARD_HELPERS = {'admit_waiting': _admit_waiting, 'directory': _directory, 'census': _census}
+
+
+def _run_call(hms, method, args, kwargs):
+    try:
+        if method in SHARD_HELPERS:
+            return SHARD_HELPERS[method](hms, *args, **kwargs)
+        if method not in SHARD_METHODS:
+            raise ValueError(f"Shards do not run {method}")
+        return to_json(getattr(hms, method)(*args, **kwargs))
+    except Exception as e:
+        # A bad request must not take the shard down with it
+        return {'success': False, 'message': f"{type(e).__name__}: {e}", 'data': None, 'reason': 'error'}
+
+
+def _serve_shard(connection, data_dir):
+    """Shard process main loop: a list of calls in, their results and a summary out"""
+    hms = HospitalManagementSystem(storage=open_storage(data_dir), seed_defaults=False)
+    connection.send((hms.restored, _summary(hms)))
+    try:
+        while True:
+            calls = connection.recv()
+            if calls is None:
+                break
+            results = [_run_call(hms, method, args, kwargs) for method, args, kwargs in calls]
+            connection.send((results, _summary(hms)))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        hms.close()
+        connection.close()
+
+
+# ---------- Router ----------
+class Shard:
+    __slots__ = ('index', 'name', 'process', 'connection', 'lock', 'summary', 'room_types', 'specializations')
+
+    def __init__(self, index, name, process, connection):
+        self.index = index
+        self.name = name
+        self.process = process
+        self.connection = connection
+        self.lock = threading.Lock()  # One request/reply exchange at a time per pipe
+        self.summary = None
+        self.room_types = set()
+        self.specializations = set()
+
+
+class ShardRouter:
+    """Starts one process per ShardSpec and routes hospital requests to them"""
+
+    def __init__(self, specs, data_dir=None, triage=None, context=None):
+        self.triage = triage or TriageClassifier.from_file()
+        context = context or multiprocessing.get_context()
+        self.shards = []
+        for index, spec in enumerate(specs):
+            parent, child = context.Pipe()
+            shard_dir = os.path.join(data_dir, spec.name) if data_dir else None
+            process = context.Process(target=_serve_shard, args=(child, shard_dir), name=f"shard-{spec.name}",
+                                      daemon=True)
+            process.start()
+            child.close()
+            self.shards.append(Shard(index, spec.name, process, parent))
+        self.by_name = {shard.name: shard for shard in self.shards}
+        self.patient_shard = {}  # patient_id -> Shard
+        self.doctor_shard = {}
+        self.room_shard = {}
+        self._ids = {'P': 0, 'D': 0, 'R': 0}
+        self._ids_lock = threading.Lock()
+
+        restored = {}
+        for shard in self.shards:
+            restored[shard.index], shard.summary = shard.connection.recv()
+        # Rebuild the directory from shards that loaded saved state
+        for shard, directory in self._fan_out({shard: [('directory', (), {})] for shard in self.shards
+                                               if restored[shard.index]}):
+            self._learn(shard, directory[0])
+        setup = {}
+        for shard, spec in zip(self.shards, specs):
+            if not restored[shard.index]:
+                setup[shard] = ([('add_room', (room_type, capacity), {'room_number': self._next_id('R')})
+                                 for room_type, capacity in spec.rooms]
+                                + [('add_doctor', doctor, {'doctor_id': self._next_id('D')})
+                                   for doctor in spec.doctors])
+        failures = []
+        for shard, results in self._fan_out(setup):
+            for result in results:
+                if not result['success']:
+                    failures.append(f"{shard.name}: {result['message']}")
+                else:
+                    self._learn(shard, {'rooms': [result['data'].get('room_number')],
+                                        'doctors': [result['data'].get('doctor_id')],
+                                        'specializations': [result['data'].get('specialization')]})
+        for shard in self.shards:
+            shard.room_types = set(shard.summary['free_beds'])
+        if failures:
+            self.close()
+            raise ValueError(f"Could not set up shards: {'; '.join(failures[:3])}")
+
+    def close(self):
+        for shard in self.shards:
+            with shard.lock:
+                try:
+                    shard.connection.send(None)
+                except (OSError, ValueError):
+                    pass
+        for shard in self.shards:
+            shard.process.join()
+            shard.connection.close()
+
+    # ---------- Messaging ----------
+    def _fan_out(self, calls_by_shard):
+        """Send each shard its list of (method, args, kwargs) at once, then collect [(shard, results)]"""
+        shards = sorted(calls_by_shard, key=lambda shard: shard.index)  # Fixed lock order
+        for shard in shards:
+            shard.lock.acquire()
+        try:
+            for shard in shards:
+                shard.connection.send(calls_by_shard[shard])
+            replies = []
+            for shard in shards:
+                results, shard.summary = shard.connection.recv()
+                replies.append((shard, results))
+            return replies
+        finally:
+            for shard in shards:
+                shard.lock.release()
+
+    def _call(self, shard, method, *args, **kwargs):
+        result = self._fan_out({shard: [(method, args, kwargs)]})[0][1][0]
+        if isinstance(result, dict) and 'success' in result:
+            result['shard'] = shard.name
+        return result
+
+    def _next_id(self, prefix):
+        with self._ids_lock:
+            self._ids[prefix] += 1
+            return f"{prefix}{self._ids[prefix]:03d}"
+
+    def _learn(self, shard, directory):
+        """Record where IDs live and keep new IDs above every known one"""
+        shard.specializations.update(name for name in directory.get('specializations', ()) if name)
+        for prefix, key, table in (('P', 'patients', self.patient_shard), ('D', 'doctors', self.doctor_shard),
+                                   ('R', 'rooms', self.room_shard)):
+            for record_id in directory.get(key, ()):
+                if record_id is None:
+                    continue
+                table[record_id] = shard
+                digits = record_id[1:]
+                if digits.isdigit():
+                    self._ids[prefix] = max(self._ids[prefix], int(digits))
+
+    def _shard_of(self, table, record_id, kind):
+        shard = table.get(record_id)
+        if shard is None:
+            return None, {'success': False, 'message': f"{kind} with ID '{record_id}' not found.", 'data': None}
+        return shard, None
+
+    # ---------- Placement ----------
+    def place(self, condition, pending=None):
+        """The shard best able to take a patient with this condition.
+
+        Shards with spare capacity come first, then those with a doctor of
+        the specialization triage asks for, then those with the first-choice
+        room type; ties go to the most free beds (weighted by preference and
+        capped by doctor places) less the patients already waiting.
+        """
+        triage = self.triage.classify(condition)
+        room_types = triage.room_types
+        pending = pending or Counter()
+
+        def fit(shard):
+            summary = shard.summary
+            # Each step down the preference list counts half as much
+            beds = sum(summary['free_beds'].get(room_type, 0) / 2 ** rank for rank, room_type in enumerate(room_types))
+            spare = min(beds, summary['doctor_places']) - summary['waiting'] - pending[shard]
+            return (spare > 0, triage.specialization in shard.specializations, room_types[0] in shard.room_types,
+                    spare, -shard.index)
+        return max(self.shards, key=fit)
+
+    # ---------- Writes ----------
+    def register_patient(self, name, age, condition, priority=None):
+        return self.register_patients([(name, age, condition, priority)])[0]
+
+    def register_patients(self, records):
+        """Register (name, age, condition, priority) records, one message per shard for the batch"""
+        results = [None] * len(records)
+        calls = {}
+        positions = {}
+        pending = Counter()
+        for position, (name, age, condition, priority) in enumerate(records):
+            if priority is None or priority == "":
+                priority = self.triage.classify(condition).priority or 3
+            try:
+                name, age, condition, priority = validate_patient_fields(name, age, condition, priority)
+            except ValueError as e:
+                results[position] = {'success': False, 'message': str(e), 'data': None}
+                continue
+            shard = self.place(condition, pending)
+            pending[shard] += 1
+            patient_id = self._next_id('P')
+            calls.setdefault(shard, []).append(('register_patient', (name, age, condition, priority),
+                                                {'patient_id': patient_id}))
+            positions.setdefault(shard, []).append(position)
+        for shard, shard_results in self._fan_out(calls):
+            for position, result in zip(positions[shard], shard_results):
+                if result['success']:
+                    self.patient_shard[result['data']['patient_id']] = shard
+                result['shard'] = shard.name
+                results[position] = result
+        return results
+
+    def admit_patient(self):
+        """Admit on the shard whose next waiting patient is most urgent and that has room"""
+        candidates = [shard for shard in self.shards
+                      if shard.summary['waiting'] and any(shard.summary['free_beds'].values())
+                      and shard.summary['doctor_places']]
+        if not candidates:
+            candidates = [shard for shard in self.shards if shard.summary['waiting']]
+        if not candidates:
+            return {'success': False, 'message': "No patients are currently waiting for admission.", 'data': None}
+        shard = min(candidates, key=lambda shard: (shard.summary['next_priority'], shard.index))
+        return self._call(shard, 'admit_patient')
+
+    def admit_all(self, limit_per_shard=None):
+        """Every shard admits its waiting patients in parallel; returns {shard name: admission report}"""
+        replies = self._fan_out({shard: [('admit_waiting', (limit_per_shard,), {})] for shard in self.shards
+                                 if shard.summary['waiting']})
+        return {shard.name: results[0] for shard, results in replies}
+
+    def discharge_patient(self, patient_id):
+        return self.discharge_patients([patient_id])[0]
+
+    def discharge_patients(self, patient_ids):
+        results = [None] * len(patient_ids)
+        calls = {}
+        positions = {}
+        for position, patient_id in enumerate(patient_ids):
+            shard, error = self._shard_of(self.patient_shard, patient_id, "Patient")
+            if error:
+                results[position] = error
+                continue
+            calls.setdefault(shard, []).append(('discharge_patient', (patient_id,), {}))
+            positions.setdefault(shard, []).append(position)
+        for shard, shard_results in self._fan_out(calls):
+            for position, result in zip(positions[shard], shard_results):
+                result['shard'] = shard.name
+                results[position] = result
+        return results
+
+    def schedule_appointment(self, patient_id, doctor_id, appointment_time, **options):
+        """Book on the patient's shard; the doctor must work there"""
+        shard, error = self._shard_of(self.patient_shard, patient_id, "Patient")
+        if error:
+            return error
+        if self.doctor_shard.get(doctor_id) is not shard:
+            return {'success': False, 'data': None,
+                    'message': f"Doctor '{doctor_id}' does not work at {shard.name}, where {patient_id} is placed."}
+        return self._call(shard, 'schedule_appointment', patient_id, doctor_id, appointment_time, **options)
+
+    def add_doctor(self, shard_name, name, specialization, max_patients=10):
+        shard = self.by_name[shard_name]
+        result = self._call(shard, 'add_doctor', name, specialization, max_patients, doctor_id=self._next_id('D'))
+        if result['success']:
+            self.doctor_shard[result['data']['doctor_id']] = shard
+            shard.specializations.add(specialization)
+        return result
+
+    def add_room(self, shard_name, room_type, capacity=1):
+        shard = self.by_name[shard_name]
+        result = self._call(shard, 'add_room', room_type, capacity, room_number=self._next_id('R'))
+        if result['success']:
+            self.room_shard[result['data']['room_number']] = shard
+            shard.room_types.add(room_type)
+        return result
+
+    # ---------- Reads ----------
+    def find_patient(self, patient_id):
+        shard = self.patient_shard.get(patient_id)
+        return self._call(shard, 'find_patient', patient_id) if shard else None
+
+    def search_patients_by_name(self, query, limit=10):
+        """Each shard's best matches, merged rank by rank"""
+        replies = self._fan_out({shard: [('search_patients_by_name', (query, limit), {})] for shard in self.shards})
+        ranked = [results[0] for _, results in replies]
+        merged = []
+        for rank in range(limit):
+            for matches in ranked:
+                if rank < len(matches):
+                    merged.append(matches[rank])
+        return merged[:limit]
+
+    def get_statistics(self):
+        """Hospital-wide dashboard figures, summed over the shards"""
+        totals = Counter()
+        for _, results in self._fan_out({shard: [('get_statistics', (), {})] for shard in self.shards}):
+            totals.update(results[0])
+        return dict(totals)
+
+    def census(self):
+        """Patients by status and queue, per shard and in total"""
+        replies = self._fan_out({shard: [('census', (), {})] for shard in self.shards})
+        by_shard = {shard.name: results[0] for shard, results in replies}
+        total = Counter()
+        for counts in by_shard.values():
+            total.update(counts)
+        return {'total': dict(total), 'shards': by_shard}
@@ -0,0 +1,245 @@
+"""Discrete-event simulation of patient flow for capacity planning.
+
+Patients arrive as a Poisson process with a configurable priority mix, are
+registered and admitted through the real HospitalManagementSystem API, stay
+for a log-normally distributed length of stay and are then discharged.
+The hospital runs on a VirtualClock that jumps from one event to the next,
+so a year of operations takes seconds. After every arrival and discharge the
+simulation keeps calling admit_patient() until it fails, exactly as staff
+would press "Admit Next Patient".
+
+    python simulation.py --days 365 --arrivals-per-hour 2.5 --seed 7
+    python simulation.py --days 30 --json > report.json
+
+The report covers throughput, waiting times per priority, bed occupancy and
+doctor utilization (both time-weighted over the simulated period).
+"""
+import argparse
+import heapq
+import json
+import math
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from clock import VirtualClock
+from main import HospitalManagementSystem, Priority
+
+ARRIVAL, DISCHARGE = 0, 1
+
+
+class Scenario:
+    """Arrival process, patient mix and the staff and rooms added on top of the default hospital"""
+
+    def __init__(self, days=365, arrivals_per_hour=2.0, priority_mix=None, median_stay_hours=None,
+                 stay_sigma=0.6, rooms=None, doctors=None, start=None):
+        self.days = days
+        self.arrivals_per_hour = arrivals_per_hour
+        # Share of arrivals per priority
+        self.priority_mix = priority_mix or {Priority.CRITICAL: 0.05, Priority.HIGH: 0.15,
+                                             Priority.MEDIUM: 0.5, Priority.LOW: 0.3}
+        # Length of stay is log-normal with this median per priority
+        self.median_stay_hours = median_stay_hours or {Priority.CRITICAL: 96, Priority.HIGH: 48,
+                                                       Priority.MEDIUM: 24, Priority.LOW: 8}
+        self.stay_sigma = stay_sigma
+        # room type -> (number of rooms, beds per room)
+        self.rooms = rooms if rooms is not None else {"ICU": (8, 1), "Emergency": (6, 1),
+                                                      "General": (20, 2), "Private": (10, 1)}
+        # (specialization, max patients) for each extra doctor
+        self.doctors = doctors if doctors is not None else [
+            ("Cardiology", 10), ("Neurology", 10), ("Emergency Medicine", 10), ("Orthopedics", 10),
+            ("Pediatrics", 10)]
+        self.start = start or datetime(2025, 1, 1)
+
+
+# Conditions per priority, chosen so triage routes them to rooms and specialists
+CONDITIONS = {
+    Priority.CRITICAL: ["stroke", "cardiac arrest", "severe bleeding", "overdose"],
+    Priority.HIGH: ["fracture", "chest pain", "high fever", "head injury"],
+    Priority.MEDIUM: ["abdominal pain", "migraine", "infection", "back pain"],
+    Priority.LOW: ["routine check-up", "sprain", "minor cut", "vaccination"],
+}
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+def summarize(hours):
+    ordered = sorted(hours)
+    if not ordered:
+        return {'count': 0}
+    return {'count': len(ordered), 'mean': round(sum(ordered) / len(ordered), 3),
+            'p50': round(percentile(ordered, 0.5), 3), 'p95': round(percentile(ordered, 0.95), 3),
+            'max': round(ordered[-1], 3)}
+
+
+class Simulation:
+    """Runs one Scenario against a fresh in-memory hospital"""
+
+    def __init__(self, scenario, seed=None):
+        self.scenario = scenario
+        self.random = random.Random(seed)
+        self.clock = VirtualClock(scenario.start)
+        self.hms = HospitalManagementSystem(clock=self.clock)
+        for room_type, (count, beds) in scenario.rooms.items():
+            for _ in range(count):
+                self.hms.add_room(room_type, beds)
+        for number, (specialization, max_patients) in enumerate(scenario.doctors, 1):
+            self.hms.add_doctor(f"Sim Doctor {number}", specialization, max_patients)
+        self.total_beds = sum(room.capacity for room in self.hms.rooms.values())
+        self.total_doctor_slots = sum(doctor.max_patients for doctor in self.hms.doctors.values())
+
+        self._queue = []  # (hour, seq, kind, patient_id)
+        self._seq = 0
+        self.now = 0.0  # hours since the start
+        self.arrivals = 0
+        self.discharges = 0
+        self.waits = defaultdict(list)  # priority -> hours waited before admission
+        self.arrived_at = {}  # patient_id -> hour, while waiting
+        self.failed_admissions = defaultdict(int)  # reason -> count
+        # Time-weighted integrals, advanced before every change
+        self.admitted = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.bed_hours = 0.0
+        self.waiting_hours = 0.0
+        self.doctor_load = defaultdict(int)
+        self.doctor_hours = defaultdict(float)
+        self.doctor_changed = defaultdict(float)
+
+    def _schedule(self, hour, kind, patient_id=None):
+        self._seq += 1
+        heapq.heappush(self._queue, (hour, self._seq, kind, patient_id))
+
+    def _advance(self, hour):
+        elapsed = hour - self.now
+        self.bed_hours += self.admitted * elapsed
+        self.waiting_hours += self.waiting * elapsed
+        self.now = hour
+        self.clock.advance_to(self.scenario.start + timedelta(hours=hour))
+
+    def _doctor_load_changed(self, doctor_id, change):
+        self.doctor_hours[doctor_id] += self.doctor_load[doctor_id] * (self.now - self.doctor_changed[doctor_id])
+        self.doctor_changed[doctor_id] = self.now
+        self.doctor_load[doctor_id] += change
+
+    def run(self):
+        horizon = self.scenario.days * 24.0
+        started = time.perf_counter()
+        self._schedule(self.random.expovariate(self.scenario.arrivals_per_hour), ARRIVAL)
+        while self._queue and self._queue[0][0] <= horizon:
+            hour, _, kind, patient_id = heapq.heappop(self._queue)
+            self._advance(hour)
+            if kind == ARRIVAL:
+                self._arrive()
+                self._schedule(hour + self.random.expovariate(self.scenario.arrivals_per_hour), ARRIVAL)
+            else:
+                self._discharge(patient_id)
+            self._admit_waiting()
+        self._advance(horizon)
+        return self.report(time.perf_counter() - started)
+
+    def _arrive(self):
+        priorities = list(self.scenario.priority_mix)
+        priority = self.random.choices(priorities, [self.scenario.priority_mix[p] for p in priorities])[0]
+        condition = self.random.choice(CONDITIONS.get(priority, CONDITIONS[Priority.MEDIUM]))
+        self.arrivals += 1
+        result = self.hms.register_patient(f"Sim Patient {self.arrivals}", self.random.randint(1, 95),
+                                           condition, priority)
+        self.arrived_at[result.data.patient_id] = self.now
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def _admit_waiting(self):
+        while self.waiting:
+            result = self.hms.admit_patient()
+            if not result:
+                self.failed_admissions[result.details.get('reason', 'other')] += 1
+                return
+            patient = result.data
+            self.waits[patient.priority].append(self.now - self.arrived_at.pop(patient.patient_id))
+            self.waiting -= 1
+            self.admitted += 1
+            self._doctor_load_changed(patient.assigned_doctor, 1)
+            median = self.scenario.median_stay_hours[patient.priority]
+            stay = self.random.lognormvariate(math.log(median), self.scenario.stay_sigma)
+            self._schedule(self.now + stay, DISCHARGE, patient.patient_id)
+
+    def _discharge(self, patient_id):
+        doctor_id = self.hms.patients[patient_id].assigned_doctor
+        self.hms.discharge_patient(patient_id)
+        self.discharges += 1
+        self.admitted -= 1
+        self._doctor_load_changed(doctor_id, -1)
+
+    def report(self, wall_seconds):
+        hours = self.now or 1.0
+        for doctor_id in self.hms.doctors:
+            self._doctor_load_changed(doctor_id, 0)
+        all_waits = [wait for waits in self.waits.values() for wait in waits]
+        return {
+            'simulated_days': self.scenario.days,
+            'wall_seconds': round(wall_seconds, 3),
+            'arrivals': self.arrivals,
+            'admissions': len(all_waits),
+            'discharges': self.discharges,
+            'still_waiting': self.waiting,
+            'still_admitted': self.admitted,
+            'admissions_per_day': round(len(all_waits) / (hours / 24), 3),
+            'wait_hours': summarize(all_waits),
+            'wait_hours_by_priority': {Priority.LABELS.get(priority, str(priority)): summarize(waits)
+                                       for priority, waits in sorted(self.waits.items())},
+            'average_waiting': round(self.waiting_hours / hours, 3),
+            'max_waiting': self.max_waiting,
+            'failed_admission_attempts': dict(self.failed_admissions),
+            'total_beds': self.total_beds,
+            'bed_occupancy': round(self.bed_hours / (hours * self.total_beds), 4) if self.total_beds else None,
+            'doctor_utilization': round(sum(self.doctor_hours.values()) / (hours * self.total_doctor_slots), 4)
+                                  if self.total_doctor_slots else None,
+            'doctor_utilization_by_doctor': {
+                doctor_id: round(self.doctor_hours[doctor_id] / (hours * doctor.max_patients), 4)
+                for doctor_id, doctor in sorted(self.hms.doctors.items())},
+        }
+
+
+def print_report(report):
+    print(f"Simulated {report['simulated_days']} days in {report['wall_seconds']}s")
+    print(f"Arrivals: {report['arrivals']} | Admissions: {report['admissions']} "
+          f"({report['admissions_per_day']}/day) | Discharges: {report['discharges']}")
+    print(f"Still waiting: {report['still_waiting']} | Still admitted: {report['still_admitted']}")
+    print(f"Average queue length: {report['average_waiting']} (max {report['max_waiting']})")
+    print("Wait before admission (hours):")
+    for label, summary in report['wait_hours_by_priority'].items():
+        if summary['count']:
+            print(f"  {label:<8} n={summary['count']:<7} mean={summary['mean']:<8} p50={summary['p50']:<8} "
+                  f"p95={summary['p95']:<8} max={summary['max']}")
+    print(f"Bed occupancy: {report['bed_occupancy']:.1%} of {report['total_beds']} beds")
+    print(f"Doctor utilization: {report['doctor_utilization']:.1%}")
+    for doctor_id, utilization in report['doctor_utilization_by_doctor'].items():
+        print(f"  {doctor_id}: {utilization:.1%}")
+    if report['failed_admission_attempts']:
+        print(f"Blocked admission attempts: {report['failed_admission_attempts']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate patient flow on a virtual clock")
+    parser.add_argument("--days", type=float, default=365)
+    parser.add_argument("--arrivals-per-hour", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, help="random seed, for repeatable runs")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = Simulation(Scenario(days=args.days, arrivals_per_hour=args.arrivals_per_hour), args.seed).run()
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
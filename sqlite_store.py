@@ -0,0 +1,398 @@
+"""SQLite storage engine for HospitalManagementSystem.
+
+Patients, doctors, rooms, appointments and medical history live in a local
+SQLite database. At startup only live records are loaded into memory:
+doctors, rooms, patients who have not been discharged and appointments still
+to come. Closed records stay in the database and are read on demand through
+the connection pool (find_patient, search_patients). Mutations are buffered and
+written in batches by a background thread: consecutive records of the same
+kind become one executemany() call, and a whole batch commits in one
+transaction, so the thread recording a mutation never waits for the disk.
+
+Reports run on a small pool of read connections (the database uses WAL
+journaling, so readers never block the writer) and can scan history far
+larger than what is held in memory.
+
+    python sqlite_store.py hospital.db        # print a census report
+"""
+import argparse
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from main import AppointmentStatus, Patient, PatientStatus
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS doctors (
+    doctor_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    specialization TEXT NOT NULL,
+    max_patients INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rooms (
+    room_number TEXT PRIMARY KEY,
+    room_type TEXT NOT NULL,
+    capacity INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_rooms_room_type ON rooms(room_type);
+CREATE TABLE IF NOT EXISTS patients (
+    patient_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    condition TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    admission_time TEXT NOT NULL,
+    status TEXT NOT NULL,
+    room_number TEXT,
+    assigned_doctor TEXT,
+    arrival_seq INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_patients_status ON patients(status);
+CREATE TABLE IF NOT EXISTS medical_history (
+    patient_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_medical_history_patient ON medical_history(patient_id);
+CREATE TABLE IF NOT EXISTS appointments (
+    appointment_id TEXT PRIMARY KEY,
+    patient_id TEXT NOT NULL,
+    doctor_id TEXT NOT NULL,
+    appointment_time TEXT NOT NULL,
+    appointment_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    notes TEXT NOT NULL DEFAULT '',
+    duration_minutes INTEGER NOT NULL DEFAULT 30
+);
+CREATE INDEX IF NOT EXISTS idx_appointments_time ON appointments(appointment_time);
+CREATE INDEX IF NOT EXISTS idx_appointments_patient ON appointments(patient_id);
+CREATE INDEX IF NOT EXISTS idx_appointments_doctor ON appointments(doctor_id);
+"""
+
+INSERT_PATIENT = """INSERT OR REPLACE INTO patients
+    (patient_id, name, age, condition, priority, admission_time, status, room_number, assigned_doctor, arrival_seq)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+INSERT_HISTORY = "INSERT INTO medical_history (patient_id, timestamp, record) VALUES (?, ?, ?)"
+ADMIT_PATIENT = "UPDATE patients SET status = ?, room_number = ?, assigned_doctor = ? WHERE patient_id = ?"
+DISCHARGE_PATIENT = "UPDATE patients SET status = ?, room_number = NULL, assigned_doctor = NULL WHERE patient_id = ?"
+RETRIAGE_PATIENT = "UPDATE patients SET priority = ? WHERE patient_id = ?"
+DELETE_PATIENT = "DELETE FROM patients WHERE patient_id = ?"
+DELETE_HISTORY = "DELETE FROM medical_history WHERE patient_id = ?"
+DELETE_APPOINTMENT = "DELETE FROM appointments WHERE appointment_id = ?"
+DELETE_DOCTOR = "DELETE FROM doctors WHERE doctor_id = ?"
+DELETE_ROOM = "DELETE FROM rooms WHERE room_number = ?"
+INSERT_APPOINTMENT = """INSERT OR REPLACE INTO appointments
+    (appointment_id, patient_id, doctor_id, appointment_time, appointment_type, status, notes, duration_minutes)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)"""
+INSERT_DOCTOR = "INSERT OR REPLACE INTO doctors (doctor_id, name, specialization, max_patients) VALUES (?, ?, ?, ?)"
+INSERT_ROOM = "INSERT OR REPLACE INTO rooms (room_number, room_type, capacity) VALUES (?, ?, ?)"
+
+
+def _patient_rows(payload):
+    yield INSERT_PATIENT, (payload['patient_id'], payload['name'], payload['age'], payload['condition'],
+                           payload['priority'], payload['admission_time'], payload['status'],
+                           payload['room_number'], payload['assigned_doctor'], payload.get('arrival_seq', 0))
+    for timestamp, record in payload.get('medical_history', ()):
+        yield INSERT_HISTORY, (payload['patient_id'], timestamp, record)
+
+
+def _appointment_rows(payload):
+    yield INSERT_APPOINTMENT, (payload['appointment_id'], payload['patient_id'], payload['doctor_id'],
+                               payload['appointment_time'], payload['appointment_type'],
+                               payload['status'], payload['notes'], payload['duration_minutes'])
+
+
+# Operation recorded by HospitalManagementSystem -> (statement, parameters) rows
+OPERATION_ROWS = {
+    'register': _patient_rows,
+    'admit': lambda p: [(ADMIT_PATIENT, (PatientStatus.ADMITTED, p['room_number'], p['doctor_id'],
+                                         p['patient_id']))],
+    'discharge': lambda p: [(DISCHARGE_PATIENT, (PatientStatus.DISCHARGED, p['patient_id']))],
+    'appointment': _appointment_rows,
+    'add_doctor': lambda p: [(INSERT_DOCTOR, (p['doctor_id'], p['name'], p['specialization'], p['max_patients']))],
+    'add_room': lambda p: [(INSERT_ROOM, (p['room_number'], p['room_type'], p['capacity']))],
+    'retriage': lambda p: [(RETRIAGE_PATIENT, (p['priority'], p['patient_id']))],
+    'unregister': lambda p: [(DELETE_HISTORY, (p['patient_id'],)), (DELETE_PATIENT, (p['patient_id'],))],
+    'unadmit': lambda p: [(DISCHARGE_PATIENT, (PatientStatus.WAITING, p['patient_id']))],
+    'remove_appointment': lambda p: [(DELETE_APPOINTMENT, (p['appointment_id'],))],
+    'remove_doctor': lambda p: [(DELETE_DOCTOR, (p['doctor_id'],))],
+    'remove_room': lambda p: [(DELETE_ROOM, (p['room_number'],))],
+}
+
+
+def connect(path):
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class ConnectionPool:
+    """Fixed-size pool of read connections shared between threads"""
+
+    def __init__(self, path, size=4):
+        self._connections = queue.Queue()
+        for _ in range(size):
+            self._connections.put(connect(path))
+        self.size = size
+
+    @contextmanager
+    def connection(self):
+        connection = self._connections.get()
+        try:
+            yield connection
+        finally:
+            self._connections.put(connection)
+
+    def close(self):
+        for _ in range(self.size):
+            self._connections.get().close()
+
+
+class SQLiteStorage:
+    """Storage engine that writes hospital state through to SQLite.
+
+    Pass an instance as HospitalManagementSystem(storage=...); the system
+    calls attach() once at startup and record() after every mutation.
+    """
+
+    def __init__(self, path, pool_size=4, batch_size=500, flush_interval=0.2):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._writer = connect(path)
+        self._writer.executescript(SCHEMA)
+        self._migrate()
+        self._writer.commit()
+        self.pool = ConnectionPool(path, pool_size)
+        self._pending = []  # (statement, parameters) in operation order
+        self._lock = threading.Lock()  # Guards the buffer, never held while writing to the database
+        self._io_lock = threading.Lock()  # Held by whoever is writing the buffer out
+        self._wake = threading.Condition(self._lock)
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, name="sqlite-flusher", daemon=True)
+        self._flusher.start()
+
+    def _migrate(self):
+        """Add columns introduced after a database was created"""
+        columns = {row['name'] for row in self._writer.execute("PRAGMA table_info(appointments)")}
+        if 'duration_minutes' not in columns:
+            self._writer.execute("ALTER TABLE appointments ADD COLUMN duration_minutes INTEGER NOT NULL DEFAULT 30")
+        columns = {row['name'] for row in self._writer.execute("PRAGMA table_info(patients)")}
+        if 'arrival_seq' not in columns:
+            self._writer.execute("ALTER TABLE patients ADD COLUMN arrival_seq INTEGER NOT NULL DEFAULT 0")
+
+    # ---------- Loading ----------
+    def attach(self, hms):
+        """Load the live part of the stored hospital into hms; returns False for an empty database"""
+        state = self.load_state(hms.clock.now())
+        if not state['doctors'] and not state['rooms'] and not state['patients'] \
+                and not state['archive']['patients_by_status']:
+            return False
+        hms.load_state(state)
+        hms.archive = self
+        return True
+
+    def load_state(self, now=None):
+        """Read the live records in the format of HospitalManagementSystem.export_state().
+
+        Discharged patients and appointments that are cancelled, completed or
+        over by now are left in the database; state['archive'] counts them by
+        status and lists the IDs of the patients among them.
+        """
+        now = now or datetime.now()
+        # Appointments last at most 480 minutes, so older ones are over
+        earliest = (now - timedelta(minutes=480)).isoformat()
+        with self.pool.connection() as db:
+            doctors = [dict(row) for row in db.execute("SELECT * FROM doctors ORDER BY rowid")]
+            rooms = [dict(row) for row in db.execute("SELECT * FROM rooms ORDER BY rowid")]
+            history = {}
+            for row in db.execute("SELECT h.patient_id, h.timestamp, h.record FROM medical_history h "
+                                  "JOIN patients p ON p.patient_id = h.patient_id WHERE p.status != ? "
+                                  "ORDER BY h.rowid", (PatientStatus.DISCHARGED,)):
+                history.setdefault(row['patient_id'], []).append([row['timestamp'], row['record']])
+            patients = []
+            for row in db.execute("SELECT * FROM patients WHERE status != ? ORDER BY rowid",
+                                  (PatientStatus.DISCHARGED,)):
+                patient = dict(row)
+                patient['medical_history'] = history.get(patient['patient_id'], [])
+                patients.append(patient)
+            appointments = [dict(row) for row in db.execute(
+                "SELECT * FROM appointments WHERE status = ? AND appointment_time >= ? ORDER BY appointment_time",
+                (AppointmentStatus.SCHEDULED, earliest))]
+            appointments = [row for row in appointments if datetime.fromisoformat(row['appointment_time'])
+                            + timedelta(minutes=row['duration_minutes']) > now]
+            discharged = [row[0] for row in db.execute("SELECT patient_id FROM patients WHERE status = ?",
+                                                       (PatientStatus.DISCHARGED,))]
+            last_number = db.execute(
+                "SELECT MAX(CAST(SUBSTR(patient_id, 2) AS INTEGER)) FROM patients "
+                "WHERE status = ? AND patient_id GLOB 'P[0-9]*'", (PatientStatus.DISCHARGED,)).fetchone()[0]
+            closed = {row['status']: row['count'] for row in db.execute(
+                "SELECT status, COUNT(*) AS count FROM appointments GROUP BY status")}
+        closed[AppointmentStatus.SCHEDULED] = closed.get(AppointmentStatus.SCHEDULED, 0) - len(appointments)
+
+        # The queues order waiting patients by arrival_seq (by row order in older databases)
+        waiting = [p for p in patients if p['status'] == PatientStatus.WAITING]
+        emergency = [p for p in waiting if p['priority'] <= 2]
+        return {
+            'doctors': doctors,
+            'rooms': rooms,
+            'patients': patients,
+            'emergency_queue': [p['patient_id'] for p in emergency],
+            'regular_queue': [p['patient_id'] for p in waiting if p['priority'] > 2],
+            'appointments': appointments,
+            'archive': {
+                'patients_by_status': {PatientStatus.DISCHARGED: len(discharged)} if discharged else {},
+                'patient_ids': discharged,
+                'appointments_by_status': {status: count for status, count in closed.items() if count},
+                'last_ids': {'P': last_number or 0},
+            },
+        }
+
+    # ---------- Writing ----------
+    def record(self, op, payload):
+        rows = OPERATION_ROWS.get(op)
+        if rows is None:
+            raise ValueError(f"SQLite storage cannot record operation: {op}")
+        with self._lock:
+            self._pending.extend(rows(payload))
+            if len(self._pending) >= self.batch_size:
+                self._wake.notify()
+
+    def bulk_record(self, op, payloads):
+        """Record many operations of one kind, e.g. a bulk patient import"""
+        rows = OPERATION_ROWS[op]
+        with self._lock:
+            for payload in payloads:
+                self._pending.extend(rows(payload))
+            self._wake.notify()
+
+    def flush(self):
+        self._flush()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wake.notify()
+        self._flusher.join()
+        self._flush()
+        self._writer.close()
+        self.pool.close()
+
+    def _flush(self):
+        """Write the buffer out in one transaction; records carry on meanwhile"""
+        with self._io_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return
+            with self._writer:  # one transaction per batch
+                start = 0
+                while start < len(pending):
+                    # Run consecutive rows for the same statement as one executemany()
+                    statement = pending[start][0]
+                    end = start
+                    while end < len(pending) and pending[end][0] == statement:
+                        end += 1
+                    self._writer.executemany(statement, [params for _, params in pending[start:end]])
+                    start = end
+
+    def _flush_loop(self):
+        while True:
+            with self._lock:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._wake.wait(self.flush_interval)
+                if self._closed:
+                    return
+            self._flush()
+
+    # ---------- Reports ----------
+    def query(self, sql, params=()):
+        """Run a read-only query on a pooled connection and return the rows as dicts"""
+        with self.pool.connection() as db:
+            return [dict(row) for row in db.execute(sql, params)]
+
+    def census(self):
+        """Patient counts by status"""
+        rows = self.query("SELECT status, COUNT(*) AS count FROM patients GROUP BY status")
+        return {row['status']: row['count'] for row in rows}
+
+    def occupancy_by_room_type(self):
+        """Beds and admitted patients per room type"""
+        return self.query("""
+            SELECT r.room_type, SUM(r.capacity) AS beds,
+                   (SELECT COUNT(*) FROM patients p JOIN rooms x ON p.room_number = x.room_number
+                    WHERE x.room_type = r.room_type AND p.status = ?) AS occupied
+            FROM rooms r GROUP BY r.room_type ORDER BY r.room_type""", (PatientStatus.ADMITTED,))
+
+    def appointments_between(self, start, end):
+        """Appointments with start <= appointment_time < end (datetimes or ISO strings)"""
+        start = start.isoformat() if hasattr(start, 'isoformat') else start
+        end = end.isoformat() if hasattr(end, 'isoformat') else end
+        return self.query("SELECT * FROM appointments WHERE appointment_time >= ? AND appointment_time < ? "
+                          "ORDER BY appointment_time", (start, end))
+
+    def patients_with_status(self, status, limit=100, offset=0):
+        return self.query("SELECT * FROM patients WHERE status = ? ORDER BY patient_id LIMIT ? OFFSET ?",
+                          (status, limit, offset))
+
+    def medical_history(self, patient_id):
+        return self.query("SELECT timestamp, record FROM medical_history WHERE patient_id = ? ORDER BY rowid",
+                          (patient_id,))
+
+    # ---------- Closed records ----------
+    def find_patient(self, patient_id):
+        """The stored patient with this ID, medical history included, or None"""
+        patients = self._patients("SELECT * FROM patients WHERE patient_id = ?", (patient_id,))
+        return patients[0] if patients else None
+
+    def search_patients(self, query, limit=10):
+        """Discharged patients whose name starts with query, case-insensitively"""
+        query = query.strip()
+        if not query:
+            return []
+        pattern = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return self._patients("SELECT * FROM patients WHERE status = ? AND name LIKE ? ESCAPE '\\' "
+                              "ORDER BY name, patient_id LIMIT ?", (PatientStatus.DISCHARGED, pattern, limit))
+
+    def _patients(self, sql, params):
+        """Detached Patient objects for the rows sql selects"""
+        with self.pool.connection() as db:
+            rows = [dict(row) for row in db.execute(sql, params)]
+            if not rows:
+                return []
+            history = {}
+            marks = ", ".join("?" * len(rows))
+            for row in db.execute(f"SELECT patient_id, timestamp, record FROM medical_history "
+                                  f"WHERE patient_id IN ({marks}) ORDER BY rowid", [row['patient_id'] for row in rows]):
+                history.setdefault(row['patient_id'], []).append([row['timestamp'], row['record']])
+        for row in rows:
+            row['medical_history'] = history.get(row['patient_id'], [])
+        return [Patient.from_dict(row) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Census report from a hospital SQLite database")
+    parser.add_argument("database")
+    args = parser.parse_args()
+
+    storage = SQLiteStorage(args.database)
+    try:
+        print(f"\n========== Census Report ({args.database}) ==========")
+        for status, count in sorted(storage.census().items()):
+            print(f"  {status}: {count}")
+        print("\nOccupancy by Room Type:")
+        for row in storage.occupancy_by_room_type():
+            print(f"  {row['room_type']}: {row['occupied']} of {row['beds']} bed(s) occupied")
+    finally:
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
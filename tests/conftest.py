@@ -0,0 +1,59 @@
+import os
+import sys
+from datetime import timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clock import VirtualClock  # noqa: E402
+from main import Patient  # noqa: E402
+
+CONDITIONS = ["stroke", "fracture", "chest pain", "migraine", "flu", "sprain", "infection", "check-up"]
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock()
+
+
+@pytest.fixture
+def populate():
+    """Fill a hospital with waiting, admitted and discharged patients and some appointments"""
+    def populate(hms, patients=12):
+        for number in range(patients):
+            condition = CONDITIONS[number % len(CONDITIONS)]
+            if number % 4 == 0:
+                # Registered with a medical history, as a transfer would be
+                patient = Patient(f"T{number:03d}", f"Transfer {number}", 30 + number, condition, 1 + number % 4,
+                                  hms.clock.now())
+                patient.add_medical_record(f"Referred for {condition}", hms.clock.now())
+                hms.enqueue_patient(patient)
+            else:
+                hms.register_patient(f"Patient {number}", 30 + number, condition, 1 + number % 4)
+        admitted = [hms.admit_patient().data for _ in range(4)]
+        hms.discharge_patient(admitted[0].patient_id)
+        waiting = hms.emergency_queue.peek() or hms.regular_queue.peek()
+        hms.retriage_patient(waiting.patient_id, 4 if waiting.priority <= 2 else 1)
+        doctor_id = sorted(hms.doctors)[0]
+        start = hms.clock.now() + timedelta(days=1)
+        for offset, patient in enumerate(admitted[1:]):
+            hms.schedule_appointment(patient.patient_id, doctor_id, start + timedelta(hours=offset))
+        return hms
+    return populate
+
+
+@pytest.fixture
+def snapshot():
+    """Everything observable about a hospital's records, in a comparable form"""
+    def snapshot(hms):
+        state = hms.export_state()
+        for kind, key in (('doctors', 'doctor_id'), ('rooms', 'room_number'), ('patients', 'patient_id'),
+                          ('appointments', 'appointment_id')):
+            state[kind].sort(key=lambda record: record[key])
+        state['occupants'] = {number: sorted(room.patients) for number, room in hms.rooms.items()}
+        state['doctor_patients'] = {doctor_id: sorted(doctor.current_patients)
+                                    for doctor_id, doctor in hms.doctors.items()}
+        state['statistics'] = hms.get_statistics()
+        return state
+    return snapshot
@@ -0,0 +1,40 @@
+"""Batch admission: beds and doctors chosen together"""
+import pytest
+
+from main import HospitalManagementSystem, PatientStatus
+
+
+@pytest.fixture
+def hms(clock):
+    hms = HospitalManagementSystem(clock=clock, seed_defaults=False)
+    hms.add_room("General", room_number="201")
+    hms.add_room("ICU", room_number="101")
+    hms.add_doctor("Bone", "Orthopedics", max_patients=1, doctor_id="D002")
+    hms.add_doctor("Heart", "Cardiology", max_patients=1, doctor_id="D001")
+    yield hms
+    hms.close()
+
+
+def test_batch_matches_rooms_and_specialists(hms):
+    fracture = hms.register_patient("Ann Lee", 40, "fracture", 3).data
+    chest = hms.register_patient("Bob Ray", 60, "chest pain", 1).data
+    flu = hms.register_patient("Cy Dunn", 30, "flu", 4).data
+    result = hms.admit_batch(5)
+    assert result and result.data == [chest, fracture]
+    # The most urgent patient gets the preferred ICU bed and the cardiologist
+    assert (chest.room_number, chest.assigned_doctor) == ("101", "D001")
+    assert (fracture.room_number, fracture.assigned_doctor) == ("201", "D002")
+    assert result.details["requeued"] == [flu]
+    assert flu.status == PatientStatus.WAITING and flu.patient_id in hms.regular_queue
+
+
+def test_batch_reports_why_nobody_was_admitted(hms):
+    assert not hms.admit_batch()
+    for number in range(2):
+        hms.register_patient(f"Patient {number}", 40, "sprain", 3)
+    assert hms.admit_batch(2)
+    hms.add_doctor("Spare", "Cardiology", max_patients=1)
+    waiting = hms.register_patient("Di Moss", 40, "sprain", 3).data
+    result = hms.admit_batch()
+    assert not result and result.details["reason"] == "no_room"
+    assert result.details["requeued"] == [waiting] and waiting.patient_id in hms.regular_queue
@@ -0,0 +1,64 @@
+"""Time-ordered appointment index: ranges, next N and cursor pages"""
+import random
+from datetime import datetime, timedelta
+
+from main import Appointment, AppointmentIndex, AppointmentStatus
+
+START = datetime(2025, 1, 1, 8)
+
+
+def build(count=60, seed=7):
+    rng = random.Random(seed)
+    index = AppointmentIndex()
+    appointments = []
+    for number in range(count):
+        # Several appointments share each start time
+        appointment = Appointment(f"P{rng.randrange(5):03d}", f"D{rng.randrange(3):03d}",
+                                  START + timedelta(hours=rng.randrange(20)))
+        appointment.appointment_id = f"A{number:03d}"
+        if number % 5 == 0:
+            appointment.status = AppointmentStatus.CANCELLED
+        index.add(appointment)
+        appointments.append(appointment)
+    return index, appointments
+
+
+def ordered(appointments):
+    return sorted(appointments, key=lambda a: (a.appointment_time, a.appointment_id))
+
+
+def test_between_filters_and_orders():
+    index, appointments = build()
+    start, end = START + timedelta(hours=4), START + timedelta(hours=12)
+    expected = ordered(a for a in appointments
+                       if start <= a.appointment_time < end and a.doctor_id == "D001"
+                       and a.status == AppointmentStatus.SCHEDULED)
+    assert list(index.between(start, end, doctor_id="D001", status=AppointmentStatus.SCHEDULED)) == expected
+    assert list(index.between()) == ordered(appointments)
+    assert list(index.between(patient_id="P999")) == []
+
+
+def test_upcoming_skips_past_and_cancelled():
+    index, appointments = build()
+    now = START + timedelta(hours=10)
+    expected = ordered(a for a in appointments
+                       if a.appointment_time >= now and a.status == AppointmentStatus.SCHEDULED)[:4]
+    assert index.upcoming(4, now) == expected
+
+
+def test_pages_cover_everything_once_across_changes():
+    index, appointments = build()
+    seen, cursor = [], None
+    while True:
+        page, cursor = index.page(cursor, limit=7, patient_id="P002")
+        seen.extend(page)
+        if cursor is None:
+            break
+        # A status change between pages does not move the cursor
+        old_status, page[0].status = page[0].status, AppointmentStatus.COMPLETED
+        index.status_changed(page[0], old_status)
+    assert seen == ordered(a for a in appointments if a.patient_id == "P002")
+    for appointment in appointments[:10]:
+        index.remove(appointment)
+    assert len(index) == len(appointments) - 10
+    assert list(index.between()) == ordered(appointments[10:])
@@ -0,0 +1,60 @@
+"""Min-cost assignment, checked against brute force on small instances"""
+import itertools
+import random
+
+import pytest
+
+from main import min_cost_assignment, min_cost_double_assignment
+
+
+def brute_force(costs, capacities):
+    best = None
+    for columns in itertools.product(range(len(capacities)), repeat=len(costs)):
+        if all(columns.count(t) <= capacity for t, capacity in enumerate(capacities)):
+            total = sum(costs[i][t] for i, t in enumerate(columns))
+            best = total if best is None else min(best, total)
+    return best
+
+
+def test_scarce_column_goes_to_the_row_that_needs_it():
+    # Row 0 has a cheap fallback, row 1 does not, so row 1 gets the only ICU bed
+    costs = [[0, 1], [0, 10]]
+    assert min_cost_assignment(costs, [1, 5]) == [1, 0]
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_min_cost_assignment_is_optimal(seed):
+    rng = random.Random(seed)
+    rows, columns = rng.randint(1, 5), rng.randint(1, 3)
+    capacities = [rng.randint(0, 3) for _ in range(columns)]
+    capacities[0] += max(0, rows - sum(capacities))
+    costs = [[rng.randint(0, 9) for _ in range(columns)] for _ in range(rows)]
+    chosen = min_cost_assignment(costs, capacities)
+    assert all(chosen.count(t) <= capacity for t, capacity in enumerate(capacities))
+    assert sum(costs[i][t] for i, t in enumerate(chosen)) == brute_force(costs, capacities)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_min_cost_double_assignment_is_optimal(seed):
+    rng = random.Random(seed)
+    rows, firsts, seconds = rng.randint(1, 4), rng.randint(1, 3), rng.randint(1, 3)
+    first_capacities = [rng.randint(0, 2) for _ in range(firsts)]
+    second_capacities = [rng.randint(0, 2) for _ in range(seconds)]
+    first_capacities[0] += max(0, rows - sum(first_capacities))
+    second_capacities[0] += max(0, rows - sum(second_capacities))
+    first_costs = [[rng.randint(0, 9) for _ in range(firsts)] for _ in range(rows)]
+    second_costs = [[rng.randint(0, 9) for _ in range(seconds)] for _ in range(rows)]
+
+    pairs = min_cost_double_assignment(first_costs, first_capacities, second_costs, second_capacities)
+    for f, capacity in enumerate(first_capacities):
+        assert sum(1 for first, _ in pairs if first == f) <= capacity
+    for t, capacity in enumerate(second_capacities):
+        assert sum(1 for _, second in pairs if second == t) <= capacity
+    # With independent costs the optimum is the sum of the two separate optima
+    total = sum(first_costs[i][f] + second_costs[i][t] for i, (f, t) in enumerate(pairs))
+    assert total == brute_force(first_costs, first_capacities) + brute_force(second_costs, second_capacities)
+
+
+def test_not_enough_capacity_raises():
+    with pytest.raises(ValueError):
+        min_cost_assignment([[0], [0]], [1])
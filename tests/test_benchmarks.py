@@ -0,0 +1,31 @@
+"""Benchmark suite at a tiny size"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import run_benchmarks  # noqa: E402
+
+OPERATIONS = ['build', 'register', 'search', 'inorder', 'admit', 'discharge', 'appointment', 'statistics',
+              'undo', 'redo']
+
+
+def test_run_size_times_every_operation():
+    results = run_benchmarks.run_size(200, 20, seed=1)
+    assert [row['op'] for row in results] == OPERATIONS
+    assert all(row['size'] == 200 and row['ops_per_sec'] for row in results)
+    assert {row['calls'] for row in results if row['op'] in ('register', 'search', 'admit')} == {20}
+
+
+def test_report_and_comparison(tmp_path, capsys):
+    report = tmp_path / "report.json"
+    assert run_benchmarks.main(["--sizes", "100", "--sample", "10", "--output", str(report)]) == 0
+    results = json.loads(report.read_text())['results']
+    assert [row['op'] for row in results] == OPERATIONS
+    # A baseline ten times faster than now flags a regression
+    faster = tmp_path / "faster.json"
+    faster.write_text(json.dumps({'results': [dict(row, ops_per_sec=row['ops_per_sec'] * 10) for row in results]}))
+    assert run_benchmarks.compare(results[:1], str(faster), 0.10) == 1
+    assert run_benchmarks.compare(results[:1], str(report), 100) == 0
+    assert "REGRESSION" in capsys.readouterr().out
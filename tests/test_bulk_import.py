@@ -0,0 +1,74 @@
+"""Streaming bulk import"""
+import json
+
+from bulk_import import PatientImporter, import_patients
+from main import HospitalManagementSystem
+
+
+def check_unique(hms):
+    queued = hms.emergency_queue.in_order() + hms.regular_queue.in_order()
+    assert len(hms.patient_bst) == len(hms.patients)
+    assert all(hms.patients[patient.patient_id] is patient for patient in queued)
+    assert len({patient.patient_id for patient in queued}) == len(queued)
+
+
+def test_desk_registration_during_import_keeps_both(tmp_path, clock):
+    hms = HospitalManagementSystem(clock=clock)
+    desk = []
+
+    def rows():
+        for number in range(1, 11):
+            if number == 6:
+                # A desk registers while the batch is being read but before it is flushed
+                desk.append(hms.register_patient("Desk Patient", 40, "flu", 3).data)
+            yield number, {"name": f"Imported {number}", "age": 30, "condition": "flu", "priority": 3}
+        yield 11, {"name": "Clashing Transfer", "age": 30, "condition": "flu", "patient_id": desk[0].patient_id}
+
+    reject_path = tmp_path / "rejects.jsonl"
+    report = PatientImporter(hms, str(reject_path), batch_size=100).run(rows())
+    assert (report.imported, report.rejected) == (10, 1)
+    assert hms.patients[desk[0].patient_id] is desk[0]
+    assert len(hms.patients) == 11
+    check_unique(hms)
+    reject = json.loads(reject_path.read_text().splitlines()[0])
+    assert reject["line"] == 11 and "already exists" in reject["error"]
+    hms.close()
+
+
+def test_csv_import_rejects_bad_rows(tmp_path, clock):
+    source = tmp_path / "transfers.csv"
+    source.write_text("name,age,condition,priority,patient_id\n"
+                      "Ann Lee,34,chest pain,,\n"
+                      "X,34,flu,3,\n"
+                      "Bob Ray,200,flu,3,\n"
+                      "Cy Dunn,51,migraine,4,T100\n"
+                      "Di Moss,51,migraine,4,T100\n")
+    hms = HospitalManagementSystem(clock=clock)
+    report = import_patients(hms, str(source), batch_size=2)
+    assert (report.imported, report.rejected) == (2, 3)
+    assert report.emergency == 1 and report.regular == 1
+    rejected = [json.loads(line)["line"] for line in open(report.reject_path)]
+    assert sorted(rejected) == [3, 4, 6]
+    assert hms.patients["T100"].name == "Cy Dunn"
+    check_unique(hms)
+    hms.close()
+
+
+def test_jsonl_import_streams_in_batches(tmp_path, clock):
+    source = tmp_path / "transfers.jsonl"
+    lines = [json.dumps({"name": f"Transfer {number}", "age": 40, "condition": "fracture", "priority": 3})
+             for number in range(7)]
+    lines[3] = "{not json"
+    lines.insert(5, "")
+    lines.append(json.dumps(["not", "an", "object"]))
+    source.write_text("\n".join(lines) + "\n")
+    hms = HospitalManagementSystem(clock=clock)
+    progress = []
+    report = import_patients(hms, str(source), str(tmp_path / "bad.jsonl"), batch_size=2,
+                             progress=lambda report: progress.append(report.imported))
+    assert (report.imported, report.rejected) == (6, 2)
+    assert progress == [2, 4, 6]
+    errors = {json.loads(line)["line"]: json.loads(line)["error"] for line in open(report.reject_path)}
+    assert errors == {4: "Record is not a JSON object", 9: "Record is not a JSON object"}
+    check_unique(hms)
+    hms.close()
@@ -0,0 +1,59 @@
+"""Per-doctor appointment calendar and conflict detection"""
+from datetime import datetime, timedelta
+
+from main import Appointment, DoctorCalendar, HospitalManagementSystem
+
+NINE = datetime(2025, 1, 2, 9)
+
+
+def at(minutes, duration=30, appointment_id=None):
+    appointment = Appointment("P001", "D001", NINE + timedelta(minutes=minutes), duration_minutes=duration)
+    appointment.appointment_id = appointment_id or f"A{minutes:04d}"
+    return appointment
+
+
+def brute_overlapping(appointments, start, end):
+    return sorted(a.appointment_id for a in appointments if a.appointment_time < end and start < a.end_time)
+
+
+def test_overlapping_matches_a_scan():
+    calendar = DoctorCalendar()
+    appointments = [at(0, 240, "LONG"), at(30), at(60), at(90, 15), at(300, 60)]
+    for appointment in appointments:
+        calendar.add(appointment)
+    for start_minutes in range(-60, 420, 15):
+        start = NINE + timedelta(minutes=start_minutes)
+        end = start + timedelta(minutes=20)
+        found = sorted(a.appointment_id for a in calendar.overlapping(start, end))
+        assert found == brute_overlapping(appointments, start, end)
+    # Back to back is not an overlap
+    assert [a.appointment_id for a in calendar.overlapping(NINE + timedelta(minutes=360),
+                                                           NINE + timedelta(minutes=390))] == []
+    assert calendar.remove(appointments[0])
+    assert calendar.overlapping(NINE + timedelta(minutes=200), NINE + timedelta(minutes=210)) == []
+
+
+def test_conflicts_lists_each_overlapping_pair_once():
+    calendar = DoctorCalendar()
+    for appointment in (at(0, 60, "A"), at(30, 60, "B"), at(45, 10, "C"), at(90, 30, "D"), at(200, 30, "E")):
+        calendar.add(appointment)
+    pairs = {(first.appointment_id, second.appointment_id) for first, second in calendar.conflicts()}
+    assert pairs == {("A", "B"), ("A", "C"), ("B", "C")}
+    # Only overlaps that reach into the window count
+    window = calendar.conflicts(NINE + timedelta(minutes=58), NINE + timedelta(minutes=120))
+    assert {(first.appointment_id, second.appointment_id) for first, second in window} == {("A", "B")}
+
+
+def test_schedule_refuses_a_double_booking(clock):
+    hms = HospitalManagementSystem(clock=clock)
+    patient = hms.register_patient("Ann Lee", 30, "fracture", 3).data
+    doctor_id = sorted(hms.doctors)[0]
+    start = clock.now() + timedelta(days=1)
+    first = hms.schedule_appointment(patient.patient_id, doctor_id, start, duration_minutes=60)
+    assert first
+    clash = hms.schedule_appointment(patient.patient_id, doctor_id, start + timedelta(minutes=30))
+    assert not clash and clash.details["reason"] == "conflict"
+    assert clash.details["conflicts"] == [first.data]
+    assert hms.schedule_appointment(patient.patient_id, doctor_id, start + timedelta(minutes=60))
+    assert hms.appointment_conflicts() == []
+    hms.close()
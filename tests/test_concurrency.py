@@ -0,0 +1,101 @@
+"""Read/write lock and a hospital shared by several desks"""
+import random
+import threading
+
+import pytest
+
+from concurrency import ReadWriteLock
+from main import HospitalManagementSystem, PatientStatus
+
+
+def in_thread(target):
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_reader_cannot_upgrade_to_writer():
+    lock = ReadWriteLock()
+    with lock.read():
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
+        # Nested reads are fine
+        with lock.read():
+            pass
+    written = []
+    in_thread(lambda: (lock.acquire_write(), written.append(lock.writing()), lock.release_write()))
+    assert written == [True] and not lock.writing()
+
+
+def test_writer_excludes_readers_but_not_its_own_reads():
+    lock = ReadWriteLock()
+    got = []
+    with lock.write():
+        with lock.read(), lock.write():
+            assert lock.writing()
+        in_thread(lambda: got.append(lock.acquire_read(blocking=False)))
+    assert got == [False]
+
+    def read_once():
+        got.append(lock.acquire_read(blocking=False))
+        lock.release_read()
+    in_thread(read_once)
+    assert got == [False, True]
+
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    both_in = threading.Barrier(2, timeout=5)
+
+    def reader():
+        with lock.read():
+            both_in.wait()  # Times out unless the other reader is in at the same time
+    threads = [threading.Thread(target=reader) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert not both_in.broken
+
+
+def test_desks_working_at_once_keep_the_records_consistent(clock):
+    hms = HospitalManagementSystem(clock=clock)
+    errors = []
+
+    def desk(number):
+        rng = random.Random(number)
+        try:
+            for step in range(150):
+                action = rng.random()
+                if action < 0.4:
+                    hms.register_patient(f"Desk {number} Patient {step}", 40, "fracture", rng.randint(1, 4))
+                elif action < 0.7:
+                    hms.admit_patient()
+                elif action < 0.85:
+                    admitted = hms.admitted_patients()
+                    if admitted:
+                        hms.discharge_patient(rng.choice(admitted).patient_id)
+                else:
+                    hms.search_patients_by_name("desk", limit=5)
+                    hms.get_statistics()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=desk, args=(number,)) for number in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    assert not errors
+    patients = list(hms.patients.values())
+    assert len({patient.patient_id for patient in patients}) == len(patients)
+    for room in hms.rooms.values():
+        assert room.occupied_beds == len(room.patients) <= room.capacity
+    for doctor in hms.doctors.values():
+        assert len(doctor.current_patients) <= doctor.max_patients
+    waiting = sorted(patient.patient_id for patient in patients if patient.status == PatientStatus.WAITING)
+    queued = hms.emergency_queue.in_order() + hms.regular_queue.in_order()
+    assert sorted(patient.patient_id for patient in queued) == waiting
+    assert hms.get_statistics()['total_patients'] == len(patients)
+    hms.close()
@@ -0,0 +1,40 @@
+"""Slotted records and their dict round trips"""
+from datetime import datetime
+
+import pytest
+
+from main import Appointment, AppointmentStatus, Doctor, Patient, PatientStatus, Room
+
+
+@pytest.mark.parametrize("record", [
+    Patient("P001", "Ann Lee", 30, "flu", 3),
+    Doctor("D001", "Ann Lee", "Cardiology"),
+    Room("101", "ICU", 2),
+    Appointment("P001", "D001", datetime(2025, 1, 2, 9)),
+])
+def test_records_have_no_instance_dict(record):
+    assert not hasattr(record, '__dict__')
+    with pytest.raises(AttributeError):
+        record.nickname = "x"
+
+
+def test_patient_round_trip(clock):
+    patient = Patient("P001", "Ann Lee", 30, "flu", 2, clock.now())
+    assert patient.medical_history == ()
+    patient.add_medical_record("Seen at triage", clock.now())
+    patient.status, patient.room_number, patient.assigned_doctor, patient.arrival_seq = \
+        PatientStatus.ADMITTED, "101", "D001", 7
+    copy = Patient.from_dict(patient.to_dict())
+    assert copy.to_dict() == patient.to_dict()
+    assert copy.medical_history[0].record == "Seen at triage"
+    assert copy.status is PatientStatus.ADMITTED
+
+
+def test_doctor_room_and_appointment_round_trips(clock):
+    doctor = Doctor("D001", "Ann Lee", "Cardiology", 4)
+    room = Room("101", "ICU", 2)
+    appointment = Appointment("P001", "D001", clock.now(), "Follow-up", 45)
+    appointment.status, appointment.notes = AppointmentStatus.COMPLETED, "fine"
+    for record in (doctor, room, appointment):
+        assert type(record).from_dict(record.to_dict()).to_dict() == record.to_dict()
+    assert Appointment.from_dict(appointment.to_dict()).status is AppointmentStatus.COMPLETED
@@ -0,0 +1,50 @@
+"""Change stream of hospital mutations"""
+from events import EventBus, EventType
+from main import HospitalManagementSystem
+
+
+def test_hospital_publishes_each_change_in_sequence(clock):
+    hms = HospitalManagementSystem(clock=clock)
+    everything = hms.events.subscribe()
+    admissions = hms.events.subscribe(kinds={EventType.PATIENT_ADMITTED})
+    patient = hms.register_patient("Ann Lee", 40, "fracture", 3).data
+    hms.admit_patient()
+    hms.discharge_patient(patient.patient_id)
+    hms.undo_last()
+    events = everything.poll()
+    assert [event.kind for event in events] == [EventType.PATIENT_REGISTERED, EventType.PATIENT_QUEUED,
+                                                EventType.PATIENT_ADMITTED, EventType.PATIENT_DISCHARGED,
+                                                EventType.PATIENT_ADMITTED]
+    assert [event.seq for event in events] == list(range(events[0].seq, events[0].seq + 5))
+    assert all(event.timestamp == clock.now() for event in events)
+    assert [event.data['patient_id'] for event in admissions.poll()] == [patient.patient_id] * 2
+    # Refused operations publish nothing
+    hms.discharge_patient("P999")
+    assert everything.poll() == []
+    hms.close()
+
+
+def test_full_buffer_drops_the_oldest_and_counts_them():
+    bus = EventBus()
+    subscription = bus.subscribe(maxlen=3)
+    for number in range(5):
+        bus.publish("tick", {'n': number})
+    assert subscription.dropped == 2
+    assert [event.seq for event in subscription.poll(max_events=2)] == [3, 4]
+    assert [event.seq for event in subscription.poll()] == [5]
+
+
+def test_failing_callback_does_not_stop_publishing():
+    bus = EventBus()
+    seen = []
+
+    def callback(event):
+        seen.append(event.seq)
+        raise RuntimeError("observer failed")
+
+    subscription = bus.subscribe(callback=callback)
+    assert bus.publish("tick", {}).seq == 1
+    bus.publish("tick", {})
+    assert seen == [1, 2] and subscription.errors == 2
+    subscription.close()
+    assert bus.publish("tick", {}) is None and bus.seq == 3
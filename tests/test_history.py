@@ -0,0 +1,135 @@
+"""Undo/redo round trips and the invariants they must keep"""
+from datetime import timedelta
+
+from history import CommandHistory
+from main import HospitalManagementSystem, PatientStatus
+
+
+def check_invariants(hms):
+    """Rooms, doctors, queues and counters agree with the patient records"""
+    admitted = {p.patient_id for p in hms.patients.values() if p.status == PatientStatus.ADMITTED}
+    for room in hms.rooms.values():
+        assert room.occupied_beds == len(room.patients) <= room.capacity
+        assert room.is_available == (room.occupied_beds < room.capacity)
+        assert all(hms.patients[patient_id].room_number == room.room_number for patient_id in room.patients)
+    for doctor in hms.doctors.values():
+        assert len(doctor.current_patients) <= doctor.max_patients
+        assert all(hms.patients[patient_id].assigned_doctor == doctor.doctor_id
+                   for patient_id in doctor.current_patients)
+    assert admitted == {patient_id for room in hms.rooms.values() for patient_id in room.patients}
+    waiting = {p.patient_id for p in hms.patients.values() if p.status == PatientStatus.WAITING}
+    queued = [p.patient_id for p in hms.emergency_queue.in_order() + hms.regular_queue.in_order()]
+    assert sorted(queued) == sorted(waiting)
+    statistics = hms.get_statistics()
+    assert statistics['admitted_patients'] == len(admitted)
+    assert statistics['waiting_patients'] == len(waiting)
+    assert [p.patient_id for p in hms.patient_bst.inorder_traversal()] == \
+        sorted(hms.patients, key=lambda patient_id: hms.patient_bst.key(hms.patients[patient_id]))
+
+
+def test_undo_everything_then_redo_everything(clock, populate, snapshot):
+    hms = HospitalManagementSystem(clock=clock)
+    empty = snapshot(hms)
+    populate(hms)
+    hms.add_doctor("Grey", "Neurology", 3)
+    hms.add_room("ICU", 2)
+    full = snapshot(hms)
+
+    undone = 0
+    while hms.undo_last().success:
+        undone += 1
+        check_invariants(hms)
+    assert snapshot(hms) == empty
+
+    for _ in range(undone):
+        assert hms.redo_last().success
+        check_invariants(hms)
+    assert not hms.redo_last().success
+    assert snapshot(hms) == full
+    hms.close()
+
+
+def test_redo_register_keeps_queue_place(clock):
+    hms = HospitalManagementSystem(clock=clock)
+    first = hms.register_patient("First Regular", 30, "check-up", 4).data
+    second = hms.register_patient("Second Regular", 31, "check-up", 4).data
+    hms.retriage_patient(second.patient_id, 4)  # Not undone below; puts a newer command on top
+    hms.undo_last()
+    hms.undo_last()
+    hms.undo_last()
+    hms.redo_last()
+    hms.redo_last()
+    assert [p.patient_id for p in hms.regular_queue.in_order()] == [first.patient_id, second.patient_id]
+    assert (first.arrival_seq, second.arrival_seq) == (1, 2)
+    third = hms.register_patient("Third Regular", 32, "check-up", 4).data
+    assert third.arrival_seq == 3
+    hms.close()
+
+
+def test_new_change_clears_redo(clock):
+    hms = HospitalManagementSystem(clock=clock)
+    hms.register_patient("Someone", 30, "flu", 3)
+    hms.undo_last()
+    hms.register_patient("Someone Else", 30, "flu", 3)
+    assert not hms.redo_last().success
+    hms.close()
+
+
+def test_undo_discharge_needs_the_bed_back(clock):
+    hms = HospitalManagementSystem(clock=clock)
+    for room in list(hms.rooms):
+        hms._remove_room(room)
+    hms.add_room("General", 1)
+    for number in range(2):
+        hms.register_patient(f"Patient {number}", 40, "fracture", 3)
+    first = hms.admit_patient().data
+    hms.discharge_patient(first.patient_id)
+    with hms.history.paused():
+        hms.admit_patient()  # Takes the only bed
+    result = hms.undo_last()
+    assert not result.success and result.details["reason"] == "no_capacity"
+    assert first.status == PatientStatus.DISCHARGED
+    check_invariants(hms)
+    assert hms.undo_last().details["reason"] == "no_capacity"  # Still at the top of the history
+    hms.close()
+
+
+def test_undo_appointment(clock):
+    hms = HospitalManagementSystem(clock=clock)
+    patient = hms.register_patient("Someone", 30, "flu", 3).data
+    doctor_id = sorted(hms.doctors)[0]
+    start = clock.now() + timedelta(days=1)
+    appointment = hms.schedule_appointment(patient.patient_id, doctor_id, start).data
+    assert hms.undo_last().success
+    assert appointment.appointment_id not in hms.appointments
+    assert hms.schedule_appointment(patient.patient_id, doctor_id, start).success  # The slot is free again
+    hms.undo_last()
+    assert hms.redo_last().success
+    assert hms.doctors[doctor_id].schedule.overlapping(start, start + timedelta(minutes=30))
+    hms.close()
+
+
+def test_command_history_spills_beyond_its_depth():
+    history = CommandHistory(depth=3)
+    for number in range(10):
+        history.push(('register', f"P{number:03d}", "x" * (3000 * number)))
+    assert len(history) == 10 and history.spilled == 7
+    # Spilled commands come back newest first, however long their lines
+    assert [history.pop()[1] for _ in range(10)] == [f"P{number:03d}" for number in range(9, -1, -1)]
+    assert history.pop() is None and history.spilled == 0
+    for number in range(5):
+        history.push_redo(('register', f"P{number:03d}"))
+    assert history.redo_depth == 3
+    history.push(('register', "P100"))
+    assert history.redo_depth == 0
+
+
+def test_deep_history_undoes_past_the_memory_limit(clock, populate, snapshot):
+    hms = HospitalManagementSystem(clock=clock, history_depth=4)
+    empty = snapshot(hms)
+    populate(hms)
+    assert hms.history.spilled > 0
+    while hms.undo_last().success:
+        check_invariants(hms)
+    assert snapshot(hms) == empty
+    hms.close()
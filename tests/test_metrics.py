@@ -0,0 +1,58 @@
+"""Operation latency metrics and the Prometheus text export"""
+import urllib.request
+
+import pytest
+
+from main import HospitalManagementSystem
+from metrics import HistogramValue
+
+
+@pytest.fixture
+def hms(clock):
+    hms = HospitalManagementSystem(clock=clock)
+    yield hms
+    hms.metrics.close()
+    hms.close()
+
+
+def sample(text, line_start):
+    matches = [line for line in text.splitlines() if line.startswith(line_start + " ")]
+    assert len(matches) == 1, line_start
+    return float(matches[0].rsplit(" ", 1)[1])
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = HistogramValue((0.001, 0.01))
+    for value in (0.0005, 0.001, 0.005, 2.0):
+        histogram.observe(value)
+    samples = {(name, labels[-1][1] if name.endswith("_bucket") else None): value
+               for name, labels, value in histogram.samples("h", ())}
+    assert samples[("h_bucket", "0.001")] == 2 and samples[("h_bucket", "0.01")] == 3
+    assert samples[("h_bucket", "+Inf")] == samples[("h_count", None)] == 4
+    assert samples[("h_sum", None)] == pytest.approx(2.0065)
+
+
+def test_enabled_hospital_counts_calls_and_failures(hms):
+    assert 'register_patient' not in hms.__dict__
+    hms.metrics.enable()
+    hms.register_patient("Ann Lee", 40, "fracture", 3)
+    hms.admit_patient()
+    hms.admit_patient()
+    text = hms.metrics.render()
+    assert sample(text, 'hms_operation_duration_seconds_count{operation="admit_patient"}') == 2
+    assert sample(text, 'hms_operation_failures_total{operation="admit_patient",reason="rejected"}') == 1
+    assert sample(text, 'hms_patients{status="Admitted"}') == 1
+    assert "# TYPE hms_operation_duration_seconds histogram" in text
+    hms.metrics.disable()
+    hms.register_patient("Bob Ray", 40, "fracture", 3)
+    assert sample(hms.metrics.render(), 'hms_operation_duration_seconds_count{operation="register_patient"}') == 1
+
+
+def test_metrics_are_written_and_served(hms, tmp_path):
+    path = tmp_path / "metrics.prom"
+    hms.metrics.write(str(path))
+    assert sample(path.read_text(), 'hms_queue_depth{queue="emergency"}') == 0
+    server = hms.metrics.serve(0)
+    url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+    with urllib.request.urlopen(url) as response:
+        assert response.status == 200 and b"hms_beds" in response.read()
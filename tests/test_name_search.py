@@ -0,0 +1,63 @@
+"""Prefix and fuzzy patient name search"""
+import random
+
+from main import Patient, PatientNameIndex, SortedStringList
+
+
+def build(*names):
+    index = PatientNameIndex()
+    patients = [Patient(f"P{number:03d}", name, 40, "flu") for number, name in enumerate(names, 1)]
+    for patient in patients:
+        index.add(patient)
+    return index, patients
+
+
+def names(patients):
+    return [patient.name for patient in patients]
+
+
+def test_prefix_matches_any_word_alphabetically():
+    index, _ = build("Alice Smith", "Bob Smithers", "Carol O'Neil", "Smitty Jones")
+    # Ordered by the matching part of the name
+    assert names(index.prefix("smi")) == ["Alice Smith", "Bob Smithers", "Smitty Jones"]
+    assert names(index.prefix("SMITH")) == ["Alice Smith", "Bob Smithers"]
+    assert names(index.prefix("o neil")) == ["Carol O'Neil"]
+    assert names(index.prefix("smi", limit=1)) == ["Alice Smith"]
+    assert index.prefix("", limit=5) == [] and index.prefix("smi", limit=0) == []
+
+
+def test_fuzzy_finds_misspelt_names():
+    index, patients = build("Katherine Johnson", "Catherine Jones", "John Smith")
+    score, best = index.fuzzy("Katherin Jonson")[0]
+    assert best is patients[0] and 0.5 < score < 1
+    assert index.fuzzy("zzzz") == []
+
+
+def test_search_puts_prefix_matches_first_and_follows_removal():
+    index, patients = build("Jon Snow", "John Smith", "Joan Smyth")
+    assert names(index.search("jon", limit=3))[:1] == ["Jon Snow"]
+    assert len(index.search("jon", limit=3)) == len(set(names(index.search("jon", limit=3))))
+    index.remove(patients[0])
+    assert "Jon Snow" not in names(index.search("jon"))
+    assert len(index) == 2
+
+
+def test_sorted_string_list_matches_a_sorted_list(monkeypatch):
+    monkeypatch.setattr(SortedStringList, "LOAD", 4)
+    rng = random.Random(3)
+    items = SortedStringList()
+    expected = []
+    for _ in range(400):
+        word = "".join(rng.choice("abc") for _ in range(rng.randrange(1, 5)))
+        if expected and rng.random() < 0.3:
+            word = rng.choice(expected)
+            assert items.discard(word)
+            expected.remove(word)
+        else:
+            items.add(word)
+            expected.append(word)
+    expected.sort()
+    assert len(items) == len(expected)
+    assert list(items.range_scan("", "\uffff")) == expected
+    assert list(items.range_scan("ab", "b")) == [word for word in expected if "ab" <= word <= "b"]
+    assert not items.discard("zzz")
@@ -0,0 +1,101 @@
+"""Write-ahead log replay, torn tails and snapshots"""
+import os
+
+from main import HospitalManagementSystem
+from persistence import WriteAheadLog, WriteAheadStorage
+
+
+def open_hospital(directory, clock, **options):
+    return HospitalManagementSystem(storage=WriteAheadStorage(str(directory), **options), clock=clock)
+
+
+def test_log_replays_every_operation(tmp_path, clock, populate, snapshot):
+    hms = populate(open_hospital(tmp_path, clock))
+    before = snapshot(hms)
+    hms.close()
+    assert not [name for name in os.listdir(tmp_path) if name.startswith("snapshot-")]
+
+    restored = open_hospital(tmp_path, clock)
+    try:
+        assert restored.restored
+        assert snapshot(restored) == before
+    finally:
+        restored.close()
+
+
+def test_torn_tail_is_ignored(tmp_path, clock, populate, snapshot):
+    hms = populate(open_hospital(tmp_path, clock))
+    before = snapshot(hms)
+    hms.close()
+    # A crash halfway through writing the next record
+    with open(WriteAheadLog(str(tmp_path)).segments()[-1], "a", encoding="utf-8") as log_file:
+        log_file.write('{"seq":999,"op":"register","payload":{"patient_')
+
+    restored = open_hospital(tmp_path, clock)
+    assert snapshot(restored) == before
+    result = restored.register_patient("After Crash", 50, "flu", 3)
+    after = snapshot(restored)
+    restored.close()
+
+    # Records written after the torn one land in a new segment and are replayed too
+    again = open_hospital(tmp_path, clock)
+    try:
+        assert again.find_patient(result.data.patient_id).name == "After Crash"
+        assert snapshot(again) == after
+    finally:
+        again.close()
+
+
+def test_snapshots_compact_the_log(tmp_path, clock, populate, snapshot):
+    hms = populate(open_hospital(tmp_path, clock, snapshot_every=10), patients=60)
+    before = snapshot(hms)
+    hms.close()
+    names = os.listdir(tmp_path)
+    assert [name for name in names if name.startswith("snapshot-")]
+    assert len([name for name in names if name.startswith("wal-")]) <= 3
+
+    restored = open_hospital(tmp_path, clock, snapshot_every=10)
+    try:
+        assert snapshot(restored) == before
+    finally:
+        restored.close()
+
+
+def test_append_with_wait_is_durable(tmp_path):
+    log = WriteAheadLog(str(tmp_path), flush_interval=10)
+    log.open(0)
+    try:
+        seq = log.append("add_room", {"room_number": "R1", "room_type": "ICU", "capacity": 1}, wait=True)
+        assert log.durable_seq >= seq
+        assert [record[:2] for record in log.read()] == [(1, "add_room")]
+    finally:
+        log.close()
+
+
+def test_changes_are_durable_when_acknowledged(tmp_path, clock):
+    hms = open_hospital(tmp_path, clock, flush_interval=30)
+    try:
+        result = hms.register_patient("Durable Patient", 40, "flu", 3)
+        assert result.success
+        assert hms.storage.log.durable_seq == hms.storage.log.last_seq
+        patients = [payload for _, op, payload in hms.storage.log.read() if op == 'register']
+        assert patients[-1]['patient_id'] == result.data.patient_id
+    finally:
+        hms.close()
+
+
+def test_snapshot_copy_is_taken_off_the_write_lock(tmp_path, clock, monkeypatch):
+    hms = open_hospital(tmp_path, clock, snapshot_every=5)
+    export_state = hms.export_state
+    writing = []
+
+    def watched():
+        writing.append(hms.lock.writing())
+        return export_state()
+    monkeypatch.setattr(hms, 'export_state', watched)
+    try:
+        for number in range(12):
+            hms.register_patient(f"Patient {number}", 40, "flu", 3)
+        assert writing and not any(writing)
+    finally:
+        hms.close()
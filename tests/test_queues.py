@@ -0,0 +1,41 @@
+"""Waiting queues through the hospital: re-triage and admission order"""
+import pytest
+
+from main import HospitalManagementSystem, PatientStatus
+
+
+@pytest.fixture
+def hms(clock):
+    hms = HospitalManagementSystem(clock=clock)
+    yield hms
+    hms.close()
+
+
+def queued_ids(queue):
+    return [patient.patient_id for patient in queue.in_order()]
+
+
+def test_retriage_moves_between_queues_keeping_arrival_order(hms):
+    ids = [hms.register_patient(f"Patient {n}", 40, "sprain", priority).data.patient_id
+           for n, priority in enumerate([3, 1, 4, 2, 3])]
+    assert queued_ids(hms.emergency_queue) == [ids[1], ids[3]]
+    assert queued_ids(hms.regular_queue) == [ids[0], ids[2], ids[4]]
+
+    result = hms.retriage_patient(ids[4], 1)
+    assert result and result.details["queue"] == "Emergency" and result.details["old_priority"] == 3
+    # Same priority as ids[1], but arrived later
+    assert queued_ids(hms.emergency_queue) == [ids[1], ids[4], ids[3]]
+
+    assert hms.retriage_patient(ids[1], 4)
+    assert queued_ids(hms.regular_queue) == [ids[0], ids[1], ids[2]]
+    assert [hms.admit_patient().data.patient_id for _ in range(2)] == [ids[4], ids[3]]
+
+
+def test_retriage_refuses_patients_not_waiting(hms):
+    patient = hms.register_patient("Ann Lee", 40, "sprain", 3).data
+    assert not hms.retriage_patient(patient.patient_id, 7)
+    assert not hms.retriage_patient("P999", 1)
+    hms.admit_patient()
+    assert patient.status == PatientStatus.ADMITTED
+    assert not hms.retriage_patient(patient.patient_id, 1)
+    assert patient.patient_id not in hms.emergency_queue and patient.patient_id not in hms.regular_queue
@@ -0,0 +1,48 @@
+"""Free-bed index and room allocation policies"""
+import pytest
+
+from main import Room, RoomAvailabilityIndex
+
+
+def make_index(policy, numbers=("R999", "R1000", "R002"), capacity=2):
+    index = RoomAvailabilityIndex(policy)
+    rooms = {number: Room(number, "General", capacity) for number in numbers}
+    for room in rooms.values():
+        index.add_room(room)
+    return index, rooms
+
+
+def test_lowest_number_compares_numbers():
+    index, rooms = make_index("lowest_number")
+    order = []
+    while (room := index.find_room("General")) is not None:
+        room.admit_patient(f"P{len(order)}")
+        order.append(room.room_number)
+    assert order == ["R002", "R002", "R999", "R999", "R1000", "R1000"]
+    assert index.free_beds["General"] == 0 and index.available_count == 0
+    rooms["R1000"].discharge_patient("P4")
+    assert index.find_room("General") is rooms["R1000"]
+    assert index.find_room("ICU") is None
+
+
+def test_fullest_first_fills_partly_used_rooms():
+    index, rooms = make_index("fullest_first", capacity=3)
+    rooms["R1000"].admit_patient("P1")
+    assert index.find_room("General") is rooms["R1000"]
+    rooms["R999"].admit_patient("P2")
+    rooms["R999"].admit_patient("P3")
+    assert index.find_room("General") is rooms["R999"]
+    index.set_policy("lowest_number")
+    assert index.find_room("General") is rooms["R002"]
+
+
+def test_removed_rooms_are_not_handed_out():
+    index, rooms = make_index("lowest_number")
+    index.remove_room(rooms["R002"])
+    assert index.find_room("General") is rooms["R999"]
+    assert index.free_beds["General"] == 4
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        RoomAvailabilityIndex("random")
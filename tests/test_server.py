@@ -0,0 +1,106 @@
+"""HTTP front end: status codes for valid and invalid requests"""
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from main import HospitalManagementSystem
+from server import MAX_SEARCH_LIMIT, HospitalServer
+
+
+def exchange(hms, raw):
+    """Send raw request bytes to a fresh server and return the first response as (status, body)"""
+    async def run():
+        server = HospitalServer(hms, port=0)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            writer.write(raw)
+            await writer.drain()
+            head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+            length = next(int(line.split(":")[1]) for line in head.split("\r\n")
+                          if line.lower().startswith("content-length"))
+            body = json.loads(await reader.readexactly(length))
+            writer.close()
+            return int(head.split()[1]), body
+        finally:
+            server.close()
+    return asyncio.run(run())
+
+
+def call(hms, method, path, body=None):
+    payload = b"" if body is None else json.dumps(body).encode()
+    return exchange(hms, f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(payload)}\r\n"
+                         f"Connection: close\r\n\r\n".encode() + payload)
+
+
+@pytest.fixture
+def hms(clock):
+    hms = HospitalManagementSystem(clock=clock)
+    for number in range(30):
+        hms.register_patient(f"Ann Example {number}", 30, "flu", 3)
+    yield hms
+    hms.close()
+
+
+def test_search_limits(hms):
+    status, body = call(hms, "GET", "/patients?search=ann&limit=5")
+    assert status == 200 and len(body['data']) == 5
+    for limit in (0, -1, MAX_SEARCH_LIMIT + 1):
+        status, body = call(hms, "GET", f"/patients?search=ann&limit={limit}")
+        assert status == 400 and not body['success']
+    assert hms.name_index.prefix("ann", 0) == [] and hms.name_index.search("ann", -1) == []
+
+
+def test_schedule_accepts_times_with_a_time_zone(hms):
+    doctor_id = sorted(hms.doctors)[0]
+    status, body = call(hms, "POST", "/appointments", {
+        'patient_id': "P001", 'doctor_id': doctor_id, 'appointment_time': "2025-01-03T09:00:00Z"})
+    assert status == 201, body
+    expected = datetime(2025, 1, 3, 9, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    assert body['data']['appointment_time'] == expected.isoformat()
+    status, body = call(hms, "POST", "/appointments", {
+        'patient_id': "P001", 'doctor_id': doctor_id, 'appointment_time': "next tuesday"})
+    assert status == 400
+
+
+def test_patient_lifecycle(hms):
+    status, body = call(hms, "POST", "/patients", {'name': "Bob Ray", 'age': 40, 'condition': "fracture"})
+    assert status == 201 and body['success']
+    patient_id = body['data']['patient_id']
+    assert body['data']['priority'] == 2  # Suggested by triage
+    status, body = call(hms, "GET", f"/patients/{patient_id}")
+    assert status == 200 and body['data']['name'] == "Bob Ray"
+    status, body = call(hms, "POST", "/admissions", {})
+    assert status == 200 and body['data']['patient_id'] == patient_id
+    assert call(hms, "POST", f"/patients/{patient_id}/discharge")[0] == 200
+    status, body = call(hms, "GET", "/stats")
+    assert status == 200 and body['data']['discharged_patients'] == 1
+
+
+@pytest.mark.parametrize("method, path, body, expected", [
+    ("GET", "/patients/P999", None, 404),
+    ("GET", "/wards", None, 404),
+    ("DELETE", "/patients", None, 405),
+    ("POST", "/patients", {'name': "X", 'age': 40, 'condition': "flu"}, 422),
+    ("POST", "/patients/P999/discharge", None, 422),
+    ("POST", "/admissions", {'count': "many"}, 400),
+    ("GET", "/patients?search=ann&limit=ten", None, 400),
+])
+def test_error_status_codes(hms, method, path, body, expected):
+    status, response = call(hms, method, path, body)
+    assert status == expected and not response['success'] and response['message']
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (b"POST /patients HTTP/1.1\r\nContent-Length: 5\r\n\r\n{nope", 400),
+    (b"POST /patients HTTP/1.1\r\nContent-Length: 2\r\n\r\n[]", 400),
+    (b"POST /patients HTTP/1.1\r\nContent-Length: -1\r\n\r\n", 400),
+    (b"POST /patients HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n", 501),
+    (b"NONSENSE\r\n\r\n", 400),
+    (b"POST /patients HTTP/1.1\r\nContent-Length: 9999999\r\n\r\n", 413),
+])
+def test_malformed_requests(hms, raw, expected):
+    status, body = exchange(hms, raw)
+    assert status == expected and not body['success']
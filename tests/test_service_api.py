@@ -0,0 +1,72 @@
+"""Headless service API and the console front end built on it"""
+import json
+import subprocess
+import sys
+
+import pytest
+
+from main import HospitalManagementSystem, PatientStatus, to_json
+
+
+@pytest.fixture
+def hms(clock):
+    hms = HospitalManagementSystem(clock=clock)
+    yield hms
+    hms.close()
+
+
+@pytest.mark.parametrize("fields, message", [
+    (("A", 30, "flu", 3), "Patient name must be at least 2 characters long!"),
+    (("Ann Lee", 0, "flu", 3), "Age must be between 1 and 120 years!"),
+    (("Ann Lee", "old", "flu", 3), "Please enter a valid number for age!"),
+    (("Ann Lee", 30, "xy", 3), "Condition description must be at least 3 characters long!"),
+    (("Ann Lee", 30, "flu", 7), "Priority must be between 1 and 4!"),
+])
+def test_register_rejects_invalid_fields_without_printing(hms, capsys, fields, message):
+    result = hms.register_patient(*fields)
+    assert not result and result.message == message
+    assert not hms.patients
+    assert capsys.readouterr().out == ""
+
+
+def test_operations_return_results(hms, capsys):
+    patient = hms.register_patient("Ann Lee", 30, "fracture", 3).data
+    assert not hms.discharge_patient(patient.patient_id)
+    admitted = hms.admit_patient()
+    assert admitted and admitted.data is patient and admitted.details['room'].room_number == patient.room_number
+    assert patient.status == PatientStatus.ADMITTED
+    assert hms.discharge_patient(patient.patient_id).details['room_number'] == admitted.details['room'].room_number
+    assert not hms.admit_patient() and not hms.discharge_patient("P999")
+    assert not hms.add_doctor("Dr. Who", "Cardiology", doctor_id="D001")
+    assert not hms.add_room("Ballroom")
+    assert capsys.readouterr().out == ""
+
+
+def test_console_registration_uses_the_id_it_printed(hms, monkeypatch, capsys):
+    answers = iter(["Ann Lee", "30", "migraine", "3"])
+
+    def desk_input(prompt):
+        if "name" in prompt:
+            # Another desk registers while this one is typing
+            hms.register_patient("Other Desk", 40, "flu", 3, patient_id="P002")
+        return next(answers)
+    monkeypatch.setattr("builtins.input", desk_input)
+    patient = hms.register_patient_interactive()
+    out = capsys.readouterr().out
+    assert "Generated Patient ID: P001" in out
+    assert patient.patient_id == "P001" and hms.patients["P001"].name == "Ann Lee"
+
+
+def test_results_serialize_to_plain_json(hms):
+    result = hms.register_patient("Ann Lee", 30, "fracture", 3)
+    body = json.loads(json.dumps(to_json(result)))
+    assert body['success'] is True and body['data']['patient_id'] == result.data.patient_id
+    assert body['data']['admission_time'] == result.data.admission_time.isoformat()
+    assert to_json({1: (hms.clock.now(),)}) == {'1': [hms.clock.now().isoformat()]}
+
+
+def test_shard_router_does_not_load_the_http_server():
+    code = "import sys, sharding; print('server' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=__file__.rsplit("/tests/", 1)[0]).stdout
+    assert out.strip() == "False"
@@ -0,0 +1,69 @@
+"""Routing and fan-out across shard processes"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from sharding import ShardRouter, department_specs
+
+
+def small_departments():
+    return department_specs(rooms_per_type=1, beds_per_room=2, doctors_per_specialization=1, max_patients=5)
+
+
+@pytest.fixture
+def router():
+    router = ShardRouter(small_departments())
+    yield router
+    router.close()
+
+
+def test_patients_are_placed_by_specialty_and_found_again(router):
+    results = router.register_patients([("Ann Lee", 60, "chest pain", None), ("Bob Ray", 12, "ankle sprain", 4),
+                                        ("Cy Dunn", 70, "stroke", None), ("X", 30, "flu", 3)])
+    assert [result.get('shard') for result in results] == ["acute", "wards", "acute", None]
+    assert not results[3]['success']
+    ids = [result['data']['patient_id'] for result in results[:3]]
+    assert len(set(ids)) == 3
+    assert router.patient_shard[ids[1]].name == "wards"
+    assert router.find_patient(ids[1])['name'] == "Bob Ray"
+    assert router.find_patient("P999") is None
+    names = [patient['name'] for patient in router.search_patients_by_name("ann lee", limit=1)]
+    assert names == ["Ann Lee"]
+
+
+def test_fan_out_admits_everywhere_and_sums_statistics(router):
+    router.register_patients([(f"Patient {n}", 40, condition, 3)
+                              for n, condition in enumerate(["chest pain", "fracture", "migraine", "sprain"])])
+    admitted = router.admit_all()
+    assert set(admitted) == {"acute", "wards"}
+    assert all(report['success'] for report in admitted.values())
+    statistics = router.get_statistics()
+    assert statistics['total_patients'] == 4 and statistics['total_rooms'] == 4
+    assert statistics['admitted_patients'] == sum(len(report['admitted']) for report in admitted.values())
+    census = router.census()
+    assert sum(census['shards'][name].get('Admitted', 0) for name in census['shards']) == \
+        census['total']['Admitted']
+
+
+def test_appointments_stay_on_the_patients_shard(router):
+    patient_id = router.register_patient("Ann Lee", 60, "chest pain")['data']['patient_id']
+    when = datetime.now() + timedelta(days=1)
+    elsewhere = next(doctor_id for doctor_id, shard in router.doctor_shard.items() if shard.name == "wards")
+    local = next(doctor_id for doctor_id, shard in router.doctor_shard.items() if shard.name == "acute")
+    assert not router.schedule_appointment(patient_id, elsewhere, when)['success']
+    booked = router.schedule_appointment(patient_id, local, when)
+    assert booked['success'] and booked['shard'] == "acute"
+
+
+def test_restarted_router_rebuilds_its_directory(tmp_path):
+    router = ShardRouter(small_departments(), data_dir=str(tmp_path))
+    first = router.register_patient("Ann Lee", 60, "chest pain")['data']['patient_id']
+    router.close()
+    router = ShardRouter(small_departments(), data_dir=str(tmp_path))
+    try:
+        assert router.patient_shard[first].name == "acute"
+        assert len(router.room_shard) == 4
+        second = router.register_patient("Bob Ray", 12, "ankle sprain")['data']['patient_id']
+        assert second != first and router.get_statistics()['total_patients'] == 2
+    finally:
+        router.close()
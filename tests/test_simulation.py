@@ -0,0 +1,33 @@
+"""Discrete-event patient flow simulation"""
+from simulation import Scenario, Simulation, percentile
+
+
+def run(seed, **scenario):
+    report = Simulation(Scenario(**scenario), seed=seed).run()
+    del report['wall_seconds']
+    return report
+
+
+def test_same_seed_gives_the_same_report():
+    first = run(7, days=5, arrivals_per_hour=3)
+    assert first == run(7, days=5, arrivals_per_hour=3)
+    assert first != run(8, days=5, arrivals_per_hour=3)
+
+
+def test_patients_are_accounted_for():
+    report = run(3, days=5, arrivals_per_hour=4)
+    assert report['arrivals'] == report['admissions'] + report['still_waiting']
+    assert report['admissions'] == report['discharges'] + report['still_admitted']
+    assert 0 <= report['bed_occupancy'] <= 1 and 0 <= report['doctor_utilization'] <= 1
+
+
+def test_a_small_hospital_builds_a_queue():
+    report = run(5, days=3, arrivals_per_hour=4, rooms={"General": (2, 1)}, doctors=[])
+    # Rooms are added to the default hospital's
+    assert report['total_beds'] == Simulation(Scenario(rooms={}, doctors=[])).total_beds + 2
+    assert report['failed_admission_attempts'] and report['max_waiting'] > 10
+
+
+def test_percentile_uses_nearest_rank():
+    assert percentile([], 0.5) is None
+    assert [percentile([1, 2, 3, 4], fraction) for fraction in (0, 0.25, 0.5, 0.95, 1)] == [1, 1, 2, 4, 4]
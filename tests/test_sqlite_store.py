@@ -0,0 +1,78 @@
+"""SQLite storage round trip and on-demand reads of closed records"""
+from datetime import timedelta
+
+from main import HospitalManagementSystem, PatientStatus
+from sqlite_store import SQLiteStorage
+
+
+def open_hospital(path, clock):
+    return HospitalManagementSystem(storage=SQLiteStorage(str(path)), clock=clock)
+
+
+def test_round_trip(tmp_path, clock, populate, snapshot):
+    path = tmp_path / "hospital.db"
+    hms = populate(open_hospital(path, clock))
+    hms.close()
+    # Discharged patients stay in the database, so compare against a hospital without them
+    hms = open_hospital(path, clock)
+    before = snapshot(hms)
+    hms.register_patient("Late Arrival", 70, "stroke", 1)
+    hms.admit_patient()
+    after = snapshot(hms)
+    hms.close()
+
+    restored = open_hospital(path, clock)
+    try:
+        assert restored.restored
+        assert snapshot(restored) == after
+        assert before['statistics']['total_patients'] + 1 == after['statistics']['total_patients']
+        transfer = restored.find_patient("T000")
+        assert [entry.record for entry in transfer.medical_history] == ["Referred for stroke"]
+    finally:
+        restored.close()
+
+
+def test_closed_records_are_read_on_demand(tmp_path, clock, populate):
+    path = tmp_path / "hospital.db"
+    hms = populate(open_hospital(path, clock))
+    discharged = [p for p in hms.patients.values() if p.status == PatientStatus.DISCHARGED]
+    statistics = hms.get_statistics()
+    hms.close()
+
+    clock.advance(days=3)  # Every appointment is now in the past
+    restored = open_hospital(path, clock)
+    try:
+        assert all(p.status != PatientStatus.DISCHARGED for p in restored.patients.values())
+        assert not restored.appointments
+        counts = restored.get_statistics()
+        for key in ('total_patients', 'discharged_patients', 'total_appointments'):
+            assert counts[key] == statistics[key]
+
+        patient = restored.find_patient(discharged[0].patient_id)
+        assert patient.status == PatientStatus.DISCHARGED
+        assert patient.patient_id not in restored.patients
+        names = [p.patient_id for p in restored.search_patients_by_name(discharged[0].name[:7], 50)]
+        assert discharged[0].patient_id in names
+
+        # New IDs never reuse those of closed records
+        new = restored.register_patient("New Arrival", 20, "flu", 3).data
+        assert new.patient_id not in {p.patient_id for p in discharged}
+        assert restored.is_archived(discharged[0].patient_id) and not restored.is_archived(new.patient_id)
+        assert not restored.register_patient("Copy", 20, "flu", 3, patient_id=discharged[0].patient_id).success
+        future = clock.now() + timedelta(days=1)
+        assert restored.schedule_appointment(patient.patient_id, sorted(restored.doctors)[0], future).success
+    finally:
+        restored.close()
+
+
+def test_reports_read_through_the_pool(tmp_path, clock, populate):
+    hms = populate(open_hospital(tmp_path / "hospital.db", clock))
+    try:
+        hms.storage.flush()
+        census = hms.storage.census()
+        assert sum(census.values()) == len(hms.patients)
+        assert census[PatientStatus.DISCHARGED] == 1
+        start = clock.now()
+        assert len(hms.storage.appointments_between(start, start + timedelta(days=2))) == len(hms.appointments)
+    finally:
+        hms.close()
@@ -0,0 +1,44 @@
+"""Dashboard counters against a recount of the records"""
+from main import AppointmentStatus, HospitalManagementSystem, PatientStatus
+
+
+def recount(hms):
+    patients = list(hms.patients.values())
+    rooms = list(hms.rooms.values())
+    doctors = list(hms.doctors.values())
+    appointments = list(hms.appointments.values())
+    # The figures the dashboard computed by scanning before it kept counters
+    occupied = sum(not room.is_available for room in rooms)
+    busy = sum(bool(doctor.current_patients) for doctor in doctors)
+    return {
+        'total_patients': len(patients),
+        'admitted_patients': sum(patient.status == PatientStatus.ADMITTED for patient in patients),
+        'discharged_patients': sum(patient.status == PatientStatus.DISCHARGED for patient in patients),
+        'waiting_patients': sum(patient.status == PatientStatus.WAITING for patient in patients),
+        'total_rooms': len(rooms),
+        'occupied_rooms': occupied,
+        'available_rooms': len(rooms) - occupied,
+        'total_doctors': len(doctors),
+        'busy_doctors': busy,
+        'available_doctors': len(doctors) - busy,
+        'total_appointments': len(appointments),
+        'scheduled_appointments': sum(appointment.status == AppointmentStatus.SCHEDULED
+                                      for appointment in appointments),
+    }
+
+
+def test_counters_follow_every_change(clock, populate):
+    hms = HospitalManagementSystem(clock=clock)
+    try:
+        assert hms.get_statistics() == recount(hms)
+        populate(hms, patients=24)
+        assert hms.get_statistics() == recount(hms)
+        hms.admit_batch(6)
+        assert hms.get_statistics() == recount(hms)
+        for _ in range(3):
+            hms.undo_last()
+            assert hms.get_statistics() == recount(hms)
+        hms.redo_last()
+        assert hms.get_statistics() == recount(hms)
+    finally:
+        hms.close()
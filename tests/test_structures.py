@@ -0,0 +1,98 @@
+"""AVL tree, indexed heap and waiting queues"""
+import random
+
+from main import AVLTree, IndexedHeap, Patient, PatientQueue, record_id_key
+
+
+def make_patient(number, priority=3, arrival_seq=0):
+    patient = Patient(f"P{number:03d}", f"Patient {number}", 40, "flu", priority)
+    patient.arrival_seq = arrival_seq or number
+    return patient
+
+
+def check_balanced(node):
+    """Height of the subtree, asserting the AVL invariants on the way"""
+    if node is None:
+        return 0
+    left, right = check_balanced(node.left), check_balanced(node.right)
+    assert abs(left - right) <= 1
+    assert node.height == 1 + max(left, right)
+    return node.height
+
+
+def test_record_id_key_orders_numbers_numerically():
+    assert sorted(["P1000", "P999", "P010", "P2"], key=record_id_key) == ["P2", "P010", "P999", "P1000"]
+    assert record_id_key("walk-in") < record_id_key("walk-inn")
+
+
+def test_avl_keeps_numeric_order_and_balance():
+    tree = AVLTree()
+    numbers = list(range(1, 2001))
+    random.Random(1).shuffle(numbers)
+    for number in numbers:
+        tree.insert(make_patient(number))
+    assert len(tree) == 2000
+    assert [p.patient_id for p in tree.inorder_traversal()] == [f"P{n:03d}" for n in range(1, 2001)]
+    assert check_balanced(tree.root) <= 15
+    assert tree.search(record_id_key("P1000")).patient_id == "P1000"
+    assert tree.search(record_id_key("P2001")) is None
+
+
+def test_avl_sequential_inserts_stay_logarithmic():
+    tree = AVLTree()
+    for number in range(1, 10001):
+        tree.insert(make_patient(number))
+    assert check_balanced(tree.root) <= 18
+
+
+def test_avl_delete_and_range_scan():
+    tree = AVLTree()
+    for number in range(1, 1201):
+        tree.insert(make_patient(number))
+    for number in range(1, 1201, 3):
+        assert tree.delete(record_id_key(f"P{number:03d}")).patient_id == f"P{number:03d}"
+    assert tree.delete(record_id_key("P001")) is None
+    check_balanced(tree.root)
+    remaining = [n for n in range(1, 1201) if n % 3 != 1]
+    assert [p.patient_id for p in tree.inorder_traversal()] == [f"P{n:03d}" for n in remaining]
+    scanned = tree.range_scan(record_id_key("P998"), record_id_key("P1003"))
+    assert [p.patient_id for p in scanned] == ["P998", "P999", "P1001", "P1002"]
+
+
+def test_indexed_heap_pops_in_key_order():
+    rng = random.Random(2)
+    heap = IndexedHeap()
+    keys = {item_id: rng.randint(0, 50) for item_id in range(500)}
+    for item_id, key in keys.items():
+        heap.push(item_id, key, item_id)
+    for item_id in range(0, 500, 5):
+        heap.push(item_id, keys[item_id] - 100, item_id)  # re-key
+        keys[item_id] -= 100
+    for item_id in range(1, 500, 7):
+        assert heap.remove(item_id) == item_id
+        del keys[item_id]
+    assert heap.remove(1) is None
+    assert len(heap) == len(keys)
+    expected = sorted(keys, key=lambda item_id: (keys[item_id], item_id))
+    assert heap.sorted_items() == expected
+    assert [heap.pop() for _ in range(len(keys))] == expected
+    assert heap.pop() is None
+
+
+def test_patient_queue_retriage_and_move():
+    emergency = PatientQueue(lambda patient: (patient.priority, patient.arrival_seq))
+    regular = PatientQueue(lambda patient: patient.arrival_seq)
+    patients = [make_patient(n, priority=1 + n % 2) for n in range(1, 7)]
+    for patient in patients:
+        emergency.push(patient)
+    assert [p.patient_id for p in emergency.in_order()] == ["P002", "P004", "P006", "P001", "P003", "P005"]
+
+    patients[4].priority = 1
+    emergency.update(patients[4])
+    assert [p.patient_id for p in emergency.in_order()] == ["P002", "P004", "P005", "P006", "P001", "P003"]
+
+    emergency.move_to("P003", regular)
+    regular.push(make_patient(7))
+    assert "P003" not in emergency and "P003" in regular
+    assert [regular.pop().patient_id for _ in range(2)] == ["P003", "P007"]
+    assert not regular
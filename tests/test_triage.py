@@ -0,0 +1,39 @@
+"""Compiled keyword triage rules"""
+import json
+
+from triage import TriageClassifier
+
+
+def test_default_rules_route_conditions():
+    triage = TriageClassifier.from_file()
+    stroke = triage.classify("Suspected  STROKE with numbness")
+    assert stroke.priority == 1 and stroke.specialization == "Neurology"
+    assert stroke.room_types[0] == "ICU" and stroke.matched == ("critical", "neurology")
+    chest = triage.classify("chest pain")
+    assert (chest.priority, chest.specialization) == (2, "Cardiology")
+    assert triage.classify("ankle sprain").specialization == "Orthopedics"
+    assert triage.classify("routine check-up").priority == 4
+    unknown = triage.classify("feeling odd")
+    assert unknown == (("ICU", "Emergency", "General", "Private"), None, None, ())
+
+
+def test_overlapping_keywords_all_match(tmp_path):
+    rules = {"default_room_types": ["General", "ICU"],
+             "rules": [{"name": "heart attack", "keywords": ["heart attack"], "priority": 1, "room_types": ["ICU"]},
+                       {"name": "heart", "keywords": ["heart"], "specialization": "Cardiology"},
+                       {"name": "attack", "keywords": ["attack"], "priority": 3}]}
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(rules))
+    triage = TriageClassifier.from_file(str(path))
+    result = triage.classify("heart attack")
+    # Every rule with a keyword in the text matches, even inside a longer keyword
+    assert result.matched == ("heart attack", "heart", "attack")
+    assert (result.priority, result.specialization, result.room_types) == (1, "Cardiology", ("ICU", "General"))
+    assert triage.classify("heartburn").matched == ("heart",)
+
+
+def test_results_are_cached_per_normalized_condition():
+    triage = TriageClassifier.from_file()
+    triage.classify("Chest pain")
+    triage.classify("  chest   PAIN ")
+    assert triage.cache_info().hits == 1
@@ -0,0 +1,83 @@
+"""Background worker used by the Tk UI"""
+import threading
+import time
+
+from concurrency import ReadWriteLock
+from worker import BackgroundWorker
+
+
+class ManualScheduler:
+    """Stands in for Tk's after(): callbacks run only when run_pending() is called"""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def __call__(self, milliseconds, callback):
+        self.callbacks.append(callback)
+
+    def run_pending(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+def test_try_call_does_not_wait_for_a_writer():
+    lock = ReadWriteLock()
+    worker = BackgroundWorker(ManualScheduler(), shared_lock=lock)
+    try:
+        assert worker.try_call(lambda: 42) == (True, 42)
+        holding, release = threading.Event(), threading.Event()
+
+        def writer():
+            with lock.write():
+                holding.set()
+                release.wait()
+        thread = threading.Thread(target=writer)
+        thread.start()
+        holding.wait()
+        assert worker.try_call(lambda: 42) == (False, None)
+        release.set()
+        thread.join()
+        assert worker.try_call(lambda: 42) == (True, 42)
+    finally:
+        worker.shutdown()
+
+
+def test_results_and_progress_arrive_on_the_polling_thread():
+    scheduler = ManualScheduler()
+    worker = BackgroundWorker(scheduler)
+    events = []
+
+    def job(job, count):
+        for done in range(count):
+            job.progress(done + 1, count)
+        return count * 2
+    submitted = worker.submit(job, 3, with_job=True, on_done=lambda value: events.append(('done', value)),
+                              on_progress=lambda done, total, message: events.append(('progress', done)))
+    submitted.future.result()
+    assert not events  # Nothing is delivered until the main loop polls
+    scheduler.run_pending()
+    assert events == [('progress', 1), ('progress', 2), ('progress', 3), ('done', 6)]
+    assert not worker.pending
+    worker.shutdown()
+
+
+def test_cancelled_job_stops_at_its_next_progress_report():
+    scheduler = ManualScheduler()
+    worker = BackgroundWorker(scheduler)
+    started, cancelled = threading.Event(), []
+
+    def job(job):
+        started.set()
+        while not job.cancelled:
+            time.sleep(0.001)
+        job.progress(1)
+        return "finished"
+    submitted = worker.submit(job, with_job=True, on_done=cancelled.append,
+                              on_cancel=lambda: cancelled.append("cancelled"))
+    started.wait()
+    submitted.cancel()
+    submitted.future.result()
+    scheduler.run_pending()
+    assert cancelled == ["cancelled"]
+    worker.shutdown()
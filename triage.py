@@ -0,0 +1,108 @@
+"""Keyword triage: route a condition description to room types, a priority and a specialization.
+
+Rules are loaded from a JSON file (triage_rules.json by default):
+
+    {"default_room_types": ["ICU", "Emergency", "General", "Private"],
+     "rules": [{"name": "critical", "keywords": ["stroke", ...],
+                "room_types": [...], "priority": 1, "specialization": "..."}]}
+
+Every rule field other than keywords is optional. A keyword matches
+anywhere in the lowercased condition. Room types and specialization come
+from the first matching rule (in file order) that sets them; the suggested
+priority is the most urgent one among the matching rules.
+
+All keywords are compiled into one regular expression shaped like a trie,
+so matching cost depends on the length of the condition rather than on the
+number of keywords, and results are memoized per distinct condition.
+"""
+import json
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "triage_rules.json")
+
+Triage = namedtuple('Triage', ['room_types', 'priority', 'specialization', 'matched'])
+
+
+def _trie_pattern(node):
+    """Regex source for a character trie; terminal nodes are marked by a "" key"""
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        # Optional and greedy, so the longest keyword at a position wins
+        return ("(?:" + body + ")?") if len(branches) == 1 else body + "?"
+    return body
+
+
+def compile_keywords(keywords):
+    """One pattern matching any keyword; group 1 is the longest keyword starting at each position"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = True
+    # The lookahead makes finditer report overlapping matches, one per start position
+    return re.compile("(?=(" + _trie_pattern(trie) + "))")
+
+
+class TriageClassifier:
+    """Compiled keyword rules with an LRU cache of classified conditions"""
+
+    def __init__(self, rules, default_room_types, cache_size=4096):
+        self.rules = rules
+        self.default_room_types = list(default_room_types)
+        # keyword -> indexes of every rule matching it, including through keywords it starts with,
+        # because the pattern reports only the longest keyword at each position
+        by_keyword = {}
+        for index, rule in enumerate(rules):
+            for keyword in rule['keywords']:
+                keyword = " ".join(keyword.lower().split())
+                if keyword:
+                    by_keyword.setdefault(keyword, set()).add(index)
+        self._rules_for = {}
+        for keyword in by_keyword:
+            indexes = set()
+            for end in range(1, len(keyword) + 1):
+                indexes |= by_keyword.get(keyword[:end], set())
+            self._rules_for[keyword] = indexes
+        self._pattern = compile_keywords(by_keyword) if by_keyword else None
+        self._classify = lru_cache(maxsize=cache_size)(self._classify_uncached)
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_RULES_PATH, cache_size=4096):
+        with open(path, "r", encoding="utf-8") as rules_file:
+            config = json.load(rules_file)
+        return cls(config['rules'], config.get('default_room_types', ["ICU", "Emergency", "General", "Private"]),
+                   cache_size)
+
+    def classify(self, condition):
+        """Return a Triage for a condition description"""
+        return self._classify(" ".join(str(condition).lower().split()))
+
+    def cache_info(self):
+        return self._classify.cache_info()
+
+    def _classify_uncached(self, condition):
+        matched = set()
+        if self._pattern is not None:
+            for match in self._pattern.finditer(condition):
+                matched |= self._rules_for[match.group(1)]
+        room_types = priority = specialization = None
+        for index in sorted(matched):
+            rule = self.rules[index]
+            if room_types is None and rule.get('room_types'):
+                room_types = rule['room_types']
+            if specialization is None and rule.get('specialization'):
+                specialization = rule['specialization']
+            if rule.get('priority') is not None and (priority is None or rule['priority'] < priority):
+                priority = rule['priority']
+        # Rooms not named by the rule stay available, after the preferred ones
+        room_types = list(room_types or self.default_room_types)
+        room_types += [room_type for room_type in self.default_room_types if room_type not in room_types]
+        return Triage(tuple(room_types), priority, specialization,
+                      tuple(self.rules[index].get('name', f"rule {index + 1}") for index in sorted(matched)))
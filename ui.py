@@ -1,22 +1,179 @@
 # ui.py
+import argparse
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import filedialog, messagebox, ttk
 from datetime import datetime
-import heapq
+
+from bulk_import import import_patients
+from worker import BackgroundWorker
 
 # Import backend classes from your main.py
 from main import (
+    AppointmentStatus,
     HospitalManagementSystem,
-    Patient,
-    Doctor,
-    Room,
-    Appointment
+    PatientStatus,
+    Priority,
+    ROOM_TYPES,
+    open_storage
 )
 
+class VirtualGrid(tk.Frame):
+    """A Treeview that only holds the rows currently on screen.
+
+    Records come from fetch(offset, limit, sort_by, descending, text, **filters),
+    which returns (records, total), or None while the backend is busy; scrolling, resizing, sorting and filtering
+    fetch just the visible window, so the grid stays responsive however many
+    records there are. columns is a list of (name, heading, width, format)
+    where format turns a record into the cell text. When revision is given the
+    grid re-fetches whenever its value changes.
+    """
+    ROW_HEIGHT = 22
+    HEADING_HEIGHT = 26
+
+    def __init__(self, master, columns, fetch, filters=(), revision=None):
+        super().__init__(master, bg="#f4f7fb")
+        self.columns = columns
+        self.fetch = fetch
+        self.revision = revision
+        self.offset = 0
+        self.total = 0
+        self.visible = 20
+        self.sort_by = None
+        self.descending = False
+        self._seen_revision = None
+        self._pending_filter = None
+        self._poll_job = None
+
+        bar = tk.Frame(self, bg="#f4f7fb")
+        bar.pack(fill="x", pady=(0, 6))
+        tk.Label(bar, text="Filter:", bg="#f4f7fb").pack(side="left")
+        self.text_e = tk.Entry(bar, width=30)
+        self.text_e.pack(side="left", padx=6)
+        self.text_e.bind("<KeyRelease>", self._filter_changed)
+        self.filter_boxes = {}
+        for name, label, values in filters:
+            tk.Label(bar, text=f"{label}:", bg="#f4f7fb").pack(side="left", padx=(12, 0))
+            box = ttk.Combobox(bar, values=[""] + list(values), state="readonly", width=14)
+            box.pack(side="left", padx=6)
+            box.bind("<<ComboboxSelected>>", lambda event: self.reload())
+            self.filter_boxes[name] = box
+        self.count_label = tk.Label(bar, bg="#f4f7fb", anchor="e")
+        self.count_label.pack(side="right")
+
+        body = tk.Frame(self)
+        body.pack(fill="both", expand=True)
+        ttk.Style(self).configure("Grid.Treeview", rowheight=self.ROW_HEIGHT)
+        self.tree = ttk.Treeview(body, columns=[column[0] for column in columns], show="headings",
+                                 style="Grid.Treeview", selectmode="browse")
+        for name, heading, width, _ in columns:
+            self.tree.heading(name, text=heading, command=lambda name=name: self.sort(name))
+            self.tree.column(name, width=width, anchor="w")
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar = tk.Scrollbar(body, command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.tree.bind("<Configure>", self._resized)
+        self.tree.bind("<MouseWheel>", lambda event: self.scroll_to(self.offset - 3 * (1 if event.delta > 0 else -1)))
+        self.tree.bind("<Button-4>", lambda event: self.scroll_to(self.offset - 3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_to(self.offset + 3))
+        self.tree.bind("<Prior>", lambda event: self.scroll_to(self.offset - self.visible))
+        self.tree.bind("<Next>", lambda event: self.scroll_to(self.offset + self.visible))
+        self.tree.bind("<Home>", lambda event: self.scroll_to(0))
+        self.tree.bind("<End>", lambda event: self.scroll_to(self.total))
+        if revision is not None:
+            self._poll_job = self.after(1000, self._poll)
+        self.render()
+
+    def destroy(self):
+        if self._poll_job is not None:
+            self.after_cancel(self._poll_job)
+            self._poll_job = None
+        super().destroy()
+
+    def filters(self):
+        return {name: box.get() for name, box in self.filter_boxes.items() if box.get()}
+
+    def render(self):
+        """Fetch and draw the window starting at self.offset"""
+        args = (self.sort_by, self.descending, self.text_e.get())
+        page = self.fetch(self.offset, self.visible, *args, **self.filters())
+        if page is not None and self.offset > max(0, page[1] - self.visible):
+            # Rows were removed or the filter narrowed the list; show the last full window
+            self.offset = max(0, page[1] - self.visible)
+            page = self.fetch(self.offset, self.visible, *args, **self.filters())
+        if page is None:
+            # A background job holds the backend; the next poll tries again
+            self._seen_revision = None
+            self.count_label.config(text="Updating…")
+            return
+        records, self.total = page
+        if self.revision is not None:
+            self._seen_revision = self.revision()
+
+        self.tree.delete(*self.tree.get_children())
+        for record in records:
+            self.tree.insert("", tk.END, values=[fmt(record) for _, _, _, fmt in self.columns])
+        if self.total:
+            self.scrollbar.set(self.offset / self.total, (self.offset + len(records)) / self.total)
+            self.count_label.config(text=f"{self.offset + 1}-{self.offset + len(records)} of {self.total}")
+        else:
+            self.scrollbar.set(0, 1)
+            self.count_label.config(text="No matching records")
+
+    def reload(self):
+        self.offset = 0
+        self.render()
+
+    def scroll_to(self, offset):
+        offset = max(0, min(offset, self.total - self.visible))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", count, "units"/"pages")"""
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.total))
+        elif args[0] == "scroll":
+            step = self.visible if args[2] == "pages" else 1
+            self.scroll_to(self.offset + int(args[1]) * step)
+
+    def sort(self, name):
+        """Sort by a column; clicking the same heading again reverses the order"""
+        self.descending = not self.descending if self.sort_by == name else False
+        self.sort_by = name
+        for column, heading, _, _ in self.columns:
+            arrow = (" ▼" if self.descending else " ▲") if column == name else ""
+            self.tree.heading(column, text=heading + arrow)
+        self.reload()
+
+    def _filter_changed(self, event=None):
+        # Wait for a pause in typing before filtering
+        if self._pending_filter is not None:
+            self.after_cancel(self._pending_filter)
+        self._pending_filter = self.after(250, self._apply_filter)
+
+    def _apply_filter(self):
+        self._pending_filter = None
+        self.reload()
+
+    def _resized(self, event):
+        visible = max(1, (event.height - self.HEADING_HEIGHT) // self.ROW_HEIGHT)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+
+    def _poll(self):
+        self._poll_job = self.after(1000, self._poll)
+        if self.revision() != self._seen_revision:
+            self.render()
+
+
 class HospitalUI:
-    def __init__(self, root):
-        self.hms = HospitalManagementSystem()
+    def __init__(self, root, storage=None):
+        self.hms = HospitalManagementSystem(storage=storage)
         self.root = root
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.root.title("🏥 Hospital Management System — UI")
         self.root.geometry("1000x700")
         self.root.config(bg="#f4f7fb")
@@ -37,6 +194,7 @@ class HospitalUI:
 
         buttons = [
             ("Register Patient", self.register_patient_ui),
+            ("Search Patients", self.search_patients_ui),
             ("Admit Next Patient", self.admit_patient_ui),
             ("Discharge Patient", self.discharge_patient_ui),
             ("Schedule Appointment", self.schedule_appointment_ui),
@@ -47,13 +205,30 @@ class HospitalUI:
             ("View Rooms", self.view_rooms_ui),
             ("View Appointments", self.view_appointments_ui),
             ("View Statistics", self.view_stats_ui),
+            ("Import Patients", self.import_patients_ui),
+            ("Undo", self.undo_ui),
+            ("Redo", self.redo_ui),
             ("Clear Output", self.clear_output)
         ]
 
+        rows = (len(buttons) + 1) // 2
         for i, (text, cmd) in enumerate(buttons):
-            b = tk.Button(left_frame if i < 6 else right_frame, text=text, width=20, height=2,
+            b = tk.Button(left_frame if i < rows else right_frame, text=text, width=20, height=2,
                           bg="#2196F3", fg="white", font=("Segoe UI", 10, "bold"), command=cmd)
-            b.grid(row=i % 6, column=0, padx=8, pady=6)
+            b.grid(row=i % rows, column=0, padx=8, pady=6)
+
+        # Status bar for background jobs
+        status_frame = tk.Frame(root, bg="#f4f7fb")
+        status_frame.pack(side="bottom", padx=12, pady=(0, 8), fill="x")
+        self.status_label = tk.Label(status_frame, text="Ready", bg="#f4f7fb", anchor="w")
+        self.status_label.pack(side="left", fill="x", expand=True)
+        self.cancel_btn = tk.Button(status_frame, text="Cancel", state="disabled", command=self.cancel_jobs)
+        self.cancel_btn.pack(side="right")
+        self.progress = ttk.Progressbar(status_frame, length=220)
+        self.progress.pack(side="right", padx=8)
+
+        self.worker = BackgroundWorker(root.after, shared_lock=self.hms.lock)
+        self.worker.watch(self._job_event)
 
         # Output area (scrollable)
         out_frame = tk.Frame(root, bg="#f4f7fb")
@@ -73,6 +248,78 @@ class HospitalUI:
     def clear_output(self):
         self.output.delete(1.0, tk.END)
 
+    def on_close(self):
+        self.worker.shutdown()
+        self.hms.close()
+        self.root.destroy()
+
+    # ---------- Background jobs ----------
+    def run(self, func, *args, description="", on_done=None, **kwargs):
+        """Run a backend call on the worker thread; on_done receives its result on the main thread"""
+        return self.worker.submit(func, *args, description=description, on_done=on_done,
+                                  on_error=self._job_failed, **kwargs)
+
+    def _job_failed(self, error):
+        self.output.insert(tk.END, f"❌ {error}\n")
+        messagebox.showerror("Error", str(error))
+
+    def _form_succeeded(self, win, button, result):
+        """Close a form after a successful OperationResult; otherwise re-enable its button and show the error"""
+        if result:
+            if win.winfo_exists():
+                win.destroy()
+            return True
+        if win.winfo_exists():
+            button.config(state="normal")
+        messagebox.showerror("Error", result.message)
+        return False
+
+    def _job_event(self, job, kind, value):
+        """Worker listener driving the status bar"""
+        if kind == 'started':
+            self.status_label.config(text=f"⏳ {job.description}…")
+            self.cancel_btn.config(state="normal")
+            self.progress.config(mode="indeterminate")
+            self.progress.start(15)
+        elif kind == 'progress':
+            done, total, message = value
+            self.progress.stop()
+            if total:
+                self.progress.config(mode="determinate", maximum=total, value=done)
+            self.status_label.config(text=f"⏳ {job.description}: {message or done}")
+        elif not self.worker.pending:
+            self.progress.stop()
+            self.progress.config(mode="determinate", value=0)
+            self.cancel_btn.config(state="disabled")
+            self.status_label.config(text="Cancelled" if kind == 'cancelled' else "Ready")
+
+    def cancel_jobs(self):
+        self.worker.cancel_all()
+
+    # ---------- Bulk Import ----------
+    def import_patients_ui(self):
+        path = filedialog.askopenfilename(title="Import Patients",
+                                          filetypes=[("CSV or JSONL", "*.csv *.jsonl *.ndjson *.json"),
+                                                     ("All files", "*.*")])
+        if not path:
+            return
+
+        def run_import(job):
+            return import_patients(self.hms, path, progress=lambda report: job.progress(
+                report.imported + report.rejected, None,
+                f"{report.imported} imported, {report.rejected} rejected"))
+
+        def imported(report):
+            self.output.insert(tk.END, f"✅ Imported {report.imported} patients in {report.seconds:.2f}s "
+                                       f"({report.emergency} emergency, {report.regular} regular)\n")
+            if report.rejected:
+                self.output.insert(tk.END, f"⚠️ Rejected {report.rejected} rows, see {report.reject_path}\n")
+
+        def cancelled():
+            self.output.insert(tk.END, "⚠️ Import cancelled; batches already imported were kept.\n")
+
+        self.run(run_import, description="Import patients", on_done=imported, on_cancel=cancelled, with_job=True)
+
     # ---------- Patient Registration ----------
     def register_patient_ui(self):
         win = tk.Toplevel(self.root)
@@ -100,54 +347,109 @@ class HospitalUI:
         priority_cb.set(3)
         priority_cb.pack(fill="x", pady=6)
 
+        def suggest_priority(event=None):
+            suggestion = self.hms.suggest_triage(cond_e.get())
+            if suggestion.priority:
+                priority_cb.set(suggestion.priority)
+
+        cond_e.bind("<FocusOut>", suggest_priority)
+
         def submit():
             name = name_e.get().strip()
             age_str = age_e.get().strip()
             condition = cond_e.get().strip()
-            try:
-                if not name or len(name) < 2:
-                    raise ValueError("Name must be at least 2 characters.")
-                age = int(age_str)
-                if not (1 <= age <= 120):
-                    raise ValueError("Age must be between 1 and 120.")
-                if not condition or len(condition) < 3:
-                    raise ValueError("Condition description must be at least 3 characters.")
-                priority = int(priority_cb.get())
-                if priority < 1 or priority > 4:
-                    raise ValueError("Priority must be 1-4.")
-
-                patient_id = f"P{len(self.hms.patients)+1:03d}"
-                patient = Patient(patient_id, name, age, condition, priority)
-                self.hms.patients[patient_id] = patient
-                self.hms.patient_bst.insert(patient)
-
-                if priority <= 2:
-                    heapq.heappush(self.hms.emergency_queue, patient)
-                    qtxt = "Emergency Queue"
-                else:
-                    self.hms.regular_queue.append(patient)
-                    qtxt = "Regular Queue"
-
-                self.output.insert(tk.END, f"✅ Registered patient {name} (ID: {patient_id}) → {qtxt}\n")
-                messagebox.showinfo("Success", f"Patient {name} registered (ID: {patient_id}).")
-                win.destroy()
+            register_btn.config(state="disabled")
+            self.run(self.hms.register_patient, name, age_str, condition, priority_cb.get(),
+                     description=f"Register {name}", on_done=registered)
 
-            except Exception as e:
-                messagebox.showerror("Error", str(e))
+        def registered(result):
+            if not self._form_succeeded(win, register_btn, result):
+                return
+            patient = result.data
+            self.output.insert(tk.END, f"✅ Registered patient {patient.name} (ID: {patient.patient_id}) → {result.details['queue']} Queue\n")
+            messagebox.showinfo("Success", f"Patient {patient.name} registered (ID: {patient.patient_id}).")
+
+        register_btn = tk.Button(frame, text="Register", bg="#4CAF50", fg="white", command=submit)
+        register_btn.pack(pady=12)
+
+    # ---------- Patient Search ----------
+    def search_patients_ui(self):
+        win = tk.Toplevel(self.root)
+        win.title("Search Patients")
+        win.geometry("520x380")
+        frame = tk.Frame(win, padx=12, pady=12)
+        frame.pack(fill="both", expand=True)
+
+        tk.Label(frame, text="Name (type-ahead, typos allowed):", anchor="w").pack(fill="x")
+        query_e = tk.Entry(frame)
+        query_e.pack(fill="x", pady=6)
+        query_e.focus_set()
+
+        results = tk.Listbox(frame, font=("Consolas", 10))
+        results.pack(fill="both", expand=True, pady=6)
+
+        search = {'job': None}
 
-        tk.Button(frame, text="Register", bg="#4CAF50", fg="white", command=submit).pack(pady=12)
+        def update_results(event=None):
+            query = query_e.get().strip()
+            if search['job'] is not None:
+                search['job'].cancel()  # Superseded by this keystroke
+            if not query:
+                results.delete(0, tk.END)
+                return
+            search['job'] = self.run(self.hms.search_patients_by_name, query, 20,
+                                     description="Search patients", on_done=show_results)
+
+        def show_results(patients):
+            if not win.winfo_exists():
+                return
+            results.delete(0, tk.END)
+            for p in patients:
+                results.insert(tk.END, f"{p.patient_id} | {p.name} | Age: {p.age} | Status: {p.status}")
+
+        def show_selected(event=None):
+            selection = results.curselection()
+            if not selection:
+                return
+            self.run(self.hms.find_patient, results.get(selection[0]).split(" | ")[0],
+                     description="Find patient", on_done=show_patient)
+
+        def show_patient(p):
+            if p:
+                self.output.insert(tk.END,
+                    f"{p.patient_id} | {p.name} | Age: {p.age} | Condition: {p.condition} | Status: {p.status} | Room: {p.room_number or 'N/A'} | Doctor: {p.assigned_doctor or 'N/A'}\n"
+                )
+
+        query_e.bind("<KeyRelease>", update_results)
+        results.bind("<Double-Button-1>", show_selected)
 
     # ---------- Admit Next Patient ----------
     def admit_patient_ui(self):
-        patient = self.hms.admit_next_patient()
-        if patient:
+        self.run(self.hms.admit_patient, description="Admit next patient", on_done=self._admitted)
+
+    def _admitted(self, result):
+        if result:
+            patient = result.data
             self.output.insert(tk.END, f"✅ Admitted: {patient.name} (ID: {patient.patient_id}) to {patient.room_number} — Doctor: {patient.assigned_doctor}\n")
         else:
-            self.output.insert(tk.END, "⚠️ No patients available to admit.\n")
+            self.output.insert(tk.END, f"⚠️ {result.message}\n")
+
+    # ---------- Undo / redo ----------
+    def undo_ui(self):
+        self.run(self.hms.undo_last, description="Undo", on_done=self._undone)
+
+    def redo_ui(self):
+        self.run(self.hms.redo_last, description="Redo", on_done=self._undone)
+
+    def _undone(self, result):
+        prefix = "↩️" if result else "⚠️"
+        self.output.insert(tk.END, f"{prefix} {result.message}\n")
 
     # ---------- Discharge ----------
     def discharge_patient_ui(self):
-        admitted = [p for p in self.hms.patients.values() if p.status == "Admitted"]
+        self.run(self.hms.admitted_patients, description="List admitted patients", on_done=self._discharge_dialog)
+
+    def _discharge_dialog(self, admitted):
         if not admitted:
             messagebox.showinfo("Info", "No patients are currently admitted.")
             return
@@ -168,33 +470,18 @@ class HospitalUI:
                 messagebox.showwarning("Warning", "Select a patient.")
                 return
             pid = sel.split(" - ")[0]
-            patient = self.hms.patients.get(pid)
-            if not patient:
-                messagebox.showerror("Error", "Patient not found.")
-                return
-
-            # free room
-            if patient.room_number and patient.room_number in self.hms.rooms:
-                room = self.hms.rooms[patient.room_number]
-                room.discharge_patient(pid)
+            discharge_btn.config(state="disabled")
+            self.run(self.hms.discharge_patient, pid, description=f"Discharge {pid}", on_done=discharged)
 
-            # free doctor
-            if patient.assigned_doctor and patient.assigned_doctor in self.hms.doctors:
-                doc = self.hms.doctors[patient.assigned_doctor]
-                doc.discharge_patient(pid)
-
-            patient.status = "Discharged"
-            old_room = patient.room_number
-            old_doc = patient.assigned_doctor
-            patient.room_number = None
-            patient.assigned_doctor = None
-
-            self.hms.operation_history.append(('discharge', pid))
+        def discharged(result):
+            if not self._form_succeeded(win, discharge_btn, result):
+                return
+            patient = result.data
+            self.output.insert(tk.END, f"✅ Discharged: {patient.name} (ID: {patient.patient_id}) — freed Room: {result.details['room_number']}, Doctor: {result.details['doctor_id']}\n")
             messagebox.showinfo("Success", f"{patient.name} discharged.")
-            self.output.insert(tk.END, f"✅ Discharged: {patient.name} (ID: {pid}) — freed Room: {old_room}, Doctor: {old_doc}\n")
-            win.destroy()
 
-        tk.Button(frame, text="Discharge", bg="#E91E63", fg="white", command=do_discharge).pack(pady=8)
+        discharge_btn = tk.Button(frame, text="Discharge", bg="#E91E63", fg="white", command=do_discharge)
+        discharge_btn.pack(pady=8)
 
     # ---------- Add Doctor ----------
     def add_doctor_ui(self):
@@ -220,27 +507,18 @@ class HospitalUI:
         def submit():
             name = name_e.get().strip()
             spec = spec_e.get().strip()
-            try:
-                if not name or len(name) < 2:
-                    raise ValueError("Name must be at least 2 characters.")
-                if not spec or len(spec) < 3:
-                    raise ValueError("Specialization must be at least 3 characters.")
-                max_p = int(max_e.get())
-                if max_p < 1 or max_p > 100:
-                    raise ValueError("Max patients must be between 1 and 100.")
-
-                doc_id = f"D{len(self.hms.doctors)+1:03d}"
-                doctor = Doctor(doc_id, name, spec, max_p)
-                self.hms.doctors[doc_id] = doctor
-
-                self.output.insert(tk.END, f"✅ Added Doctor: Dr. {name} (ID: {doc_id}) — {spec}, max {max_p}\n")
-                messagebox.showinfo("Success", f"Doctor {name} added (ID: {doc_id}).")
-                win.destroy()
+            add_btn.config(state="disabled")
+            self.run(self.hms.add_doctor, name, spec, max_e.get(), description=f"Add doctor {name}", on_done=added)
 
-            except Exception as e:
-                messagebox.showerror("Error", str(e))
+        def added(result):
+            if not self._form_succeeded(win, add_btn, result):
+                return
+            doctor = result.data
+            self.output.insert(tk.END, f"✅ Added Doctor: Dr. {doctor.name} (ID: {doctor.doctor_id}) — {doctor.specialization}, max {doctor.max_patients}\n")
+            messagebox.showinfo("Success", f"Doctor {doctor.name} added (ID: {doctor.doctor_id}).")
 
-        tk.Button(frame, text="Add Doctor", bg="#4CAF50", fg="white", command=submit).pack(pady=10)
+        add_btn = tk.Button(frame, text="Add Doctor", bg="#4CAF50", fg="white", command=submit)
+        add_btn.pack(pady=10)
 
     # ---------- Add Room ----------
     def add_room_ui(self):
@@ -251,7 +529,7 @@ class HospitalUI:
         frame.pack(fill="both", expand=True)
 
         tk.Label(frame, text="Room Type:", anchor="w").pack(fill="x")
-        rt_cb = ttk.Combobox(frame, values=["ICU", "General", "Private", "Emergency"], state="readonly")
+        rt_cb = ttk.Combobox(frame, values=ROOM_TYPES, state="readonly")
         rt_cb.set("General")
         rt_cb.pack(fill="x", pady=6)
 
@@ -262,42 +540,48 @@ class HospitalUI:
 
         def submit():
             rtype = rt_cb.get().strip()
-            try:
-                cap = int(cap_e.get())
-                if cap < 1 or cap > 20:
-                    raise ValueError("Capacity must be 1-20 beds.")
-                room_id = f"R{len(self.hms.rooms)+1:03d}"
-                room = Room(room_id, rtype, cap)
-                self.hms.rooms[room_id] = room
-                self.output.insert(tk.END, f"✅ Added Room: {room_id} — {rtype}, capacity {cap}\n")
-                messagebox.showinfo("Success", f"Room {room_id} added.")
-                win.destroy()
-            except Exception as e:
-                messagebox.showerror("Error", str(e))
+            add_btn.config(state="disabled")
+            self.run(self.hms.add_room, rtype, cap_e.get(), description=f"Add {rtype} room", on_done=added)
 
-        tk.Button(frame, text="Add Room", bg="#4CAF50", fg="white", command=submit).pack(pady=10)
+        def added(result):
+            if not self._form_succeeded(win, add_btn, result):
+                return
+            room = result.data
+            self.output.insert(tk.END, f"✅ Added Room: {room.room_number} — {room.room_type}, capacity {room.capacity}\n")
+            messagebox.showinfo("Success", f"Room {room.room_number} added.")
+
+        add_btn = tk.Button(frame, text="Add Room", bg="#4CAF50", fg="white", command=submit)
+        add_btn.pack(pady=10)
 
     # ---------- Schedule Appointment ----------
     def schedule_appointment_ui(self):
-        if not self.hms.patients:
+        self.run(self._appointment_choices, description="List patients and doctors", on_done=self._schedule_dialog)
+
+    def _appointment_choices(self):
+        with self.hms.lock.read():
+            return list(self.hms.patients.values()), list(self.hms.doctors.values())
+
+    def _schedule_dialog(self, choices):
+        patients, doctors = choices
+        if not patients:
             messagebox.showinfo("Info", "No patients registered yet.")
             return
-        if not self.hms.doctors:
+        if not doctors:
             messagebox.showinfo("Info", "No doctors available.")
             return
 
         win = tk.Toplevel(self.root)
         win.title("Schedule Appointment")
-        win.geometry("520x420")
+        win.geometry("520x480")
         frame = tk.Frame(win, padx=12, pady=12)
         frame.pack(fill="both", expand=True)
 
         tk.Label(frame, text="Select Patient:", anchor="w").pack(fill="x")
-        pat_cb = ttk.Combobox(frame, values=[f"{p.patient_id} - {p.name}" for p in self.hms.patients.values()], state="readonly")
+        pat_cb = ttk.Combobox(frame, values=[f"{p.patient_id} - {p.name}" for p in patients], state="readonly")
         pat_cb.pack(fill="x", pady=6)
 
         tk.Label(frame, text="Select Doctor:", anchor="w").pack(fill="x")
-        doc_cb = ttk.Combobox(frame, values=[f"{d.doctor_id} - {d.name}" for d in self.hms.doctors.values()], state="readonly")
+        doc_cb = ttk.Combobox(frame, values=[f"{d.doctor_id} - {d.name}" for d in doctors], state="readonly")
         doc_cb.pack(fill="x", pady=6)
 
         tk.Label(frame, text="Date (YYYY-MM-DD):", anchor="w").pack(fill="x")
@@ -315,6 +599,11 @@ class HospitalUI:
         type_e.insert(0, "Consultation")
         type_e.pack(fill="x", pady=6)
 
+        tk.Label(frame, text="Duration (minutes):", anchor="w").pack(fill="x")
+        duration_e = tk.Entry(frame)
+        duration_e.insert(0, "30")
+        duration_e.pack(fill="x", pady=6)
+
         def submit():
             sel_patient = pat_cb.get()
             sel_doc = doc_cb.get()
@@ -330,87 +619,118 @@ class HospitalUI:
 
             try:
                 appointment_time = datetime.strptime(f"{dt} {tm}", "%Y-%m-%d %H:%M")
-                if appointment_time < datetime.now():
-                    raise ValueError("Appointment time must be in the future.")
-
-                appt = Appointment(pid, did, appointment_time, atype)
-                self.hms.appointments[appt.appointment_id] = appt
-
-                # add to doctor's schedule
-                doctor = self.hms.doctors.get(did)
-                if doctor:
-                    date_str = appointment_time.strftime("%Y-%m-%d")
-                    if date_str not in doctor.schedule:
-                        doctor.schedule[date_str] = []
-                    doctor.schedule[date_str].append(appt.appointment_id)
-
-                self.output.insert(tk.END, f"✅ Scheduled appointment {appt.appointment_id} — Patient {pid}, Doctor {did} at {appointment_time.strftime('%Y-%m-%d %H:%M')}\n")
-                messagebox.showinfo("Success", f"Appointment scheduled (ID: {appt.appointment_id}).")
-                win.destroy()
+            except ValueError:
+                messagebox.showerror("Error", "Invalid date/time format. Use YYYY-MM-DD and HH:MM.")
+                return
 
-            except Exception as e:
-                messagebox.showerror("Error", str(e))
+            schedule_btn.config(state="disabled")
+            self.run(self.hms.schedule_appointment, pid, did, appointment_time, atype, duration_e.get(),
+                     description="Schedule appointment", on_done=scheduled)
+
+        def scheduled(result):
+            if not self._form_succeeded(win, schedule_btn, result):
+                return
+            appt = result.data
+            self.output.insert(tk.END, f"✅ Scheduled appointment {appt.appointment_id} — Patient {appt.patient_id}, Doctor {appt.doctor_id} at {appt.appointment_time.strftime('%Y-%m-%d %H:%M')}\n")
+            messagebox.showinfo("Success", f"Appointment scheduled (ID: {appt.appointment_id}).")
 
-        tk.Button(frame, text="Schedule", bg="#4CAF50", fg="white", command=submit).pack(pady=12)
+        schedule_btn = tk.Button(frame, text="Schedule", bg="#4CAF50", fg="white", command=submit)
+        schedule_btn.pack(pady=12)
 
     # ---------- Viewing helpers ----------
+    def _open_grid(self, title, kind, columns, filters=(), names=None):
+        """Show records of one kind in a paged, sortable grid window.
+
+        A names dict, if given, is refilled with every page's patient and
+        doctor names (see record_page) before the columns are formatted.
+        """
+        win = tk.Toplevel(self.root)
+        win.title(title)
+        win.geometry("980x520")
+        def fetch(*args, **filters):
+            ready, page = self.worker.try_call(self.hms.record_page, kind, *args, names=names is not None,
+                                               **filters)
+            if not ready:
+                return None
+            if names is not None:
+                records, total, page_names = page
+                names.clear()
+                names.update(page_names)
+                return records, total
+            return page
+
+        grid = VirtualGrid(win, columns, fetch, filters, revision=lambda: self.hms.revision)
+        grid.pack(fill="both", expand=True, padx=12, pady=12)
+        return grid
+
     def view_patients_ui(self):
-        patients = sorted(self.hms.patient_bst.inorder_traversal(), key=lambda p: p.patient_id)
-        if not patients:
-            self.output.insert(tk.END, "No patients registered.\n")
-            return
-        self.output.insert(tk.END, f"\n--- All Patients ({len(patients)}) ---\n")
-        for p in patients:
-            self.output.insert(tk.END,
-                f"{p.patient_id} | {p.name} | Age: {p.age} | Condition: {p.condition} | Status: {p.status} | Room: {p.room_number or 'N/A'} | Doctor: {p.assigned_doctor or 'N/A'}\n"
-            )
+        self._open_grid("All Patients", "patients", [
+            ("patient_id", "ID", 80, lambda p: p.patient_id),
+            ("name", "Name", 180, lambda p: p.name),
+            ("age", "Age", 50, lambda p: p.age),
+            ("condition", "Condition", 200, lambda p: p.condition),
+            ("priority", "Priority", 80, lambda p: Priority.LABELS.get(p.priority, p.priority)),
+            ("status", "Status", 90, lambda p: p.status),
+            ("room_number", "Room", 70, lambda p: p.room_number or "N/A"),
+            ("assigned_doctor", "Doctor", 70, lambda p: p.assigned_doctor or "N/A"),
+        ], [("status", "Status", [PatientStatus.WAITING, PatientStatus.ADMITTED, PatientStatus.DISCHARGED]),
+            ("priority", "Priority", sorted(Priority.LABELS))])
 
     def view_doctors_ui(self):
-        docs = sorted(self.hms.doctors.values(), key=lambda d: d.doctor_id)
-        if not docs:
-            self.output.insert(tk.END, "No doctors in system.\n")
-            return
-        self.output.insert(tk.END, f"\n--- Doctors ({len(docs)}) ---\n")
-        for d in docs:
-            self.output.insert(tk.END,
-                f"{d.doctor_id} | Dr. {d.name} | {d.specialization} | Load: {len(d.current_patients)}/{d.max_patients}\n"
-            )
+        self.run(self.hms.doctor_specializations, description="List specializations",
+                 on_done=self._open_doctor_grid)
+
+    def _open_doctor_grid(self, specializations):
+        self._open_grid("Doctors", "doctors", [
+            ("doctor_id", "ID", 80, lambda d: d.doctor_id),
+            ("name", "Name", 220, lambda d: d.name),
+            ("specialization", "Specialization", 180, lambda d: d.specialization),
+            ("load", "Patients", 80, lambda d: len(d.current_patients)),
+            ("max_patients", "Max", 60, lambda d: d.max_patients),
+        ], [("specialization", "Specialization", specializations)])
 
     def view_rooms_ui(self):
-        rooms = sorted(self.hms.rooms.values(), key=lambda r: r.room_number)
-        if not rooms:
-            self.output.insert(tk.END, "No rooms defined.\n")
-            return
-        self.output.insert(tk.END, f"\n--- Rooms ({len(rooms)}) ---\n")
-        for r in rooms:
-            status = "Available" if r.is_available else "Full"
-            self.output.insert(tk.END,
-                f"{r.room_number} | {r.room_type} | Capacity: {r.capacity} | Occupied: {r.occupied_beds} | Status: {status}\n"
-            )
+        self._open_grid("Rooms", "rooms", [
+            ("room_number", "Room", 80, lambda r: r.room_number),
+            ("room_type", "Type", 120, lambda r: r.room_type),
+            ("capacity", "Capacity", 80, lambda r: r.capacity),
+            ("occupied_beds", "Occupied", 80, lambda r: r.occupied_beds),
+            ("is_available", "Status", 100, lambda r: "Available" if r.is_available else "Full"),
+        ], [("room_type", "Type", ROOM_TYPES)])
 
     def view_appointments_ui(self):
-        apps = sorted(self.hms.appointments.values(), key=lambda a: a.appointment_time)
-        if not apps:
-            self.output.insert(tk.END, "No appointments scheduled.\n")
-            return
-        self.output.insert(tk.END, f"\n--- Appointments ({len(apps)}) ---\n")
-        for a in apps:
-            patient_name = self.hms.patients.get(a.patient_id).name if a.patient_id in self.hms.patients else "Unknown"
-            doctor_name = self.hms.doctors.get(a.doctor_id).name if a.doctor_id in self.hms.doctors else "Unknown"
-            self.output.insert(tk.END,
-                f"{a.appointment_id} | {a.appointment_time.strftime('%Y-%m-%d %H:%M')} | Patient: {patient_name} ({a.patient_id}) | Doctor: Dr. {doctor_name} ({a.doctor_id}) | Type: {a.appointment_type} | Status: {a.status}\n"
-            )
+        names = {}  # Filled by each page fetch, so formatting never reads the hospital
+
+        def patient_name(a):
+            return f"{names.get(a.patient_id, 'Unknown')} ({a.patient_id})"
+
+        def doctor_name(a):
+            return f"{names.get(a.doctor_id, 'Unknown')} ({a.doctor_id})"
+
+        self._open_grid("Appointments", "appointments", [
+            ("appointment_time", "Time", 130, lambda a: a.appointment_time.strftime('%Y-%m-%d %H:%M')),
+            ("appointment_id", "ID", 90, lambda a: a.appointment_id),
+            ("patient_id", "Patient", 200, patient_name),
+            ("doctor_id", "Doctor", 220, doctor_name),
+            ("appointment_type", "Type", 110, lambda a: a.appointment_type),
+            ("duration_minutes", "Minutes", 60, lambda a: a.duration_minutes),
+            ("status", "Status", 90, lambda a: a.status),
+        ], [("status", "Status", [AppointmentStatus.SCHEDULED, AppointmentStatus.COMPLETED,
+                                  AppointmentStatus.CANCELLED])], names)
 
     def view_stats_ui(self):
-        total_patients = len(self.hms.patients)
-        admitted = sum(1 for p in self.hms.patients.values() if p.status == "Admitted")
-        discharged = sum(1 for p in self.hms.patients.values() if p.status == "Discharged")
-        waiting = len(self.hms.emergency_queue) + len(self.hms.regular_queue)
-        total_rooms = len(self.hms.rooms)
-        occupied_rooms = sum(1 for r in self.hms.rooms.values() if not r.is_available)
-        total_doctors = len(self.hms.doctors)
-        busy_doctors = sum(1 for d in self.hms.doctors.values() if d.current_patients)
-        scheduled_appointments = len([a for a in self.hms.appointments.values() if a.status == "Scheduled"])
+        self.run(self.hms.get_statistics, description="Collect statistics", on_done=self._show_stats)
+
+    def _show_stats(self, stats):
+        total_patients = stats['total_patients']
+        admitted = stats['admitted_patients']
+        discharged = stats['discharged_patients']
+        waiting = stats['waiting_patients']
+        total_rooms = stats['total_rooms']
+        occupied_rooms = stats['occupied_rooms']
+        total_doctors = stats['total_doctors']
+        busy_doctors = stats['busy_doctors']
+        scheduled_appointments = stats['scheduled_appointments']
 
         self.output.insert(tk.END, "\n--- Hospital Statistics ---\n")
         self.output.insert(tk.END, f"Total Patients Registered: {total_patients}\n")
@@ -419,10 +739,16 @@ class HospitalUI:
         self.output.insert(tk.END, f"  Waiting: {waiting}\n\n")
         self.output.insert(tk.END, f"Total Rooms: {total_rooms} | Occupied Rooms: {occupied_rooms}\n")
         self.output.insert(tk.END, f"Total Doctors: {total_doctors} | Busy Doctors: {busy_doctors}\n")
-        self.output.insert(tk.END, f"Scheduled Appointments: {len(self.hms.appointments)} | Upcoming: {scheduled_appointments}\n\n")
+        self.output.insert(tk.END, f"Scheduled Appointments: {stats['total_appointments']} | Upcoming: {scheduled_appointments}\n\n")
 
 # Run the UI
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hospital Management System UI")
+    storage_group = parser.add_mutually_exclusive_group()
+    storage_group.add_argument("--data-dir", help="keep hospital state in this directory (write-ahead log and snapshots)")
+    storage_group.add_argument("--db", help="keep hospital state in this SQLite database")
+    args = parser.parse_args()
+
     root = tk.Tk()
-    app = HospitalUI(root)
+    app = HospitalUI(root, open_storage(args.data_dir, args.db))
     root.mainloop()
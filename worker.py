@@ -0,0 +1,171 @@
+"""Run backend calls off the Tk main loop.
+
+Jobs run one at a time, in submission order, on a worker thread and hold a
+lock that guards the HospitalManagementSystem while they run. Results,
+errors and progress updates come back through a thread-safe queue that the
+UI drains with root.after, so every callback runs on the main thread and may
+touch widgets:
+
+    worker = BackgroundWorker(root.after)
+    worker.submit(hms.admit_patient, on_done=show_result, on_error=show_error)
+
+A long job is submitted with with_job=True and receives its Job as the
+first argument; calling job.progress(done, total) reports progress and
+raises JobCancelled once the user has cancelled it.
+"""
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job by Job.progress() after Job.cancel()"""
+
+
+class Job:
+    """One submitted call and the callbacks that receive its outcome on the main thread"""
+
+    def __init__(self, worker, job_id, description, on_done, on_error, on_progress, on_cancel):
+        self.worker = worker
+        self.job_id = job_id
+        self.description = description
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancel = on_cancel
+        self.future = None
+        self._cancelled = threading.Event()
+
+    def __repr__(self):
+        return f"Job({self.job_id}, {self.description!r})"
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Ask the job to stop; a job that has not started yet never runs"""
+        if self._cancelled.is_set():
+            return
+        self._cancelled.set()
+        if self.future is not None and self.future.cancel():
+            self.worker._post(self, 'cancelled', None)
+
+    def progress(self, done, total=None, message=""):
+        """Report progress from inside the job; raises JobCancelled if the job was cancelled"""
+        if self._cancelled.is_set():
+            raise JobCancelled(self.description)
+        self.worker._post(self, 'progress', (done, total, message))
+
+
+class BackgroundWorker:
+    """Single-thread executor whose results are delivered through a polled queue.
+
+    schedule is a Tk-style after(milliseconds, callback) function. Listeners
+    added with watch() see every event as (job, kind, value), where kind is
+    'started', 'progress', 'done', 'error' or 'cancelled'; the UI uses them
+    for its status bar.
+    """
+
+    def __init__(self, schedule, poll_ms=50, max_events=200, shared_lock=None):
+        self.schedule = schedule
+        self.shared_lock = shared_lock  # A ReadWriteLock try_call() must also get without waiting, e.g. hms.lock
+        self.poll_ms = poll_ms
+        self.max_events = max_events
+        self.lock = threading.RLock()
+        self.events = queue.Queue()
+        self.pending = {}  # job_id -> Job, submitted and not yet finished
+        self._ids = itertools.count(1)
+        self._listeners = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hms-worker")
+        self._running = True
+        self.schedule(self.poll_ms, self._drain)
+
+    def watch(self, listener):
+        self._listeners.append(listener)
+
+    def submit(self, func, *args, description="", on_done=None, on_error=None, on_progress=None,
+               on_cancel=None, with_job=False, **kwargs):
+        """Queue func(*args, **kwargs) and return its Job"""
+        job = Job(self, next(self._ids), description or getattr(func, '__name__', 'job'),
+                  on_done, on_error, on_progress, on_cancel)
+        if with_job:
+            args = (job,) + args
+        self.pending[job.job_id] = job
+        job.future = self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def try_call(self, func, *args, **kwargs):
+        """Run a quick read on the calling thread unless a job or a writer is busy: (True, result) or (False, None)
+
+        Neither lock is waited for, so the main loop never blocks behind a
+        server or import writing to the hospital.
+        """
+        if not self.lock.acquire(blocking=False):
+            return False, None
+        try:
+            if self.shared_lock is None:
+                return True, func(*args, **kwargs)
+            if not self.shared_lock.acquire_read(blocking=False):
+                return False, None
+            try:
+                return True, func(*args, **kwargs)
+            finally:
+                self.shared_lock.release_read()
+        finally:
+            self.lock.release()
+
+    def cancel_all(self):
+        for job in list(self.pending.values()):
+            job.cancel()
+
+    def shutdown(self):
+        """Cancel queued and running jobs and wait for the worker thread to stop"""
+        self.cancel_all()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._running = False
+
+    def _run(self, job, func, args, kwargs):
+        if job.cancelled:
+            self._post(job, 'cancelled', None)
+            return
+        self._post(job, 'started', None)
+        try:
+            with self.lock:
+                result = func(*args, **kwargs)
+        except JobCancelled:
+            self._post(job, 'cancelled', None)
+        except Exception as e:
+            self._post(job, 'error', e)
+        else:
+            self._post(job, 'done', result)
+
+    def _post(self, job, kind, value):
+        self.events.put((job, kind, value))
+
+    def _drain(self):
+        """Deliver queued events on the main thread, a bounded number per tick"""
+        for _ in range(self.max_events):
+            try:
+                job, kind, value = self.events.get_nowait()
+            except queue.Empty:
+                break
+            self._deliver(job, kind, value)
+        if self._running:
+            self.schedule(self.poll_ms, self._drain)
+
+    def _deliver(self, job, kind, value):
+        if kind in ('done', 'error', 'cancelled'):
+            if self.pending.pop(job.job_id, None) is None:
+                return  # Already finished, e.g. cancelled twice
+        if kind == 'progress' and job.on_progress:
+            job.on_progress(*value)
+        elif kind == 'done' and job.on_done:
+            job.on_done(value)
+        elif kind == 'error' and job.on_error:
+            job.on_error(value)
+        elif kind == 'cancelled' and job.on_cancel:
+            job.on_cancel()
+        for listener in self._listeners:
+            listener(job, kind, value)